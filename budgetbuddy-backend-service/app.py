@@ -8,9 +8,25 @@ from controllers.reminder_routes import reminder_bp
 from controllers.data_routes import data_bp
 from services.ai_service import AIService
 from services.firebase_service import FirebaseService
+from services.alert_queue import AlertWorker
+from services.report_service import ReportService
+from utils.classifier_service import ClassifierClient
+from utils.expense_classifier import ExpenseClassifier
+import os
 
 app = Flask(__name__)
-firebase_service = FirebaseService()
+firebase_service = FirebaseService.instance()
+
+# Budget alerts are queued by requests and emailed from this background worker.
+# It is started by the entry points (below and gunicorn.conf.py), not on import.
+# Set ALERT_WORKER=0 when a separate `python -m scripts.run_alert_worker` drains them.
+alert_worker = AlertWorker()
+
+# The spaCy model otherwise loads on the first classification. Preloading it at
+# import lets a preforking server (see gunicorn.conf.py) share it across workers.
+# With CLASSIFIER_SOCKET set, the classifier server owns the model instead.
+if os.getenv("PRELOAD_CLASSIFIER") == "1" and not ClassifierClient.SOCKET_PATH:
+    ExpenseClassifier.preload()
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix="/auth")
@@ -33,6 +49,23 @@ def verify_token():
     
     return jsonify({"uid": uid}), 200
 
+@app.route('/health', methods=['GET'])
+def health_check():
+    ok, error = firebase_service.ping()
+    if not ok:
+        return jsonify({"status": "unavailable", "error": error}), 503
+    return jsonify({
+        "status": "ok",
+        "classifier": {
+            "loaded": ExpenseClassifier.loaded(),
+            "socket": ClassifierClient.SOCKET_PATH,
+            "cache": ExpenseClassifier.cache_stats(),
+            "paths": ExpenseClassifier.path_stats(),
+        },
+        "reports": ReportService.report_cache.stats(),
+        "pdf": ReportService.pdf_renderer.stats(),
+    }), 200
+
 @app.route('/transactions/recurring/process', methods=['POST'])
 def process_recurring_transactions():
     token = request.headers.get('Authorization')
@@ -42,4 +75,6 @@ def process_recurring_transactions():
     return AIService.process_recurring_transactions(token)
 
 if __name__ == "__main__":
+    if os.getenv("ALERT_WORKER", "1") != "0":
+        alert_worker.start()
     app.run(debug=True)
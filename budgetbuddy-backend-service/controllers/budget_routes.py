@@ -12,7 +12,12 @@ def add_or_set_budget():
 @budget_bp.route("/", methods=["GET"])
 def get_budgets():
     token = request.headers.get("Authorization")
-    return BudgetService.get_budgets(token)
+    return BudgetService.get_budgets(token, request.args)
+
+@budget_bp.route("/status", methods=["GET"])
+def budget_status():
+    token = request.headers.get("Authorization")
+    return BudgetService.budget_status(token, request.args)
 
 @budget_bp.route("/<budget_id>", methods=["PUT"])
 def edit_budget(budget_id):
@@ -6,8 +6,9 @@ data_bp = Blueprint("data", __name__)
 @data_bp.route("/export", methods=["GET"])
 def export_data():
     token = request.headers.get("Authorization")
-    filetype = request.args.get("type", "csv")  # json or csv
-    return DataService.export_expenses(token, filetype)
+    filetype = request.args.get("type", "csv")  # csv, ndjson, json, columnar or parquet
+    gzip_output = request.accept_encodings.quality("gzip") > 0
+    return DataService.export_expenses(token, filetype, gzip_output)
 
 @data_bp.route("/import", methods=["POST"])
 def import_data():
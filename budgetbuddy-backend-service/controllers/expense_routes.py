@@ -9,6 +9,13 @@ def add_expense():
     data = request.get_json()
     return ExpenseService.add_expense(data, token)
 
+@expense_bp.route("/classify", methods=["POST"])
+def classify_expenses():
+    # {"descriptions": [...]} -> {"categories": [...]}
+    token = request.headers.get("Authorization")
+    data = request.get_json()
+    return ExpenseService.classify_descriptions(data, token)
+
 @expense_bp.route("/<expense_id>", methods=["PUT"])
 def edit_expense(expense_id):
     token = request.headers.get("Authorization")
@@ -23,13 +30,13 @@ def delete_expense(expense_id):
 @expense_bp.route("/", methods=["GET"])
 def list_expenses():
     token = request.headers.get("Authorization")
-    return ExpenseService.list_expenses(token)
+    return ExpenseService.list_expenses(token, request.args)
 
 @expense_bp.route("/filter", methods=["GET"])
-def filter_by_category():
+def filter_expenses():
+    # category, method (comma-separated sets), date, from, to, min_amount, max_amount, notes, explain
     token = request.headers.get("Authorization")
-    category = request.args.get("category")
-    return ExpenseService.filter_by_category(token, category)
+    return ExpenseService.filter_expenses(token, request.args)
 
 @expense_bp.route("/<expense_id>", methods=["GET"])
 def get_expense(expense_id):
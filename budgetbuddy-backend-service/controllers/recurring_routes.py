@@ -12,7 +12,7 @@ def add_recurring():
 @recurring_bp.route("/", methods=["GET"])
 def list_recurring():
     token = request.headers.get("Authorization")
-    return RecurringService.list_recurring_expenses(token)
+    return RecurringService.list_recurring_expenses(token, request.args)
 
 @recurring_bp.route("/<recurring_id>", methods=["PUT"])
 def edit_recurring(recurring_id):
@@ -29,5 +29,5 @@ def delete_reminder(reminder_id):
 @reminder_bp.route("/", methods=["GET"])
 def list_reminders():
     token = request.headers.get("Authorization")
-    return ReminderService.list_reminders(token)
+    return ReminderService.list_reminders(token, request.args)
 
@@ -7,12 +7,12 @@ report_bp = Blueprint("report", __name__)
 def monthly_report():
     token = request.headers.get("Authorization")
     month = request.args.get("month")  # Format: YYYY-MM
-    return ReportService.generate_monthly_report(token, month)
+    return ReportService.generate_monthly_report(token, month, request.headers.get("If-None-Match"))
 
 @report_bp.route("/insights", methods=["GET"])
 def insights_report():
     token = request.headers.get("Authorization")
-    return ReportService.generate_weekly_insights(token)
+    return ReportService.generate_weekly_insights(token, request.headers.get("If-None-Match"))
 
 @report_bp.route("/monthly/pdf", methods=["GET"])
 def monthly_pdf():
@@ -0,0 +1,22 @@
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+
+# Import the app in the master, with the classifier model loaded, so forked
+# workers share its memory copy-on-write instead of each loading a copy
+preload_app = True
+os.environ.setdefault("PRELOAD_CLASSIFIER", "1")
+
+
+def pre_fork(server, worker):
+    # Keep preloaded objects out of the collector so it doesn't dirty shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Threads don't survive fork: run the alert worker in each worker, not the master
+    if os.getenv("ALERT_WORKER", "1") != "0":
+        from app import alert_worker
+        alert_worker.start()
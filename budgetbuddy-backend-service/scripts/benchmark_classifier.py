@@ -0,0 +1,47 @@
+from utils.expense_classifier import ExpenseClassifier
+import argparse
+import random
+import time
+
+WORDS = [
+    "dinner", "with", "friends", "monthly", "pass", "ride", "to", "airport", "weekend", "trip",
+    "concert", "tickets", "electricity", "bill", "coffee", "shop", "gym", "membership", "books",
+    "pharmacy", "gift", "for", "mom", "parking", "laundry", "haircut", "insurance", "lunch",
+]
+
+
+def descriptions(count, distinct, seed=0):
+    rng = random.Random(seed)
+    pool = [" ".join(rng.sample(WORDS, rng.randint(2, 5))) for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def benchmark(count, distinct, batch_size=None, n_process=None):
+    ExpenseClassifier.load()
+    texts = descriptions(count, distinct)
+
+    ExpenseClassifier.cache().clear()
+    started = time.perf_counter()
+    for text in texts:
+        ExpenseClassifier.classify(text)
+    one_by_one = time.perf_counter() - started
+
+    ExpenseClassifier.cache().clear()
+    started = time.perf_counter()
+    ExpenseClassifier.classify_many(texts, batch_size, n_process)
+    batched = time.perf_counter() - started
+
+    print(f"{count} descriptions ({distinct} distinct)")
+    print(f"  classify():      {count / one_by_one:10.0f} descriptions/sec")
+    print(f"  classify_many(): {count / batched:10.0f} descriptions/sec")
+    return one_by_one, batched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare one-by-one and batched expense classification")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--distinct", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--n-process", type=int)
+    args = parser.parse_args()
+    benchmark(args.count, args.distinct, args.batch_size, args.n_process)
@@ -0,0 +1,69 @@
+from services.memory_store import MemoryClient
+from services.report_service import ReportService
+from services.category_rollups import CategoryRollups
+from datetime import date, timedelta
+import argparse
+import calendar
+import random
+import time
+
+CATEGORIES = ["Food", "Transport", "Entertainment", "Housing", "Others"]
+
+def seed_history(db, uid, years, per_day, seed=0):
+    rng = random.Random(seed)
+    expenses = db.collection("expenses")
+    day = date.today() - timedelta(days=365 * years)
+    while day <= date.today():
+        for _ in range(per_day):
+            expenses.add({
+                "user_id": uid,
+                "amount": round(rng.uniform(1, 200), 2),
+                "category": rng.choice(CATEGORIES),
+                "date": day.isoformat(),
+                "method": "Card",
+                "notes": "benchmark expense",
+            })
+        day += timedelta(days=1)
+
+def expenses_between(db, uid, start_date, end_date):
+    """What monthly reports read before rollups: a date range on the (user_id, date) index."""
+    return db.collection("expenses") \
+        .where("user_id", "==", uid) \
+        .where("date", ">=", start_date.isoformat()) \
+        .where("date", "<=", end_date.isoformat()) \
+        .select(["amount", "category"]) \
+        .stream()
+
+def benchmark(years, per_day):
+    db, uid = MemoryClient(), "benchmark-user"
+    seed_history(db, uid, years, per_day)
+    CategoryRollups.rebuild(db, uid)
+    start_date = ReportService.month_start(date.today().strftime("%Y-%m"))
+    end_date = start_date.replace(day=calendar.monthrange(start_date.year, start_date.month)[1])
+
+    # Before: every expense the user has, filtered by date in Python
+    started = time.perf_counter()
+    before = sum(1 for _ in db.collection("expenses").where("user_id", "==", uid).stream())
+    before_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    after = sum(1 for _ in expenses_between(db, uid, start_date, end_date))
+    after_seconds = time.perf_counter() - started
+
+    # Now: the month's rollup document
+    started = time.perf_counter()
+    CategoryRollups.read(db, uid, "monthly", start_date)
+    rollup_seconds = time.perf_counter() - started
+
+    print(f"{years} years of history, {per_day} expenses/day")
+    print(f"  full scan:   {before:8d} documents read, {before_seconds * 1000:8.1f} ms")
+    print(f"  month range: {after:8d} documents read, {after_seconds * 1000:8.1f} ms")
+    print(f"  rollup:      {1:8d} documents read, {rollup_seconds * 1000:8.1f} ms")
+    return before, after
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Documents read per monthly report by a full scan, a month range query and the rollup")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--per-day", type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.years, args.per_day)
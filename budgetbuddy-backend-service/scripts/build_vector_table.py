@@ -0,0 +1,56 @@
+from services.firebase_service import FirebaseService
+from utils.expense_classifier import ExpenseClassifier
+from utils.vector_table import VectorTable
+import argparse
+import random
+import time
+
+def stored_descriptions():
+    descriptions = set()
+    for doc in FirebaseService.instance().db.collection("expenses").stream():
+        notes = doc.to_dict().get("notes")
+        if notes:
+            descriptions.add(notes)
+    return sorted(descriptions)
+
+def build_vector_table(output, descriptions, holdout=0.1, seed=0):
+    import spacy
+
+    nlp = spacy.load(ExpenseClassifier.MODEL_NAME)
+    descriptions = list(descriptions)
+    random.Random(seed).shuffle(descriptions)
+    split = int(len(descriptions) * holdout)
+    held_out, training = descriptions[:split], descriptions[split:]
+
+    texts = training + list(ExpenseClassifier.CATEGORY_DOCS.values())
+    built = VectorTable.build(nlp, texts, output)
+    print(f"✅ Wrote {len(built)} vectors ({built.dim} dims, float16) to {output}")
+
+    started = time.perf_counter()
+    table = VectorTable.load(output)
+    print(f"   Load time: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if held_out:
+        expected = ExpenseClassifier.classify_with_model(nlp, held_out)
+        actual = ExpenseClassifier.classify_with_model(table, held_out)
+        mismatches = [(d, e, a) for d, e, a in zip(held_out, expected, actual) if e != a]
+        agreement = 1 - len(mismatches) / len(held_out)
+        print(f"   Held-out agreement with {ExpenseClassifier.MODEL_NAME}: {agreement:.2%} of {len(held_out)}")
+        for description, spacy_category, table_category in mismatches[:20]:
+            print(f"   ✗ {description!r}: spaCy {spacy_category}, table {table_category}")
+        return agreement
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the classifier's memory-mapped vector table")
+    parser.add_argument("--output", default=ExpenseClassifier.VECTORS_PATH or "classifier_vectors")
+    parser.add_argument("--input", help="file with one description per line (default: notes of stored expenses)")
+    parser.add_argument("--holdout", type=float, default=0.1, help="fraction kept out of the vocabulary to check agreement")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input) as f:
+            descriptions = sorted({line.strip() for line in f if line.strip()})
+    else:
+        descriptions = stored_descriptions()
+    build_vector_table(args.output, descriptions, args.holdout)
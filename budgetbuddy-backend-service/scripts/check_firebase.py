@@ -0,0 +1,13 @@
+from services.firebase_service import FirebaseService
+import sys
+
+def check_connection():
+    ok, error = FirebaseService.instance().ping()
+    if ok:
+        print("Firebase Firestore DB connection - SUCCESSFUL!!")
+    else:
+        print("Firebase Firestore DB connection - FAILED!!", error)
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if check_connection() else 1)
@@ -0,0 +1,19 @@
+from services.firebase_service import FirebaseService
+from services.category_rollups import CategoryRollups
+import sys
+
+def check_rollups(uid=None, rebuild=False):
+    db = FirebaseService.instance().db
+    mismatches = CategoryRollups.check(db, uid)
+    for mismatch in mismatches[:20]:
+        print(f"✗ {mismatch['id']}: expected {mismatch['expected']}, stored {mismatch['actual']}")
+    print(f"{'⚠️' if mismatches else '✅'} {len(mismatches)} rollups out of date" + (f" for user: {uid}" if uid else ""))
+    if mismatches and rebuild:
+        count = CategoryRollups.rebuild(db, uid)
+        print(f"✅ Rebuilt {count} rollups")
+    return mismatches
+
+if __name__ == "__main__":
+    # --rebuild rewrites the rollups from raw expenses when any are out of date
+    args = [arg for arg in sys.argv[1:] if arg != "--rebuild"]
+    check_rollups(args[0] if args else None, rebuild="--rebuild" in sys.argv)
@@ -0,0 +1,11 @@
+from services.firebase_service import FirebaseService
+from services.spend_counters import SpendCounters
+import sys
+
+def rebuild_spend_counters(uid=None):
+    count = SpendCounters.rebuild(FirebaseService.instance().db, uid)
+    print(f"✅ Rebuilt {count} spend counters" + (f" for user: {uid}" if uid else ""))
+    return count
+
+if __name__ == "__main__":
+    rebuild_spend_counters(sys.argv[1] if len(sys.argv) > 1 else None)
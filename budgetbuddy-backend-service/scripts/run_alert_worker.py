@@ -0,0 +1,15 @@
+from services.alert_queue import AlertQueue, AlertWorker
+from services.firebase_service import FirebaseService
+import sys
+
+def drain_alerts():
+    stats = AlertQueue.drain(FirebaseService.instance().db)
+    print(f"✅ Alerts sent: {stats['sent']}, retrying: {stats['retried']}, failed: {stats['failed']}")
+    return stats
+
+if __name__ == "__main__":
+    # --once drains what is due and exits (cron); otherwise keep polling
+    if "--once" in sys.argv:
+        drain_alerts()
+    else:
+        AlertWorker().run()
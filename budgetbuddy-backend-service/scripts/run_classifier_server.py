@@ -0,0 +1,19 @@
+from utils.classifier_service import ClassifierServer
+from utils.expense_classifier import ExpenseClassifier
+import os
+import sys
+
+def run_classifier_server(path):
+    ExpenseClassifier.preload()
+    server = ClassifierServer(path)
+    print(f"✅ Classifier serving on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    # Point the web workers at the same path with CLASSIFIER_SOCKET
+    run_classifier_server(sys.argv[1] if len(sys.argv) > 1 else os.getenv("CLASSIFIER_SOCKET", "/tmp/budgetbuddy-classifier.sock"))
@@ -1,9 +1,11 @@
 from services.firebase_service import FirebaseService
+from services.spend_counters import SpendCounters
+from services.expense_writes import stage_expense_writes
 from datetime import datetime
 import uuid
 
 def run_recurring_job():
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
     today = datetime.today()
     current_day = today.day
     today_str = today.strftime("%Y-%m-%d")
@@ -21,7 +23,12 @@ def run_recurring_job():
                 "method": data["method"],
                 "notes": f"[Recurring] {data.get('notes', '')}"
             }
-            firebase.db.collection("expenses").document(str(uuid.uuid4())).set(expense)
+            db = firebase.db
+            batch = db.batch()
+            batch.set(db.collection("expenses").document(str(uuid.uuid4())), expense)
+            deltas = SpendCounters.deltas(expense)
+            stage_expense_writes(batch, db, data["user_id"], deltas)
+            batch.commit()
             print(f"✅ Added recurring expense for user: {data['user_id']}")
 
 if __name__ == "__main__":
@@ -3,11 +3,12 @@ from datetime import datetime
 from services.email_service import EmailService
 
 def send_daily_reminders():
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
     today = datetime.today()
     today_day = today.day
 
     reminders = firebase.db.collection("reminders").stream()
+    messages = []
 
     for doc in reminders:
         rem = doc.to_dict()
@@ -24,9 +25,18 @@ def send_daily_reminders():
             user = user_doc.to_dict()
 
             if prefs.get("email_enabled"):
-                EmailService.send_custom_notification(user["email"], rem["title"], rem["message"])
+                messages.append((user["email"], rem["title"], rem["message"]))
 
             # You can similarly integrate SMS (e.g., with Twilio) if prefs["sms_enabled"]
 
+    # One pooled SMTP session carries many reminders instead of a login per email
+    results = EmailService.send_many(messages)
+    for result in results:
+        if result["status"] != "sent":
+            print(f"[Reminder Email Error] {result['to']}: {result['error']}")
+    print(f"✅ Sent {sum(r['status'] == 'sent' for r in results)} of {len(results)} reminder emails")
+    EmailService.close_pool()
+    return results
+
 if __name__ == "__main__":
     send_daily_reminders()
@@ -2,11 +2,12 @@ from flask import jsonify
 from datetime import datetime, timedelta
 from collections import defaultdict
 from services.firebase_service import FirebaseService
+from services.category_rollups import CategoryRollups
 
 #kepp last for implementation
 class AIService:
 
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
 
     @classmethod
     def generate_suggestions(cls, token):
@@ -16,18 +17,10 @@ class AIService:
 
         today = datetime.today()
         current_month = today.strftime("%Y-%m")
-        past_expenses = cls.firebase.db.collection("expenses").where("user_id", "==", uid).stream()
-
-        # Aggregate expenses
-        monthly_totals = defaultdict(lambda: defaultdict(float))  # month -> category -> total
+        # month -> category -> total, one rollup document per month of history
+        monthly_totals = defaultdict(dict, CategoryRollups.history(cls.firebase.db, uid, "monthly"))
         service_keywords = ["spotify", "netflix", "prime", "hotstar"]
 
-        for doc in past_expenses:
-            e = doc.to_dict()
-            e_date = datetime.strptime(e["date"], "%Y-%m-%d")
-            month_str = e_date.strftime("%Y-%m")
-            monthly_totals[month_str][e["category"]] += float(e["amount"])
-
         # 1. High category spend check
         suggestions = []
         for category in monthly_totals[current_month]:
@@ -0,0 +1,169 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from services.document_store import run_transaction
+from services.email_service import EmailService
+from services.firebase_service import FirebaseService
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _timestamp(moment):
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+class AlertQueue:
+    """Durable outbox for notification emails, drained off the request path.
+
+    Alerts are stored as documents in the ``alert_outbox`` collection of the
+    configured storage backend, so they survive restarts on Firestore and SQLite.
+    ``drain`` sends the due ones, deletes them once delivered and reschedules
+    failures with exponential backoff until MAX_ATTEMPTS, after which they are
+    kept with status ``failed``.
+
+    Before sending, a worker claims the alert in a transaction: status
+    ``sending`` with ``next_attempt_at`` moved LEASE_SECONDS ahead. Other workers
+    skip it until the lease expires, so a worker that dies mid-send only delays
+    the alert. Delivery is still at-least-once.
+    """
+
+    COLLECTION = "alert_outbox"
+    MAX_ATTEMPTS = int(os.getenv("ALERT_MAX_ATTEMPTS", 8))
+    BACKOFF_BASE_SECONDS = 30
+    BACKOFF_MAX_SECONDS = 3600
+    DRAIN_LIMIT = 100
+    LEASE_SECONDS = int(os.getenv("ALERT_LEASE_SECONDS", 300))
+
+    SENDERS = {
+        "budget_alert": lambda payload: EmailService.send_budget_alert(
+            payload["email"], payload["spent"], payload["limit"]
+        ),
+    }
+
+    _wakeup = threading.Event()
+
+    @classmethod
+    def enqueue(cls, db, kind, payload, now=None):
+        if kind not in cls.SENDERS:
+            raise ValueError(f"Unknown alert kind: {kind}")
+        now = now or datetime.now(timezone.utc)
+        db.collection(cls.COLLECTION).add({
+            "kind": kind,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "created_at": _timestamp(now),
+            "next_attempt_at": _timestamp(now),
+            "last_error": None,
+        })
+        cls._wakeup.set()
+
+    @classmethod
+    def enqueue_budget_alert(cls, db, email, spent, limit):
+        cls.enqueue(db, "budget_alert", {"email": email, "spent": spent, "limit": limit})
+
+    @classmethod
+    def backoff(cls, attempts):
+        """Delay before retry number ``attempts`` (1-based): 30s, 60s, 120s, ... capped at an hour."""
+        return timedelta(seconds=min(cls.BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), cls.BACKOFF_MAX_SECONDS))
+
+    @classmethod
+    def claim(cls, db, reference, now):
+        """Lease the alert to this worker; returns it, or None if it isn't due or someone else has it."""
+        def claim(transaction):
+            snapshot = reference.get(transaction=transaction)
+            alert = snapshot.to_dict() if snapshot.exists else None
+            if not alert or alert.get("status") not in ("pending", "sending") \
+                    or alert.get("next_attempt_at", "") > _timestamp(now):
+                return None
+            transaction.update(reference, {
+                "status": "sending",
+                "next_attempt_at": _timestamp(now + timedelta(seconds=cls.LEASE_SECONDS)),
+            })
+            return alert
+
+        return run_transaction(db, claim)
+
+    @classmethod
+    def drain(cls, db, now=None):
+        """Send every alert that is due; returns ``{"sent", "retried", "failed"}`` counts."""
+        now = now or datetime.now(timezone.utc)
+        # "sending" alerts are only due again once their lease has expired
+        due = db.collection(cls.COLLECTION) \
+            .where("status", "in", ["pending", "sending"]) \
+            .where("next_attempt_at", "<=", _timestamp(now)) \
+            .order_by("next_attempt_at") \
+            .limit(cls.DRAIN_LIMIT)
+
+        stats = {"sent": 0, "retried": 0, "failed": 0}
+        for doc in due.stream():
+            alert = cls.claim(db, doc.reference, now)
+            if alert is None:
+                continue
+            try:
+                delivered = cls.SENDERS[alert["kind"]](alert["payload"])
+                error = None if delivered else "delivery failed"
+            except Exception as e:
+                error = str(e)
+
+            if error is None:
+                doc.reference.delete()
+                stats["sent"] += 1
+                continue
+
+            attempts = alert.get("attempts", 0) + 1
+            update = {"attempts": attempts, "last_error": error}
+            if attempts >= cls.MAX_ATTEMPTS:
+                update["status"] = "failed"
+                stats["failed"] += 1
+            else:
+                update["status"] = "pending"
+                update["next_attempt_at"] = _timestamp(now + cls.backoff(attempts))
+                stats["retried"] += 1
+            doc.reference.update(update)
+        return stats
+
+
+class AlertWorker:
+    """Background thread that drains the alert outbox.
+
+    It wakes up as soon as an alert is enqueued in this process, and otherwise
+    every POLL_INTERVAL seconds to pick up retries and alerts from other processes.
+    """
+
+    POLL_INTERVAL = float(os.getenv("ALERT_POLL_INTERVAL", 10))
+
+    def __init__(self, db=None, poll_interval=POLL_INTERVAL):
+        self._db = db
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else FirebaseService.instance().db
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="alert-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        AlertQueue._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        while not self._stop.is_set():
+            AlertQueue._wakeup.clear()
+            try:
+                stats = AlertQueue.drain(self.db)
+                if sum(stats.values()) >= AlertQueue.DRAIN_LIMIT:
+                    continue  # more alerts may be due right away
+            except Exception as e:
+                print(f"[Alert Worker Error] {e}")
+            AlertQueue._wakeup.wait(self.poll_interval)
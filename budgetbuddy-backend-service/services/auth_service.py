@@ -5,7 +5,7 @@ from utils.auth_validations import AuthValidator
 
 class AuthService:
 
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
 
     @staticmethod
     def register_user(data):
@@ -42,7 +42,8 @@ class AuthService:
 
     @staticmethod
     def delete_user(token):
-        uid = AuthService.firebase.verify_user_token(token)
+        # Account deletion must not be authorised by a cached, possibly revoked token
+        uid = AuthService.firebase.verify_user_token(token, check_revoked=True)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
         try:
@@ -0,0 +1,145 @@
+import calendar
+from datetime import date, timedelta
+from services.spend_counters import PERIODS, SpendCounters
+
+# Anchors for budgets without a usable start_date: plain calendar periods
+DEFAULT_ANCHORS = {
+    "daily": date(2000, 1, 1),
+    "weekly": date(2000, 1, 3),  # a Monday, like ISO weeks
+    "monthly": date(2000, 1, 1),
+    "yearly": date(2000, 1, 1),
+}
+PERIOD_MONTHS = {"monthly": 1, "yearly": 12}
+
+
+def add_months(day, months):
+    """``day`` moved by ``months``, clamped to the end of shorter months (Jan 31 + 1 = Feb 28)."""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+
+class BudgetEvaluator:
+    """Spend against each budget over its current window, from the spend counters.
+
+    A budget's windows repeat every period from its ``start_date``: a monthly
+    budget starting on the 15th runs from the 15th to the 14th. A window is
+    covered by the fewest counters that add up to it exactly: one per whole
+    calendar year or month inside it, and ISO weeks and single days for the
+    partial months at its edges. The counters of every budget being evaluated
+    are fetched together, one range read per run of adjacent buckets.
+    """
+
+    @staticmethod
+    def window(budget, today):
+        """``(first day, last day)`` of the budget's window containing ``today``."""
+        period = budget.get("period") if budget.get("period") in PERIODS else "monthly"
+        anchor = SpendCounters.parse_day(budget.get("start_date")) or DEFAULT_ANCHORS[period]
+        if today < anchor:
+            today = anchor  # not started yet: report the first window
+
+        if period == "daily":
+            return today, today
+        if period == "weekly":
+            start = today - timedelta(days=(today - anchor).days % 7)
+            return start, start + timedelta(days=6)
+
+        step = PERIOD_MONTHS[period]
+        elapsed = ((today.year - anchor.year) * 12 + today.month - anchor.month) // step
+        if add_months(anchor, elapsed * step) > today:
+            elapsed -= 1
+        return add_months(anchor, elapsed * step), add_months(anchor, (elapsed + 1) * step) - timedelta(days=1)
+
+    @staticmethod
+    def span(period, day):
+        """``(first day, last day)`` of the calendar ``period`` bucket containing ``day``."""
+        if period == "daily":
+            return day, day
+        if period == "weekly":
+            start = day - timedelta(days=day.weekday())
+            return start, start + timedelta(days=6)
+        if period == "monthly":
+            start = day.replace(day=1)
+            return start, add_months(start, 1) - timedelta(days=1)
+        return date(day.year, 1, 1), date(day.year, 12, 31)
+
+    @classmethod
+    def _tile(cls, first, last, periods):
+        # Greedily take the largest of ``periods`` (which must end with "daily") that fits
+        tiles = []
+        day = first
+        while day <= last:
+            for period in periods:
+                start, end = cls.span(period, day)
+                if start == day and end <= last:
+                    break
+            tiles.append((period, start, end))
+            day = end + timedelta(days=1)
+        return tiles
+
+    @classmethod
+    def cover(cls, first, last):
+        """``(period, first day, last day)`` buckets that exactly cover ``first`` to ``last``."""
+        whole_from = first if first.day == 1 else add_months(first.replace(day=1), 1)
+        whole_to = last + timedelta(days=1) if cls.span("monthly", last)[1] == last else last.replace(day=1)
+        if whole_from >= whole_to:
+            return cls._tile(first, last, ("weekly", "daily"))
+        return (
+            cls._tile(first, whole_from - timedelta(days=1), ("weekly", "daily"))
+            + cls._tile(whole_from, whole_to - timedelta(days=1), ("yearly", "monthly", "daily"))
+            + cls._tile(whole_to, last, ("weekly", "daily"))
+        )
+
+    @staticmethod
+    def _runs(tiles):
+        """Merge same-period buckets that follow each other into ``(period, first, last)`` ranges."""
+        runs = []
+        for period, start, end in sorted(set(tiles)):
+            if runs and runs[-1][0] == period and runs[-1][2] + timedelta(days=1) >= start:
+                runs[-1] = (period, runs[-1][1], max(runs[-1][2], end))
+            else:
+                runs.append((period, start, end))
+        return runs
+
+    @classmethod
+    def _totals(cls, db, uid, categories, covers):
+        """``{(category, period, bucket): cents}`` for every bucket in ``covers``."""
+        totals = {}
+        for period, first, last in cls._runs(tile for cover in covers for tile in cover):
+            for (category, bucket), cents in SpendCounters.read(db, uid, categories, period, first, last).items():
+                totals[(category, period, bucket)] = cents
+        return totals
+
+    @classmethod
+    def evaluate(cls, db, uid, budgets, today=None):
+        """Utilization of each ``(budget_id, budget)`` pair in its current window."""
+        today = today or date.today()
+        budgets = list(budgets)
+        if not budgets:
+            return []
+
+        windows = [cls.window(budget, today) for _, budget in budgets]
+        covers = [cls.cover(start, end) for start, end in windows]
+        totals = cls._totals(db, uid, {budget.get("category", "overall") for _, budget in budgets}, covers)
+
+        statuses = []
+        for (budget_id, budget), (start, end), cover in zip(budgets, windows, covers):
+            category = budget.get("category", "overall")
+            spent = sum(
+                totals.get((category, period, SpendCounters.bucket(period, bucket_start)), 0)
+                for period, bucket_start, _ in cover
+            ) / 100
+            limit = float(budget["amount"])
+            statuses.append({
+                "id": budget_id,
+                "category": budget.get("category", "overall"),
+                "period": budget.get("period"),
+                "amount": budget["amount"],
+                "window_start": start.isoformat(),
+                "window_end": end.isoformat(),
+                "spent": spent,
+                "remaining": round(limit - spent, 2),
+                "utilization": round(spent / limit, 4) if limit else None,
+                "exceeded": spent > limit,
+            })
+        return statuses
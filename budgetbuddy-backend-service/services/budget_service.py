@@ -1,10 +1,14 @@
 from flask import jsonify
 from datetime import datetime
 from services.firebase_service import FirebaseService
+from utils.pagination import ListQuery
+from services.budget_evaluator import BudgetEvaluator
 
 class BudgetService:
 
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
+    LIST_FIELDS = ["amount", "period", "category", "start_date", "end_date"]
+    ORDER_FIELDS = ["amount", "start_date"]  # each has (user_id, field) indexes in firestore.indexes.json
 
     @classmethod
     def set_budget(cls, data, token):
@@ -30,14 +34,16 @@ class BudgetService:
         return jsonify({"message": "Budget set"}), 201
     
     @classmethod
-    def get_budgets(cls, token):
+    def get_budgets(cls, token, args=None):
         uid = cls.firebase.verify_user_token(token)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
-        budgets = cls.firebase.db.collection("budgets").where("user_id", "==", uid).stream()
-        result = [{"id": doc.id, **doc.to_dict()} for doc in budgets]
-        return jsonify(result), 200
+        list_query, error = ListQuery.from_args(args, cls.LIST_FIELDS, cls.ORDER_FIELDS)
+        if error:
+            return jsonify({"error": error}), 400
+
+        return list_query.response(cls.firebase.db.collection("budgets").where("user_id", "==", uid))
     
     @classmethod
     def edit_budget(cls, budget_id, data, token):
@@ -77,5 +83,20 @@ class BudgetService:
         doc_ref.delete()
         return jsonify({"message": "Budget deleted"}), 200
 
+    @classmethod
+    def budget_status(cls, token, args=None):
+        """Spend and utilization of every budget over its current window, optionally as of ``date``."""
+        uid = cls.firebase.verify_user_token(token)
+        if not uid:
+            return jsonify({"error": "Unauthorized"}), 401
 
+        as_of = (args or {}).get("date")
+        try:
+            today = datetime.strptime(as_of, "%Y-%m-%d").date() if as_of else datetime.now().date()
+        except ValueError:
+            return jsonify({"error": "date must be a date in YYYY-MM-DD format"}), 400
 
+        db = cls.firebase.db
+        budgets = [(doc.id, doc.to_dict()) for doc in db.collection("budgets").where("user_id", "==", uid).stream()]
+        statuses = BudgetEvaluator.evaluate(db, uid, budgets, today)
+        return jsonify({"as_of": today.isoformat(), "budgets": statuses}), 200
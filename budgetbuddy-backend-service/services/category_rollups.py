@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from firebase_admin import firestore
+
+from services.spend_counters import MAX_BATCH_WRITES, OVERALL, SpendCounters
+
+COLLECTION = "rollups"
+PERIODS = ("weekly", "monthly")
+
+
+class CategoryRollups:
+    """Per-user category totals for each ISO week and month, one document per bucket.
+
+    A rollup holds ``categories`` (category -> cents) and ``total_cents`` for one
+    user and period bucket ("2025-05", "2025-W19"). Writers stage the increments
+    in the same WriteBatch as the expense and its spend counters, so a monthly
+    report or a week-over-week comparison reads one document per period however
+    much history the user has.
+    """
+
+    @staticmethod
+    def rollup_id(uid, period, bucket):
+        return f"{uid}_{period}_{bucket}"
+
+    @classmethod
+    def rollup_ref(cls, db, uid, period, bucket):
+        return db.collection(COLLECTION).document(cls.rollup_id(uid, period, bucket))
+
+    @staticmethod
+    def changes(deltas):
+        """``{(period, bucket): {category: cents}}`` from SpendCounters deltas; ``overall`` is the total."""
+        changes = defaultdict(dict)
+        for (category, period, bucket), cents in deltas.items():
+            if period in PERIODS:
+                changes[(period, bucket)][category] = cents
+        return dict(changes)
+
+    @classmethod
+    def stage(cls, batch, db, uid, deltas):
+        """Add one merged ``Increment`` write per changed rollup to ``batch``."""
+        for (period, bucket), totals in cls.changes(deltas).items():
+            data = {
+                "user_id": uid,
+                "period": period,
+                "bucket": bucket,
+                "total_cents": firestore.Increment(totals.get(OVERALL, 0)),
+            }
+            categories = {category: firestore.Increment(cents) for category, cents in totals.items() if category != OVERALL}
+            if categories:
+                data["categories"] = categories
+            batch.set(cls.rollup_ref(db, uid, period, bucket), data, merge=True)
+
+    @staticmethod
+    def _amounts(rollup):
+        # Categories emptied by edits and deletes keep a zero entry; leave them out
+        return {
+            category: int(cents) / 100
+            for category, cents in (rollup or {}).get("categories", {}).items()
+            if cents
+        }
+
+    @classmethod
+    def read(cls, db, uid, period, day):
+        """``{category: amount}`` spent during the ``period`` bucket containing ``day``."""
+        snapshot = cls.rollup_ref(db, uid, period, SpendCounters.bucket(period, day)).get()
+        return cls._amounts(snapshot.to_dict() if snapshot.exists else None)
+
+    @classmethod
+    def history(cls, db, uid, period):
+        """``{bucket: {category: amount}}`` for every ``period`` bucket the user has spent in."""
+        rollups = db.collection(COLLECTION) \
+            .where("user_id", "==", uid) \
+            .where("period", "==", period) \
+            .stream()
+        history = {}
+        for doc in rollups:
+            rollup = doc.to_dict()
+            amounts = cls._amounts(rollup)
+            if amounts:
+                history[rollup["bucket"]] = amounts
+        return history
+
+    @classmethod
+    def compute(cls, db, uid=None):
+        """Rollups recomputed from raw expenses: ``{rollup_id: document}``."""
+        expenses = db.collection("expenses")
+        if uid:
+            expenses = expenses.where("user_id", "==", uid)
+
+        rollups = {}
+        for doc in expenses.stream():
+            expense = doc.to_dict()
+            owner = expense.get("user_id")
+            for (period, bucket), totals in cls.changes(SpendCounters.deltas(expense)).items():
+                rollup = rollups.setdefault(cls.rollup_id(owner, period, bucket), {
+                    "user_id": owner,
+                    "period": period,
+                    "bucket": bucket,
+                    "total_cents": 0,
+                    "categories": {},
+                })
+                for category, cents in totals.items():
+                    if category == OVERALL:
+                        rollup["total_cents"] += cents
+                    else:
+                        rollup["categories"][category] = rollup["categories"].get(category, 0) + cents
+        return rollups
+
+    @classmethod
+    def _stored(cls, db, uid=None):
+        rollups = db.collection(COLLECTION)
+        if uid:
+            rollups = rollups.where("user_id", "==", uid)
+        return {doc.id: doc for doc in rollups.stream()}
+
+    @staticmethod
+    def _normalized(rollup):
+        rollup = rollup or {}
+        return (
+            int(rollup.get("total_cents", 0)),
+            {category: int(cents) for category, cents in rollup.get("categories", {}).items() if cents},
+        )
+
+    @classmethod
+    def check(cls, db, uid=None):
+        """Rollups that disagree with the raw expenses, as ``{"id", "expected", "actual"}`` dicts."""
+        expected = cls.compute(db, uid)
+        stored = cls._stored(db, uid)
+        mismatches = []
+        for rollup_id in sorted(expected.keys() | stored.keys()):
+            want = cls._normalized(expected.get(rollup_id))
+            have = cls._normalized(stored[rollup_id].to_dict() if rollup_id in stored else None)
+            if want != have:
+                mismatches.append({
+                    "id": rollup_id,
+                    "expected": {"total_cents": want[0], "categories": want[1]},
+                    "actual": {"total_cents": have[0], "categories": have[1]},
+                })
+        return mismatches
+
+    @classmethod
+    def rebuild(cls, db, uid=None):
+        """Overwrite rollups with totals recomputed from raw expenses and delete stale ones.
+
+        Like SpendCounters.rebuild, run it while expense writes are paused.
+        Returns the number of rollups written.
+        """
+        fresh = cls.compute(db, uid)
+        stale = [doc.reference for rollup_id, doc in cls._stored(db, uid).items() if rollup_id not in fresh]
+
+        writes = [(db.collection(COLLECTION).document(rollup_id), data) for rollup_id, data in fresh.items()]
+        writes += [(reference, None) for reference in stale]
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            batch = db.batch()
+            for reference, data in writes[start:start + MAX_BATCH_WRITES]:
+                if data is None:
+                    batch.delete(reference)
+                else:
+                    batch.set(reference, data)
+            batch.commit()
+        return len(fresh)
@@ -1,33 +1,134 @@
-from flask import jsonify, send_file
+from flask import Response, jsonify, send_file
 from services.firebase_service import FirebaseService
+from services.spend_counters import SpendCounters
+from services.category_rollups import CategoryRollups
+from services.data_versions import DataVersions
+from services.expense_writes import stage_expense_writes
 from werkzeug.utils import secure_filename
-import csv, io, json, uuid
+from utils.expense_import import ExpenseImportParser
+from utils.columnar_export import ColumnarExpenseWriter
+from utils.classifier_service import ClassifierClient
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+import csv, io, json, os, zlib
 from datetime import datetime
 
+EXPORT_FIELDS = ["amount", "category", "date", "method", "notes"]
+
 class DataService:
 
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
+
+    IMPORT_BATCH_SIZE = 500  # Firestore's limit on writes per batch
+    IMPORT_COMMIT_WORKERS = int(os.getenv("IMPORT_COMMIT_WORKERS", 4))
+    EXPORT_FLUSH_BYTES = 64 * 1024
+    CLASSIFY_BATCH_SIZE = 1000
 
     @classmethod
-    def export_expenses(cls, token, filetype):
+    def export_expenses(cls, token, filetype, gzip_output=False):
         uid = cls.firebase.verify_user_token(token)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
         expenses = cls.firebase.db.collection("expenses").where("user_id", "==", uid).stream()
-        expense_list = [doc.to_dict() for doc in expenses]
 
-        if filetype == "csv":
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=["amount", "category", "date", "method", "notes"])
-            writer.writeheader()
-            for exp in expense_list:
-                writer.writerow(exp)
-            output.seek(0)
-            return send_file(io.BytesIO(output.getvalue().encode()), download_name="expenses.csv", mimetype="text/csv")
+        if filetype in ("columnar", "parquet"):
+            return cls._columnar_export(expenses, filetype)
 
+        if filetype == "csv":
+            body, mimetype, filename = cls._csv_rows(expenses), "text/csv", "expenses.csv"
+        elif filetype == "ndjson":
+            body, mimetype, filename = cls._ndjson_rows(expenses), "application/x-ndjson", "expenses.ndjson"
         else:  # default: json
-            return jsonify(expense_list), 200
+            body, mimetype, filename = cls._json_array_rows(expenses), "application/json", None
+
+        response = Response(cls._encode_stream(body, gzip_output), mimetype=mimetype)
+        response.headers["Vary"] = "Accept-Encoding"
+        if gzip_output:
+            response.headers["Content-Encoding"] = "gzip"
+        if filename:
+            response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+            return response
+        return response, 200
+
+    @staticmethod
+    def _columnar_export(expenses, filetype):
+        """Typed, dictionary-encoded columns: Arrow IPC (or Parquet) with pyarrow, else .npz."""
+        if filetype == "parquet" and not ColumnarExpenseWriter.ARROW_AVAILABLE:
+            return jsonify({"error": "Parquet export is not available on this server"}), 400
+
+        writer = ColumnarExpenseWriter()
+        for doc in expenses:
+            writer.add(doc.to_dict())
+
+        output = io.BytesIO()
+        if filetype == "parquet":
+            writer.write_parquet(output)
+            download_name, mimetype = "expenses.parquet", "application/vnd.apache.parquet"
+        elif ColumnarExpenseWriter.ARROW_AVAILABLE:
+            writer.write_arrow(output)
+            download_name, mimetype = "expenses.arrow", "application/vnd.apache.arrow.file"
+        else:
+            writer.write_npz(output)
+            download_name, mimetype = "expenses.npz", "application/octet-stream"
+
+        output.seek(0)
+        return send_file(output, download_name=download_name, mimetype=mimetype, as_attachment=True)
+
+    @staticmethod
+    def _csv_rows(expenses):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for doc in expenses:
+            writer.writerow(doc.to_dict())
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def _ndjson_rows(expenses):
+        for doc in expenses:
+            yield json.dumps(doc.to_dict(), default=str) + "\n"
+
+    @staticmethod
+    def _json_array_rows(expenses):
+        separator = "["
+        for doc in expenses:
+            yield separator + json.dumps(doc.to_dict(), default=str)
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+    @classmethod
+    def _encode_stream(cls, pieces, gzip_output):
+        """Group text pieces into ~EXPORT_FLUSH_BYTES chunks, gzip-compressed if asked.
+
+        Each chunk is sync-flushed so the client can decode rows as they arrive.
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if gzip_output else None
+
+        def emit(text):
+            data = text.encode()
+            if compressor:
+                data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            return data
+
+        pending = []
+        size = 0
+        first = True
+        for piece in pieces:
+            pending.append(piece)
+            size += len(piece)
+            # The first piece goes out immediately to keep time-to-first-byte low
+            if first or size >= cls.EXPORT_FLUSH_BYTES:
+                yield emit("".join(pending))
+                pending, size, first = [], 0, False
+        tail = emit("".join(pending)) if pending else b""
+        if compressor:
+            tail += compressor.flush()
+        if tail:
+            yield tail
 
     @classmethod
     def import_expenses(cls, token, file):
@@ -39,45 +140,107 @@ class DataService:
             return jsonify({"error": "No file uploaded"}), 400
 
         filename = secure_filename(file.filename)
-        content = file.read()
+        if not ExpenseImportParser.supports(filename):
+            return jsonify({"error": "Unsupported file type"}), 400
 
-        try:
-            if filename.endswith(".json"):
-                try:
-                    data = json.loads(content)
-                except json.JSONDecodeError:
-                    return jsonify({"error": "Invalid JSON format"}), 400
-            elif filename.endswith(".csv"):
-                content_str = content.decode()
-                try:
-                    reader = csv.DictReader(io.StringIO(content_str))
-                    data = list(reader)
-
-                    for record in data:
-                        # Basic validation
-                        if "amount" not in record or "category" not in record or "date" not in record or "method" not in record:
-                            return jsonify({"error": "CSV format error: missing required fields"}), 400
-
-                        record["amount"] = float(record["amount"])  # this may still raise
-                        record["user_id"] = uid
-                        record["notes"] = record.get("notes", "")
-                        cls.firebase.db.collection("expenses").document().set(record)
-
-                except ValueError:
-                    return jsonify({"error": "CSV format error: invalid amount field"}), 400
-                except Exception:
-                    return jsonify({"error": "CSV format error"}), 400
-
-            else:
-                return jsonify({"error": "Unsupported file type"}), 400
-
-            for record in data:
-                record["user_id"] = uid
-                record["amount"] = float(record["amount"])
-                record["date"] = record.get("date", datetime.today().strftime("%Y-%m-%d"))
-                cls.firebase.db.collection("expenses").document(str(uuid.uuid4())).set(record)
+        parser = ExpenseImportParser(file.stream, filename)
+        today = datetime.today().strftime("%Y-%m-%d")
 
-            return jsonify({"message": f"{len(data)} expenses imported"}), 201
+        def prepared():
+            for record in parser.records():
+                record["user_id"] = uid
+                record["date"] = record.get("date", today)
+                yield record
 
+        try:
+            chunks = cls._write_in_batches(cls._with_categories(prepared()))
         except Exception as e:
             return jsonify({"error": str(e)}), 500
+        finally:
+            DataVersions.invalidate(uid)
+
+        imported = sum(chunk["written"] for chunk in chunks)
+        body = {"message": f"{imported} expenses imported", "chunks": chunks}
+        if parser.error:
+            # Rows before the invalid one have already been committed
+            return jsonify({"error": parser.error, **body}), 400
+
+        failed = [chunk for chunk in chunks if chunk["status"] != "ok"]
+        if not failed:
+            return jsonify(body), 201
+        # Some chunks landed: report which ones so the client can retry the rest
+        return jsonify(body), 207 if imported else 500
+
+    @classmethod
+    def _with_categories(cls, records):
+        """Classify records without a category from their notes, CLASSIFY_BATCH_SIZE at a time."""
+        records = iter(records)
+        while True:
+            group = list(islice(records, cls.CLASSIFY_BATCH_SIZE))
+            if not group:
+                return
+            missing = [record for record in group if not record.get("category")]
+            if missing:
+                categories = ClassifierClient.classify_many([record.get("notes") or "" for record in missing])
+                for record, category in zip(missing, categories):
+                    record["category"] = category
+            yield from group
+
+    @staticmethod
+    def _aggregates(record):
+        """Keys of the spend counters and category rollups a record writes to."""
+        deltas = SpendCounters.deltas(record)
+        return deltas.keys() | CategoryRollups.changes(deltas).keys()
+
+    @classmethod
+    def _chunked(cls, records, size):
+        """Group records so each chunk's expenses, its counters and rollups and the
+        user's data version fit in ``size`` writes."""
+        chunk, aggregates = [], set()
+        for record in records:
+            new_aggregates = cls._aggregates(record) - aggregates
+            if chunk and len(chunk) + len(aggregates) + len(new_aggregates) + 2 > size:
+                yield chunk
+                chunk, aggregates = [], set()
+                new_aggregates = cls._aggregates(record)
+            chunk.append(record)
+            aggregates |= new_aggregates
+        if chunk:
+            yield chunk
+
+    @classmethod
+    def _commit_chunk(cls, index, records):
+        db = cls.firebase.db
+        batch = db.batch()
+        collection = db.collection("expenses")
+        for record in records:
+            batch.set(collection.document(), record)
+        # All records in an import belong to the same user
+        deltas = SpendCounters.combine(*(SpendCounters.deltas(record) for record in records))
+        stage_expense_writes(batch, db, records[0]["user_id"], deltas)
+
+        try:
+            batch.commit()
+            return {"chunk": index, "written": len(records), "status": "ok"}
+        except Exception as e:
+            return {"chunk": index, "written": 0, "status": "failed", "error": str(e)}
+
+    @classmethod
+    def _write_in_batches(cls, records):
+        """Write ``records`` as WriteBatches of at most IMPORT_BATCH_SIZE writes.
+
+        Each batch also carries its records' spend counter increments, so a committed
+        chunk is always reflected in the counters. At most IMPORT_COMMIT_WORKERS
+        batches are in flight at once; the results are returned per chunk, in order.
+        """
+        results = []
+        pending = set()
+        with ThreadPoolExecutor(max_workers=cls.IMPORT_COMMIT_WORKERS) as pool:
+            for index, chunk in enumerate(cls._chunked(records, cls.IMPORT_BATCH_SIZE)):
+                if len(pending) >= cls.IMPORT_COMMIT_WORKERS:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results.extend(future.result() for future in done)
+                pending.add(pool.submit(cls._commit_chunk, index, chunk))
+            results.extend(future.result() for future in pending)
+
+        return sorted(results, key=lambda result: result["chunk"])
@@ -0,0 +1,54 @@
+import os
+import threading
+import time
+
+from firebase_admin import firestore
+
+COLLECTION = "data_versions"
+
+
+class DataVersions:
+    """Per-user counter bumped by every expense write, used to key cached reports.
+
+    Writers stage ``stage()`` in the expense's WriteBatch and call ``invalidate()``
+    once it has committed. Readers get the version from a process-local copy for
+    ``REPORT_VERSION_TTL`` seconds, so repeated report requests don't read
+    storage at all; a write made by another process is noticed within that time.
+    """
+
+    TTL = float(os.getenv("REPORT_VERSION_TTL", 2))
+
+    _local = {}  # uid -> (version, fetched at)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def version_ref(db, uid):
+        return db.collection(COLLECTION).document(uid)
+
+    @classmethod
+    def stage(cls, batch, db, uid):
+        batch.set(cls.version_ref(db, uid), {"user_id": uid, "version": firestore.Increment(1)}, merge=True)
+
+    @classmethod
+    def invalidate(cls, uid):
+        with cls._lock:
+            cls._local.pop(uid, None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._local.clear()
+
+    @classmethod
+    def current(cls, db, uid):
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._local.get(uid)
+        if entry is not None and now - entry[1] < cls.TTL:
+            return entry[0]
+
+        snapshot = cls.version_ref(db, uid).get()
+        version = int((snapshot.to_dict() or {}).get("version", 0)) if snapshot.exists else 0
+        with cls._lock:
+            cls._local[uid] = (version, now)
+        return version
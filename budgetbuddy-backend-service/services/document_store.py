@@ -0,0 +1,346 @@
+"""Firestore-compatible document API shared by the local storage backends.
+
+Services only use a small part of the Firestore client: collections, document
+references, ``where``/``order_by``/``limit``/``start_after``/``select`` queries,
+write batches and snapshots. The classes here implement that part on top of a
+handful of primitives (``_get``/``_set``/``_update``/``_delete``/``_query``) so
+that an in-memory or SQLite backend can stand in for ``firestore.client()``
+without any change to the calling code.
+
+``run_transaction`` runs a read-modify-write function atomically on either
+Firestore or a local backend.
+"""
+import copy
+import operator
+import uuid
+
+from google.cloud.firestore_v1.transforms import Increment
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+
+def _array_contains(field_value, value):
+    return isinstance(field_value, list) and value in field_value
+
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda field_value, values: field_value in values,
+    "not-in": lambda field_value, values: field_value not in values,
+    "array_contains": _array_contains,
+}
+
+
+class DocumentNotFound(Exception):
+    pass
+
+
+RANGE_OPERATORS = ("<", "<=", ">", ">=")
+
+
+def matches(data, filters):
+    """Firestore semantics: a document missing a filtered field never matches,
+    and a range filter only matches values of the same type as its operand."""
+    for field, op, value in filters:
+        if field not in data:
+            return False
+        if op in RANGE_OPERATORS and type_rank(data[field]) != type_rank(value):
+            return False
+        try:
+            if not OPERATORS[op](data[field], value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def type_rank(value):
+    # Firestore orders mixed types by type first: null < bool < number < string
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    return 4
+
+
+def _sort_key(value):
+    rank = type_rank(value)
+    if rank == 0:
+        return (0, 0)
+    return (rank, str(value) if rank == 4 else value)
+
+
+DOCUMENT_ID = "__name__"
+
+
+def order_value(row, field):
+    return row[0] if field == DOCUMENT_ID else row[1][field]
+
+
+def sort_rows(rows, orders):
+    """Sort ``(document_id, data)`` rows; rows missing an ordered field are dropped."""
+    rows = [row for row in rows if all(field == DOCUMENT_ID or field in row[1] for field, _ in orders)]
+    for field, direction in reversed(orders):
+        rows.sort(key=lambda row: _sort_key(order_value(row, field)), reverse=direction == DESCENDING)
+    return rows
+
+
+def rows_after(rows, orders, cursor):
+    """Rows strictly after ``cursor`` (values aligned with ``orders``) in sort order."""
+    def is_after(row):
+        for (field, direction), value in zip(orders, cursor):
+            mine, theirs = _sort_key(order_value(row, field)), _sort_key(value)
+            if mine != theirs:
+                return (mine > theirs) != (direction == DESCENDING)
+        return False
+
+    return [row for row in rows if is_after(row)]
+
+
+def has_transforms(fields):
+    return any(
+        isinstance(value, Increment) or (isinstance(value, dict) and has_transforms(value))
+        for value in fields.values()
+    )
+
+
+def apply_transforms(existing, fields):
+    """Resolve ``firestore.Increment`` values against the stored document, like the server.
+
+    Increments inside nested maps resolve against the same path in ``existing``.
+    """
+    resolved = {}
+    for field, value in fields.items():
+        current = (existing or {}).get(field)
+        if isinstance(value, Increment):
+            value = (current if isinstance(current, (int, float)) else 0) + value.value
+        elif isinstance(value, dict) and has_transforms(value):
+            value = apply_transforms(current if isinstance(current, dict) else None, value)
+        resolved[field] = value
+    return resolved
+
+
+def merge_fields(existing, fields):
+    """``set(..., merge=True)``: nested maps are merged key by key rather than replaced."""
+    merged = dict(existing)
+    for field, value in fields.items():
+        if isinstance(value, dict) and isinstance(merged.get(field), dict):
+            value = merge_fields(merged[field], value)
+        merged[field] = value
+    return merged
+
+
+def new_document_id():
+    return uuid.uuid4().hex[:20]
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data.get(field) if self._data is not None else None
+
+
+class DocumentReference:
+    def __init__(self, client, collection_path, document_id):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+
+    @property
+    def path(self):
+        return f"{self._collection_path}/{self.id}"
+
+    def get(self, transaction=None):
+        # Local transactions hold the client lock, so a plain read is already isolated
+        return DocumentSnapshot(self, self._client._get(self._collection_path, self.id))
+
+    def set(self, data, merge=False):
+        self._client._set(self._collection_path, self.id, copy.deepcopy(data), merge)
+
+    def update(self, fields):
+        self._client._update(self._collection_path, self.id, copy.deepcopy(fields))
+
+    def delete(self):
+        self._client._delete(self._collection_path, self.id)
+
+    def collection(self, name):
+        return CollectionReference(self._client, f"{self.path}/{name}")
+
+
+class Query:
+    """Immutable query; every builder method returns a new query."""
+
+    def __init__(self, client, collection_path, filters=(), orders=(), limit=None, cursor=None, projection=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._cursor = cursor
+        self._projection = projection
+
+    def _copy(self, **changes):
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "cursor": self._cursor,
+            "projection": self._projection,
+        }
+        state.update(changes)
+        return Query(self._client, self._collection_path, **state)
+
+    def where(self, field, op, value):
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields_or_snapshot):
+        """Accepts a snapshot, a dict of ordered fields or a list of values, like Firestore."""
+        if not self._orders:
+            raise ValueError("start_after requires order_by")
+        cursor = document_fields_or_snapshot
+        if isinstance(cursor, DocumentSnapshot):
+            cursor = {**cursor._data, DOCUMENT_ID: cursor.id}
+        if isinstance(cursor, dict):
+            cursor = [cursor[field] for field, _ in self._orders if field in cursor]
+        cursor = [value.id if isinstance(value, DocumentReference) else value for value in cursor]
+        return self._copy(cursor=tuple(cursor))
+
+    def select(self, field_paths):
+        return self._copy(projection=tuple(field_paths))
+
+    def stream(self):
+        rows = self._client._query(self._collection_path, self._filters, self._orders, self._limit, self._cursor)
+        for document_id, data in rows:
+            if self._projection is not None:
+                data = {field: data[field] for field in self._projection if field in data}
+            yield DocumentSnapshot(DocumentReference(self._client, self._collection_path, document_id), data)
+
+    def get(self):
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        super().__init__(client, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, document_id=None):
+        return DocumentReference(self._client, self._collection_path, document_id or new_document_id())
+
+    def add(self, data):
+        doc_ref = self.document()
+        doc_ref.set(data)
+        return None, doc_ref
+
+
+class WriteBatch:
+    """Buffered writes applied together by ``commit()``, like Firestore's WriteBatch."""
+
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(("set", reference, copy.deepcopy(data), merge))
+
+    def update(self, reference, fields):
+        self._writes.append(("update", reference, copy.deepcopy(fields), False))
+
+    def delete(self, reference):
+        self._writes.append(("delete", reference, None, False))
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        self._client._commit(writes)
+
+
+class Transaction(WriteBatch):
+    """Writes buffered by a ``run_transaction`` function, committed when it returns."""
+
+
+def run_transaction(db, fn):
+    """Call ``fn(transaction)`` atomically and return its result.
+
+    ``fn`` reads with ``reference.get(transaction=transaction)`` and writes with
+    ``transaction.set/update/delete``. On Firestore this is a regular transaction,
+    so ``fn`` may be retried on contention and must not have side effects.
+    """
+    if isinstance(db, DocumentStoreClient):
+        return db.run_transaction(fn)
+    from firebase_admin import firestore
+    return firestore.transactional(fn)(db.transaction())
+
+
+class DocumentStoreClient:
+    """Base for local backends; subclasses implement the storage primitives.
+
+    Subclasses guard their primitives with a reentrant ``_lock``.
+    """
+
+    def collection(self, path):
+        return CollectionReference(self, path)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def run_transaction(self, fn):
+        # Holding the lock from the first read to the commit keeps other writers out
+        with self._lock:
+            transaction = Transaction(self)
+            result = fn(transaction)
+            transaction.commit()
+            return result
+
+    def _commit(self, writes):
+        for kind, reference, data, merge in writes:
+            if kind == "set":
+                self._set(reference._collection_path, reference.id, data, merge)
+            elif kind == "update":
+                self._update(reference._collection_path, reference.id, data)
+            else:
+                self._delete(reference._collection_path, reference.id)
+
+    def _get(self, collection_path, document_id):
+        raise NotImplementedError
+
+    def _set(self, collection_path, document_id, data, merge):
+        raise NotImplementedError
+
+    def _update(self, collection_path, document_id, fields):
+        raise NotImplementedError
+
+    def _delete(self, collection_path, document_id):
+        raise NotImplementedError
+
+    def _query(self, collection_path, filters, orders, limit, cursor=None):
+        """Return an iterable of ``(document_id, data)`` pairs."""
+        raise NotImplementedError
@@ -1,41 +1,194 @@
 import smtplib
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 import os
 
+
+class SMTPConnectionPool:
+    """Reusable SMTP sessions, so a run of messages pays for TLS and AUTH once.
+
+    A session is handed back to the pool after use and reused until it has sent
+    ``max_messages`` messages, then closed. If the server has dropped a session
+    (idle timeout, restart), the message is retried once on a fresh connection.
+    """
+
+    def __init__(self, host, port, username=None, password=None, starttls=True,
+                 size=2, max_messages=100, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle = []  # (server, messages sent on it)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @contextmanager
+    def session(self):
+        """Borrow a session for several sends; at most ``size`` are out at once."""
+        with self._slots:
+            with self._lock:
+                server, sent = self._idle.pop() if self._idle else (None, 0)
+            session = _Session(self, server, sent)
+            try:
+                yield session
+            finally:
+                if session.server is not None:
+                    if session.sent < self.max_messages:
+                        with self._lock:
+                            self._idle.append((session.server, session.sent))
+                    else:
+                        self._close(session.server)
+
+    def send(self, msg):
+        with self.session() as session:
+            session.send(msg)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+
+class _Session:
+
+    def __init__(self, pool, server, sent):
+        self.pool = pool
+        self.server = server
+        self.sent = sent
+
+    def _drop(self):
+        if self.server is not None:
+            self.pool._close(self.server)
+        self.server = None
+
+    def send(self, msg):
+        if self.sent >= self.pool.max_messages:
+            self._drop()
+        for attempt in range(2):
+            if self.server is None:
+                self.server = self.pool._connect()
+                self.sent = 0
+            try:
+                self.server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # Nothing was accepted on a dead connection: safe to resend once
+                self._drop()
+                if attempt:
+                    raise
+                continue
+            except smtplib.SMTPException:
+                raise  # rejected message (bad recipient, ...): the session is still usable
+            except OSError:
+                self._drop()  # timeout or similar: the session state is unknown
+                raise
+            self.sent += 1
+            return
+
+
 class EmailService:
     SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
     SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
     SMTP_USERNAME = os.getenv("SMTP_USERNAME", "your-email@gmail.com")
     SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "your-app-password")
+    SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") != "0"
+    SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+    SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", 100))
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def pool(cls):
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    cls._pool = SMTPConnectionPool(
+                        cls.SMTP_SERVER, cls.SMTP_PORT, cls.SMTP_USERNAME, cls.SMTP_PASSWORD,
+                        starttls=cls.SMTP_STARTTLS,
+                        size=cls.SMTP_POOL_SIZE,
+                        max_messages=cls.SMTP_MAX_MESSAGES_PER_CONNECTION,
+                    )
+        return cls._pool
+
+    @classmethod
+    def close_pool(cls):
+        with cls._pool_lock:
+            pool, cls._pool = cls._pool, None
+        if pool is not None:
+            pool.close()
+
+    @classmethod
+    def _message(cls, to_email, subject, body):
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = cls.SMTP_USERNAME
+        msg["To"] = to_email
+        return msg
 
     @classmethod
     def send_budget_alert(cls, email, spent, limit):
-        msg = MIMEText(
+        msg = cls._message(
+            email,
+            "Budget Exceeded",
             f"🚨 Budget Alert!\n\nYou've spent ${spent} and exceeded your set limit of ${limit}.\n\nPlease review your expenses on BudgetBuddy."
         )
-        msg["Subject"] = "Budget Exceeded"
-        msg["From"] = cls.SMTP_USERNAME
-        msg["To"] = email
 
         try:
-            with smtplib.SMTP(cls.SMTP_SERVER, cls.SMTP_PORT) as server:
-                server.starttls()
-                server.login(cls.SMTP_USERNAME, cls.SMTP_PASSWORD)
-                server.send_message(msg)
+            cls.pool().send(msg)
+            return True
         except Exception as e:
             print(f"[Email Error] Failed to send email: {e}")
+            return False
 
     @classmethod
     def send_custom_notification(cls, to_email, subject, body):
-        msg = MIMEText(body)
-        msg["Subject"] = subject
-        msg["From"] = cls.SMTP_USERNAME
-        msg["To"] = to_email
-
         try:
-            with smtplib.SMTP(cls.SMTP_SERVER, cls.SMTP_PORT) as server:
-                server.starttls()
-                server.login(cls.SMTP_USERNAME, cls.SMTP_PASSWORD)
-                server.send_message(msg)
+            cls.pool().send(cls._message(to_email, subject, body))
+            return True
         except Exception as e:
             print(f"[Reminder Email Error] {e}")
+            return False
+
+    @classmethod
+    def send_many(cls, messages):
+        """Send ``(to_email, subject, body)`` tuples over pooled sessions.
+
+        Returns one ``{"to", "status", "error"}`` result per message, in order; a
+        failed message doesn't stop the ones after it.
+        """
+        results = []
+        with cls.pool().session() as session:
+            for to_email, subject, body in messages:
+                try:
+                    session.send(cls._message(to_email, subject, body))
+                    results.append({"to": to_email, "status": "sent", "error": None})
+                except Exception as e:
+                    results.append({"to": to_email, "status": "failed", "error": str(e)})
+        return results
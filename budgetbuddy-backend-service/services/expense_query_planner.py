@@ -0,0 +1,248 @@
+import json
+import os
+from datetime import datetime
+from itertools import combinations
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "firestore.indexes.json")
+
+
+class Predicate:
+    def __init__(self, field, op, value, selectivity):
+        self.field = field
+        self.op = op
+        self.value = value
+        self.selectivity = selectivity
+
+    def matches(self, expense):
+        actual = expense.get(self.field)
+        if self.op == "contains":
+            return self.value in str(actual or "").lower()
+        if self.field == "amount":
+            try:
+                actual = float(actual)
+            except (TypeError, ValueError):
+                return False
+        try:
+            if self.op == "in":
+                return actual in self.value
+            if self.op == "==":
+                return actual == self.value
+            if self.op == ">=":
+                return actual >= self.value
+            if self.op == "<=":
+                return actual <= self.value
+        except TypeError:
+            return False
+        raise ValueError(f"Unsupported operator: {self.op}")
+
+    def describe(self):
+        return f"{self.field} {self.op} {self.value!r}"
+
+
+class ExpenseFilterSpec:
+    """Combined expense filter: category/method sets, date and amount ranges, notes substring."""
+
+    def __init__(self, categories=None, methods=None, date_from=None, date_to=None,
+                 min_amount=None, max_amount=None, notes=None):
+        self.categories = categories or []
+        self.methods = methods or []
+        self.date_from = date_from
+        self.date_to = date_to
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.notes = notes
+
+    @staticmethod
+    def _values(raw):
+        return sorted({value.strip() for value in (raw or "").split(",") if value.strip()})
+
+    @classmethod
+    def from_args(cls, args):
+        """Build a spec from validated query args; ``date`` is shorthand for from=to=date."""
+        def number(field):
+            return float(args[field]) if args.get(field) not in (None, "") else None
+
+        return cls(
+            categories=cls._values(args.get("category")),
+            methods=cls._values(args.get("method")),
+            date_from=args.get("date") or args.get("from") or None,
+            date_to=args.get("date") or args.get("to") or None,
+            min_amount=number("min_amount"),
+            max_amount=number("max_amount"),
+            notes=(args.get("notes") or "").strip().lower() or None,
+        )
+
+
+class QueryPlan:
+    def __init__(self, pushed, residual, orders, index_available):
+        self.pushed = pushed
+        self.residual = residual
+        self.orders = orders
+        self.index_available = index_available
+
+    @property
+    def selectivity(self):
+        result = 1.0
+        for predicate in self.pushed:
+            result *= predicate.selectivity
+        return result
+
+    def apply(self, query):
+        for predicate in self.pushed:
+            query = query.where(predicate.field, predicate.op, predicate.value)
+        for field in self.orders:
+            query = query.order_by(field)
+        return query
+
+    def index_fields(self):
+        equality = sorted({p.field for p in self.pushed if p.op in ("==", "in")})
+        return ["user_id"] + equality + list(self.orders)
+
+    def explain(self):
+        return {
+            "pushed": [p.describe() for p in self.pushed],
+            "post_filter": [p.describe() for p in self.residual],
+            "order_by": list(self.orders),
+            "index": self.index_fields(),
+            "estimated_selectivity": round(self.selectivity, 4),
+        }
+
+
+class ExpenseQueryPlanner:
+    """Picks the most selective indexed subset of a filter spec to push to the backend.
+
+    The backend query is limited to what a composite index in firestore.indexes.json
+    can serve: equality/``in`` predicates on category and method plus at most one
+    range field (date or amount). Every other predicate is applied while streaming.
+    """
+
+    # Rough fraction of a user's expenses matched by one value of each field
+    EQUALITY_SELECTIVITY = {"category": 0.2, "method": 0.35}
+    ONE_SIDED_AMOUNT_SELECTIVITY = 0.5
+    TWO_SIDED_AMOUNT_SELECTIVITY = 0.25
+    # Assumed span of a typical user's history when estimating date ranges
+    HISTORY_DAYS = 365
+    MAX_IN_VALUES = 30  # Firestore's limit on "in" disjunctions
+
+    _indexes = None
+
+    @classmethod
+    def indexes(cls):
+        """``(equality fields, order fields)`` pairs served by the deployed expense indexes."""
+        if cls._indexes is None:
+            with open(INDEX_FILE) as f:
+                definitions = json.load(f)["indexes"]
+            indexes = set()
+            for definition in definitions:
+                if definition["collectionGroup"] != "expenses":
+                    continue
+                fields = [field["fieldPath"] for field in definition["fields"]]
+                if fields[:1] != ["user_id"] or fields[-1:] != ["date"]:
+                    continue
+                orders = ("amount", "date") if fields[-2:] == ["amount", "date"] else ("date",)
+                indexes.add((frozenset(fields[1:len(fields) - len(orders)]), orders))
+            cls._indexes = indexes
+        return cls._indexes
+
+    @classmethod
+    def _date_selectivity(cls, spec):
+        try:
+            start = datetime.strptime(spec.date_from, "%Y-%m-%d") if spec.date_from else None
+            end = datetime.strptime(spec.date_to, "%Y-%m-%d") if spec.date_to else datetime.today()
+        except ValueError:
+            return 1.0
+        if start is None:
+            return 0.9
+        days = max((end - start).days + 1, 1)
+        return min(days / cls.HISTORY_DAYS, 1.0)
+
+    @classmethod
+    def _predicates(cls, spec):
+        """Return (equality predicates, {range field: [predicates]}, unpushable predicates)."""
+        equalities, ranges, unpushable = [], {}, []
+
+        for field, values in (("category", spec.categories), ("method", spec.methods)):
+            if not values:
+                continue
+            selectivity = min(cls.EQUALITY_SELECTIVITY[field] * len(values), 1.0)
+            if len(values) == 1:
+                equalities.append(Predicate(field, "==", values[0], selectivity))
+            elif len(values) <= cls.MAX_IN_VALUES:
+                equalities.append(Predicate(field, "in", values, selectivity))
+            else:
+                unpushable.append(Predicate(field, "in", values, selectivity))
+
+        if spec.date_from or spec.date_to:
+            selectivity = cls._date_selectivity(spec)
+            bounds = [("date", ">=", spec.date_from), ("date", "<=", spec.date_to)]
+            predicates = [Predicate(f, op, v, 1.0) for f, op, v in bounds if v]
+            predicates[0].selectivity = selectivity
+            ranges["date"] = predicates
+
+        if spec.min_amount is not None or spec.max_amount is not None:
+            two_sided = spec.min_amount is not None and spec.max_amount is not None
+            selectivity = cls.TWO_SIDED_AMOUNT_SELECTIVITY if two_sided else cls.ONE_SIDED_AMOUNT_SELECTIVITY
+            bounds = [("amount", ">=", spec.min_amount), ("amount", "<=", spec.max_amount)]
+            predicates = [Predicate(f, op, v, 1.0) for f, op, v in bounds if v is not None]
+            predicates[0].selectivity = selectivity
+            ranges["amount"] = predicates
+
+        if spec.notes:
+            unpushable.append(Predicate("notes", "contains", spec.notes, 1.0))
+
+        return equalities, ranges, unpushable
+
+    @classmethod
+    def _candidates(cls, spec):
+        equalities, ranges, unpushable = cls._predicates(spec)
+        indexes = cls.indexes()
+
+        for size in range(len(equalities), -1, -1):
+            for pushed_equalities in combinations(equalities, size):
+                if sum(p.op == "in" for p in pushed_equalities) > 1:
+                    continue
+                for range_field in list(ranges) + [None]:
+                    orders = ("amount", "date") if range_field == "amount" else ("date",)
+                    pushed = list(pushed_equalities) + ranges.get(range_field, [])
+                    residual = [p for p in equalities if p not in pushed_equalities]
+                    residual += [p for field, preds in ranges.items() if field != range_field for p in preds]
+                    residual += unpushable
+                    key = (frozenset(p.field for p in pushed_equalities), orders)
+                    yield QueryPlan(pushed, residual, orders, key in indexes)
+
+    @classmethod
+    def plan(cls, spec):
+        """Return ``(chosen plan, ideal plan)``; they differ when an index is missing."""
+        def rank(plan):
+            return (plan.selectivity, -len(plan.pushed))
+
+        candidates = list(cls._candidates(spec))
+        ideal = min(candidates, key=rank)
+        indexed = [plan for plan in candidates if plan.index_available]
+        if not indexed:
+            # Only the built-in single-field index on user_id: push nothing else
+            indexed = [QueryPlan([], ideal.pushed + ideal.residual, (), True)]
+        chosen = min(indexed, key=rank)
+        return chosen, ideal
+
+    @staticmethod
+    def _matching(query, plan, stats):
+        for doc in plan.apply(query).stream():
+            stats["scanned"] += 1
+            expense = doc.to_dict()
+            if all(predicate.matches(expense) for predicate in plan.residual):
+                stats["returned"] += 1
+                yield doc, expense
+
+    @classmethod
+    def execute(cls, query, plan, stats):
+        """Iterate ``(doc, expense)`` pairs passing the post-filter in date order, counting into ``stats``.
+
+        Results are always in date order whatever the plan: plans the backend
+        doesn't order by date first (amount ranges, the unindexed fallback) are
+        sorted after the post-filter, ties broken by document id like Firestore.
+        """
+        matching = cls._matching(query, plan, stats)
+        if plan.orders[:1] == ("date",):
+            return matching
+        return iter(sorted(matching, key=lambda pair: (str(pair[1].get("date") or ""), pair[0].id)))
@@ -1,12 +1,22 @@
 from flask import jsonify
 from services.firebase_service import FirebaseService
-from services.email_service import EmailService
+from services.spend_counters import SpendCounters
+from services.data_versions import DataVersions
+from services.expense_writes import stage_expense_writes
+from services.document_store import run_transaction
+from services.budget_evaluator import BudgetEvaluator
+from services.expense_query_planner import ExpenseFilterSpec, ExpenseQueryPlanner
+from utils.pagination import ListQuery
+from services.alert_queue import AlertQueue
 from utils.expense_validations import ExpenseValidator
-from utils.expense_classifier import ExpenseClassifier
+from utils.classifier_service import ClassifierClient
 
 class ExpenseService:
 
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
+    LIST_FIELDS = ["amount", "category", "date", "method", "notes"]
+    ORDER_FIELDS = ["date", "amount"]  # each has (user_id, field) indexes in firestore.indexes.json
+    MAX_CLASSIFY_BATCH = 5000
 
     @classmethod
     def add_expense(cls, data, token):
@@ -19,7 +29,7 @@ class ExpenseService:
             return jsonify({"error": msg}), 400
 
         description = data.get("notes", "")
-        category = ExpenseClassifier.classify(description)
+        category = ClassifierClient.classify(description)
 
         expense = {
             "user_id": uid,
@@ -30,21 +40,36 @@ class ExpenseService:
             "notes": description
         }
 
-        cls.firebase.db.collection("expenses").add(expense)
-        cls._check_and_notify(uid, category)
+        db = cls.firebase.db
+        batch = db.batch()
+        batch.set(db.collection("expenses").document(), expense)
+        deltas = SpendCounters.deltas(expense)
+        stage_expense_writes(batch, db, uid, deltas)
+        batch.commit()
+        DataVersions.invalidate(uid)
+        cls._check_and_notify(uid, category, SpendCounters.parse_day(expense["date"]))
 
         return jsonify({"message": "Expense added"}), 201
     
     @classmethod
-    def edit_expense(cls, expense_id, data, token):
+    def classify_descriptions(cls, data, token):
         uid = cls.firebase.verify_user_token(token)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
-        doc_ref = cls.firebase.db.collection("expenses").document(expense_id)
-        doc = doc_ref.get()
-        if not doc.exists or doc.to_dict().get("user_id") != uid:
-            return jsonify({"error": "Not found or unauthorized"}), 404
+        descriptions = (data or {}).get("descriptions")
+        if not isinstance(descriptions, list) or not all(isinstance(d, str) for d in descriptions):
+            return jsonify({"error": "descriptions must be a list of strings"}), 400
+        if len(descriptions) > cls.MAX_CLASSIFY_BATCH:
+            return jsonify({"error": f"At most {cls.MAX_CLASSIFY_BATCH} descriptions per request"}), 400
+
+        return jsonify({"categories": ClassifierClient.classify_many(descriptions)}), 200
+
+    @classmethod
+    def edit_expense(cls, expense_id, data, token):
+        uid = cls.firebase.verify_user_token(token)
+        if not uid:
+            return jsonify({"error": "Unauthorized"}), 401
 
         update_fields = {}
         allowed_fields = ["amount", "category", "date", "method", "notes"]
@@ -55,8 +80,35 @@ class ExpenseService:
 
         if not update_fields:
             return jsonify({"error": "No valid fields to update"}), 400
+        if "amount" in update_fields:
+            valid, msg = ExpenseValidator.validate_amount(update_fields["amount"])
+            if not valid:
+                return jsonify({"error": msg}), 400
+        valid, msg = ExpenseValidator.validate_labels(update_fields)
+        if not valid:
+            return jsonify({"error": msg}), 400
 
-        doc_ref.update(update_fields)
+        db = cls.firebase.db
+        doc_ref = db.collection("expenses").document(expense_id)
+
+        # Read the old expense in the same transaction as the counter deltas,
+        # so concurrent edits can't apply deltas computed from a stale copy
+        def edit(transaction):
+            doc = doc_ref.get(transaction=transaction)
+            if not doc.exists or doc.to_dict().get("user_id") != uid:
+                return False
+            old = doc.to_dict()
+            deltas = SpendCounters.combine(
+                SpendCounters.deltas(old, sign=-1),
+                SpendCounters.deltas({**old, **update_fields}),
+            )
+            transaction.update(doc_ref, update_fields)
+            stage_expense_writes(transaction, db, uid, deltas)
+            return True
+
+        if not run_transaction(db, edit):
+            return jsonify({"error": "Not found or unauthorized"}), 404
+        DataVersions.invalidate(uid)
         return jsonify({"message": "Expense updated"}), 200
 
     @classmethod
@@ -65,23 +117,35 @@ class ExpenseService:
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
-        doc_ref = cls.firebase.db.collection("expenses").document(expense_id)
-        doc = doc_ref.get()
-        if not doc.exists or doc.to_dict().get("user_id") != uid:
-            return jsonify({"error": "Not found or unauthorized"}), 404
+        db = cls.firebase.db
+        doc_ref = db.collection("expenses").document(expense_id)
+
+        # Two concurrent deletes must not both decrement the counters
+        def delete(transaction):
+            doc = doc_ref.get(transaction=transaction)
+            if not doc.exists or doc.to_dict().get("user_id") != uid:
+                return False
+            deltas = SpendCounters.deltas(doc.to_dict(), sign=-1)
+            transaction.delete(doc_ref)
+            stage_expense_writes(transaction, db, uid, deltas)
+            return True
 
-        doc_ref.delete()
+        if not run_transaction(db, delete):
+            return jsonify({"error": "Not found or unauthorized"}), 404
+        DataVersions.invalidate(uid)
         return jsonify({"message": "Expense deleted"}), 200
     
     @classmethod
-    def list_expenses(cls, token):
+    def list_expenses(cls, token, args=None):
         uid = cls.firebase.verify_user_token(token)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
-        expenses = cls.firebase.db.collection("expenses").where("user_id", "==", uid).stream()
-        result = [{"id": doc.id, **doc.to_dict()} for doc in expenses]
-        return jsonify(result), 200
+        list_query, error = ListQuery.from_args(args, cls.LIST_FIELDS, cls.ORDER_FIELDS)
+        if error:
+            return jsonify({"error": error}), 400
+
+        return list_query.response(cls.firebase.db.collection("expenses").where("user_id", "==", uid))
 
     @classmethod
     def get_expense(cls, expense_id, token):
@@ -99,61 +163,63 @@ class ExpenseService:
         return jsonify(expense), 200
 
     @classmethod
-    def _check_and_notify(cls, uid, category):
-        budgets = cls.firebase.db.collection("budgets").where("user_id", "==", uid).stream()
-        total_spent = 0
-
-        for doc in cls.firebase.db.collection("expenses").where("user_id", "==", uid).stream():
-            exp = doc.to_dict()
-            if exp.get("category") == category:
-                total_spent += float(exp["amount"])
-
-        for doc in budgets:
-            budget = doc.to_dict()
-            if budget["category"] == category or budget["category"] == "overall":
-                if total_spent > float(budget["amount"]):
-                    user_doc = cls.firebase.db.collection("users").document(uid).get().to_dict()
-                    EmailService.send_budget_alert(user_doc["email"], total_spent, budget["amount"])
-                    break
+    def _check_and_notify(cls, uid, category, day=None):
+        """Queue an alert when a budget for ``category`` (or overall) is exceeded in its window containing ``day``.
+
+        Spend comes from the spend counters via BudgetEvaluator; the email itself is sent
+        by the alert worker, not on the request path.
+        """
+        db = cls.firebase.db
+        budgets = [
+            (doc.id, doc.to_dict()) for doc in db.collection("budgets").where("user_id", "==", uid).stream()
+        ]
+        budgets = [(budget_id, budget) for budget_id, budget in budgets if budget["category"] in (category, "overall")]
+
+        for status in BudgetEvaluator.evaluate(db, uid, budgets, day):
+            if status["exceeded"]:
+                user_doc = db.collection("users").document(uid).get().to_dict()
+                AlertQueue.enqueue_budget_alert(db, user_doc["email"], status["spent"], status["amount"])
+                break
 
     @classmethod
-    def filter_by_category(cls, token, category):
-        uid = cls.firebase.verify_user_token(token)
-        if not uid:
-            return jsonify({"error": "Unauthorized"}), 401
+    def filter_expenses(cls, token, args):
+        """Filter by category/method sets, date and amount ranges and a notes substring.
 
-        expenses = cls.firebase.db.collection("expenses") \
-            .where("user_id", "==", uid) \
-            .where("category", "==", category).stream()
-
-        result = [{"id": doc.id, **doc.to_dict()} for doc in expenses]
-        return jsonify(result), 200
-    
-    @classmethod
-    def filter_by_date(cls, token, date_str):
+        ExpenseQueryPlanner pushes the most selective indexed predicates into the
+        backend query and applies the rest while streaming. With ``explain`` set the
+        response also reports the plan and documents scanned versus returned.
+        """
         uid = cls.firebase.verify_user_token(token)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
-        expenses = cls.firebase.db.collection("expenses") \
-            .where("user_id", "==", uid) \
-            .where("date", "==", date_str).stream()
+        valid, msg = ExpenseValidator.validate_filter_args(args)
+        if not valid:
+            return jsonify({"error": msg}), 400
 
-        result = [{"id": doc.id, **doc.to_dict()} for doc in expenses]
-        return jsonify(result), 200
-    
-    @classmethod
-    def filter_by_method(cls, token, method):
-        uid = cls.firebase.verify_user_token(token)
-        if not uid:
-            return jsonify({"error": "Unauthorized"}), 401
+        spec = ExpenseFilterSpec.from_args(args)
+        plan, ideal = ExpenseQueryPlanner.plan(spec)
+        stats = {"scanned": 0, "returned": 0}
 
-        expenses = cls.firebase.db.collection("expenses") \
-            .where("user_id", "==", uid) \
-            .where("method", "==", method).stream()
+        query = cls.firebase.db.collection("expenses").where("user_id", "==", uid)
+        result = [{"id": doc.id, **expense} for doc, expense in ExpenseQueryPlanner.execute(query, plan, stats)]
 
-        result = [{"id": doc.id, **doc.to_dict()} for doc in expenses]
-        return jsonify(result), 200
+        if not args.get("explain"):
+            return jsonify(result), 200
 
+        explain = {**plan.explain(), **stats}
+        if ideal is not plan:
+            explain["missing_index"] = ideal.index_fields()
+        return jsonify({"results": result, "explain": explain}), 200
 
+    @classmethod
+    def filter_by_category(cls, token, category):
+        return cls.filter_expenses(token, {"category": category})
 
+    @classmethod
+    def filter_by_date(cls, token, date_str):
+        return cls.filter_expenses(token, {"date": date_str})
+
+    @classmethod
+    def filter_by_method(cls, token, method):
+        return cls.filter_expenses(token, {"method": method})
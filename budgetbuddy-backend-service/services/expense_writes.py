@@ -0,0 +1,16 @@
+from services.category_rollups import CategoryRollups
+from services.data_versions import DataVersions
+from services.spend_counters import SpendCounters
+
+
+def stage_expense_writes(batch, db, uid, deltas):
+    """Stage everything derived from an expense write in ``batch`` (a WriteBatch or Transaction).
+
+    ``deltas`` are the SpendCounters deltas of the write. Adds the spend counter
+    and category rollup increments and bumps the user's data version, so all of
+    them commit together with the expense; call ``DataVersions.invalidate(uid)``
+    once the batch has committed.
+    """
+    SpendCounters.stage(batch, db, uid, deltas)
+    CategoryRollups.stage(batch, db, uid, deltas)
+    DataVersions.stage(batch, db, uid)
@@ -1,23 +1,162 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
 import firebase_admin
 from firebase_admin import credentials, auth, firestore
 
 
+class TokenCache:
+    """Bounded, thread-safe LRU of decoded ID tokens.
+
+    Entries are keyed by a SHA-256 of the raw token (so raw tokens never sit in
+    memory as dict keys) and expire at the token's own ``exp`` claim.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            decoded, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decoded
+
+    def put(self, token, decoded):
+        expires_at = decoded.get("exp")
+        if not expires_at or expires_at <= time.time() or self.max_size <= 0:
+            return
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (decoded, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
 class FirebaseService:
+    """Lazily initialised access to Firebase Auth and Firestore.
+
+    Constructing the service is free: the Admin SDK app and the Firestore client
+    are only created on first use. Services share the process-wide instance
+    returned by ``FirebaseService.instance()``.
+    """
+
+    CREDENTIALS_PATH = os.getenv("FIREBASE_CREDENTIALS", "firebase_key.json")
+    # "firestore" (default), "memory" or "sqlite"
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore")
+    SQLITE_PATH = os.getenv("SQLITE_PATH", "budgetbuddy.db")
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 1024))
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
     def __init__(self):
+        self._db = None
+        self._init_lock = threading.Lock()
+        self._app_lock = threading.Lock()
+        self.token_cache = TokenCache(self.TOKEN_CACHE_SIZE)
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _ensure_app(self):
         if not firebase_admin._apps:
-            cred = credentials.Certificate("firebase_key.json")
-            firebase_admin.initialize_app(cred)
+            with self._app_lock:
+                if not firebase_admin._apps:
+                    cred = credentials.Certificate(self.CREDENTIALS_PATH)
+                    firebase_admin.initialize_app(cred)
+
+    def _create_db(self):
+        if self.STORAGE_BACKEND == "memory":
+            from services.memory_store import MemoryClient
+            return MemoryClient()
+        if self.STORAGE_BACKEND == "sqlite":
+            from services.sqlite_store import SQLiteClient
+            return SQLiteClient(self.SQLITE_PATH)
+        if self.STORAGE_BACKEND != "firestore":
+            raise ValueError(f"Unknown STORAGE_BACKEND: {self.STORAGE_BACKEND}")
+        self._ensure_app()
+        return firestore.client()
 
-        self.db = firestore.client()
+    @property
+    def db(self):
+        if self._db is None:
+            with self._init_lock:
+                if self._db is None:
+                    self._db = self._create_db()
+        return self._db
+
+    def ping(self):
+        """Round-trip a single document read to storage; returns (ok, error message).
+
+        A read, so that frequent health probes don't each cost a write.
+        """
         try:
-            self.db.collection("meta_test").document("ping").set({"status": "connected"})
-            print("Firebase Firestore DB connection - SUCCESSFUL!!")
+            self.db.collection("meta_test").document("ping").get()
+            return True, None
         except Exception as e:
-            print("Firebase Firestore DB connection - FAILED!!", e)
+            return False, str(e)
+
+    def verify_user_token(self, token, check_revoked=False):
+        """Return the uid for ``token`` or None if it does not verify.
 
-    def verify_user_token(self, token):
+        Revocation-sensitive callers pass ``check_revoked=True``, which skips the
+        cache and asks Firebase to check the revocation list as well.
+        """
+        if not token:
+            return None
+
+        if not check_revoked:
+            decoded = self.token_cache.get(token)
+            if decoded is not None:
+                return decoded["uid"]
+
+        # Outside the try: a configuration error must surface, not look like a bad token
+        self._ensure_app()
         try:
-            decoded = auth.verify_id_token(token)
-            return decoded['uid']
+            decoded = auth.verify_id_token(token, check_revoked=check_revoked)
+            uid = decoded['uid']
         except Exception:
-            return None
\ No newline at end of file
+            return None
+
+        self.token_cache.put(token, decoded)
+        return uid
@@ -0,0 +1,118 @@
+import threading
+from collections import defaultdict
+
+from services.document_store import DocumentStoreClient, DocumentNotFound, matches, sort_rows, rows_after, apply_transforms, merge_fields
+
+
+class _Collection:
+    """Documents of one collection plus hash indexes on equality-filtered fields."""
+
+    def __init__(self, indexed_fields):
+        self.documents = {}
+        self.indexes = {field: defaultdict(set) for field in indexed_fields}
+
+    def _index(self, document_id, data, add):
+        for field, index in self.indexes.items():
+            value = data.get(field)
+            try:
+                bucket = index[value]
+            except TypeError:  # unhashable values are simply not indexed
+                continue
+            if add:
+                bucket.add(document_id)
+            else:
+                bucket.discard(document_id)
+                if not bucket:
+                    del index[value]
+
+    def put(self, document_id, data):
+        self.remove(document_id)
+        self.documents[document_id] = data
+        self._index(document_id, data, add=True)
+
+    def remove(self, document_id):
+        old = self.documents.pop(document_id, None)
+        if old is not None:
+            self._index(document_id, old, add=False)
+
+    def candidates(self, filters):
+        """Smallest id set any indexed equality filter narrows to, else every id."""
+        best = None
+        for field, op, value in filters:
+            if op != "==" or field not in self.indexes:
+                continue
+            try:
+                ids = self.indexes[field].get(value, set())
+            except TypeError:
+                continue
+            if best is None or len(ids) < len(best):
+                best = ids
+        return list(self.documents) if best is None else list(best)
+
+
+class MemoryClient(DocumentStoreClient):
+    """Process-local, indexed document store with the Firestore client API."""
+
+    INDEXED_FIELDS = ("user_id", "category", "method", "status", "date")
+
+    def __init__(self, indexed_fields=INDEXED_FIELDS):
+        self._indexed_fields = indexed_fields
+        self._collections = {}
+        self._lock = threading.RLock()
+
+    def _collection(self, path):
+        collection = self._collections.get(path)
+        if collection is None:
+            collection = self._collections[path] = _Collection(self._indexed_fields)
+        return collection
+
+    def _get(self, collection_path, document_id):
+        with self._lock:
+            data = self._collection(collection_path).documents.get(document_id)
+            return dict(data) if data is not None else None
+
+    def _set(self, collection_path, document_id, data, merge):
+        with self._lock:
+            collection = self._collection(collection_path)
+            existing = collection.documents.get(document_id)
+            data = apply_transforms(existing, data)
+            if merge and existing is not None:
+                data = merge_fields(existing, data)
+            collection.put(document_id, data)
+
+    def _update(self, collection_path, document_id, fields):
+        with self._lock:
+            collection = self._collection(collection_path)
+            if document_id not in collection.documents:
+                raise DocumentNotFound(f"{collection_path}/{document_id}")
+            existing = collection.documents[document_id]
+            collection.put(document_id, {**existing, **apply_transforms(existing, fields)})
+
+    def _delete(self, collection_path, document_id):
+        with self._lock:
+            self._collection(collection_path).remove(document_id)
+
+    def _commit(self, writes):
+        with self._lock:
+            # Fail before applying anything so a batch stays all-or-nothing
+            for kind, reference, _, _ in writes:
+                if kind == "update" and reference.id not in self._collection(reference._collection_path).documents:
+                    raise DocumentNotFound(reference.path)
+            super()._commit(writes)
+
+    def _query(self, collection_path, filters, orders, limit, cursor=None):
+        with self._lock:
+            collection = self._collection(collection_path)
+            rows = []
+            for document_id in collection.candidates(filters):
+                data = collection.documents[document_id]
+                if matches(data, filters):
+                    rows.append((document_id, data))
+
+        if orders:
+            rows = sort_rows(rows, orders)
+        if cursor:
+            rows = rows_after(rows, orders, cursor)
+        if limit is not None:
+            rows = rows[:limit]
+        return rows
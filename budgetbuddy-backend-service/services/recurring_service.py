@@ -1,10 +1,13 @@
 from flask import jsonify
 from services.firebase_service import FirebaseService
+from utils.pagination import ListQuery
 from datetime import datetime, timedelta
 import uuid
 
 class RecurringService:
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
+    LIST_FIELDS = ["amount", "category", "frequency", "start_date", "end_date", "notes", "status", "created_at"]
+    ORDER_FIELDS = ["start_date", "created_at"]  # each has (user_id, field) indexes in firestore.indexes.json
 
     @classmethod
     def add_recurring_expense(cls, token, data):
@@ -34,14 +37,16 @@ class RecurringService:
         return jsonify({"message": "Recurring expense added", "id": doc_ref.id}), 201
 
     @classmethod
-    def list_recurring_expenses(cls, token):
+    def list_recurring_expenses(cls, token, args=None):
         uid = cls.firebase.verify_user_token(token)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
-        rec = cls.firebase.db.collection("recurring").where("user_id", "==", uid).stream()
-        result = [{"id": doc.id, **doc.to_dict()} for doc in rec]
-        return jsonify(result), 200
+        list_query, error = ListQuery.from_args(args, cls.LIST_FIELDS, cls.ORDER_FIELDS)
+        if error:
+            return jsonify({"error": error}), 400
+
+        return list_query.response(cls.firebase.db.collection("recurring").where("user_id", "==", uid))
     
     @classmethod
     def edit_recurring_expense(cls, recurring_id, data, token):
@@ -1,11 +1,14 @@
 from flask import jsonify
 from datetime import datetime
 from services.firebase_service import FirebaseService
+from utils.pagination import ListQuery
 import uuid
 
 class ReminderService:
 
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
+    LIST_FIELDS = ["title", "day", "message", "active", "created_at"]
+    ORDER_FIELDS = ["day", "created_at"]  # each has (user_id, field) indexes in firestore.indexes.json
 
     @classmethod
     def set_reminder(cls, token, data):
@@ -81,13 +84,15 @@ class ReminderService:
         return jsonify({"message": "Reminder deleted"}), 200
     
     @classmethod
-    def list_reminders(cls, token):
+    def list_reminders(cls, token, args=None):
         uid = cls.firebase.verify_user_token(token)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
-        reminders = cls.firebase.db.collection("reminders").where("user_id", "==", uid).stream()
-        result = [{"id": doc.id, **doc.to_dict()} for doc in reminders]
-        return jsonify(result), 200
+        list_query, error = ListQuery.from_args(args, cls.LIST_FIELDS, cls.ORDER_FIELDS)
+        if error:
+            return jsonify({"error": error}), 400
+
+        return list_query.response(cls.firebase.db.collection("reminders").where("user_id", "==", uid))
 
 
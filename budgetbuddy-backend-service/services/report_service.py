@@ -1,62 +1,99 @@
-from flask import jsonify, send_file
+from flask import Response, jsonify, send_file
+from werkzeug.http import parse_etags
 from services.firebase_service import FirebaseService
+from services.category_rollups import CategoryRollups
+from services.data_versions import DataVersions
+from services.spend_counters import SpendCounters
+from utils.report_cache import ReportCache
+from utils.pdf_renderer import PDFRenderer, RenderTimeout, RendererBusy
 from datetime import datetime, timedelta
-import calendar
+import html
 import io
-from collections import defaultdict
+import os
 import pdfkit
 
 class ReportService:
-    firebase = FirebaseService()
+    firebase = FirebaseService.instance()
+    report_cache = ReportCache(int(os.getenv("REPORT_CACHE_SIZE", 1024)))
+    # Looked up at call time so tests can patch pdfkit.from_string
+    pdf_renderer = PDFRenderer(
+        lambda markup: pdfkit.from_string(markup, False),
+        workers=int(os.getenv("PDF_RENDER_WORKERS", 2)),
+        max_pending=int(os.getenv("PDF_RENDER_QUEUE", 32)),
+        cache_size=int(os.getenv("PDF_CACHE_SIZE", 256)),
+        timeout=float(os.getenv("PDF_RENDER_TIMEOUT", 60)),
+    )
+
+    @staticmethod
+    def month_start(month):
+        """First day of ``month`` (YYYY-MM); raises ValueError if malformed."""
+        return datetime.strptime(month + "-01", "%Y-%m-%d").date()
 
     @classmethod
-    def generate_monthly_report(cls, token, month):
-        uid = cls.firebase.verify_user_token(token)
-        if not uid:
-            return jsonify({"error": "Unauthorized"}), 401
+    def _cached_response(cls, uid, endpoint, params, if_none_match, compute):
+        """Serve ``compute()``'s payload through the report cache, with an ETag.
+
+        The ETag changes whenever the user's data version does, so a matching
+        ``If-None-Match`` gets an empty 304 without computing or reading anything.
+        """
+        version = DataVersions.current(cls.firebase.db, uid)
+        etag = ReportCache.etag(uid, endpoint, params, version)
+        if if_none_match and parse_etags(if_none_match).contains(etag):
+            cls.report_cache.count_not_modified()
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response, 304
+
+        response = jsonify(cls._cached_payload(uid, endpoint, params, version, compute))
+        response.set_etag(etag)
+        return response, 200
 
-        start_date = datetime.strptime(month + "-01", "%Y-%m-%d")
-        end_day = calendar.monthrange(start_date.year, start_date.month)[1]
-        end_date = start_date.replace(day=end_day)
+    @classmethod
+    def _cached_payload(cls, uid, endpoint, params, version, compute):
+        payload = cls.report_cache.get(uid, endpoint, params, version)
+        if payload is None:
+            payload = compute()
+            cls.report_cache.put(uid, endpoint, params, version, payload)
+        return payload
 
-        expenses = cls.firebase.db.collection("expenses").where("user_id", "==", uid).stream()
-        summary = defaultdict(float)
+    @classmethod
+    def _monthly_payload(cls, uid, month, start_date):
+        return {"month": month, "summary": CategoryRollups.read(cls.firebase.db, uid, "monthly", start_date)}
 
-        for doc in expenses:
-            e = doc.to_dict()
-            try:
-                e_date = datetime.strptime(e["date"], "%Y-%m-%d")
-            except ValueError:
-                continue
+    @classmethod
+    def generate_monthly_report(cls, token, month, if_none_match=None):
+        uid = cls.firebase.verify_user_token(token)
+        if not uid:
+            return jsonify({"error": "Unauthorized"}), 401
 
-            if start_date <= e_date <= end_date:
-                summary[e["category"]] += float(e["amount"])
+        try:
+            start_date = cls.month_start(month)
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid month format. Use YYYY-MM."}), 400
 
-        return jsonify({"month": month, "summary": dict(summary)}), 200
+        return cls._cached_response(
+            uid, "monthly", {"month": month}, if_none_match,
+            lambda: cls._monthly_payload(uid, month, start_date),
+        )
 
     @classmethod
-    def generate_weekly_insights(cls, token):
+    def generate_weekly_insights(cls, token, if_none_match=None):
         uid = cls.firebase.verify_user_token(token)
         if not uid:
             return jsonify({"error": "Unauthorized"}), 401
 
-        today = datetime.today()
-        this_week_start = today - timedelta(days=today.weekday())
-        last_week_start = this_week_start - timedelta(days=7)
-
-        this_week = defaultdict(float)
-        last_week = defaultdict(float)
+        # The insights compare this ISO week with the one before, so they change with the week too
+        today = datetime.today().date()
+        params = {"week": SpendCounters.bucket("weekly", today)}
+        return cls._cached_response(uid, "insights", params, if_none_match, lambda: {
+            "insights": cls._weekly_insights(uid, today),
+        })
 
-        expenses = cls.firebase.db.collection("expenses").where("user_id", "==", uid).stream()
-
-        for doc in expenses:
-            e = doc.to_dict()
-            date = datetime.strptime(e["date"], "%Y-%m-%d")
-            amount = float(e["amount"])
-            if this_week_start <= date < today:
-                this_week[e["category"]] += amount
-            elif last_week_start <= date < this_week_start:
-                last_week[e["category"]] += amount
+    @classmethod
+    def _weekly_insights(cls, uid, today):
+        # This ISO week and the one before, from their category rollups
+        this_week = CategoryRollups.read(cls.firebase.db, uid, "weekly", today)
+        last_week = CategoryRollups.read(cls.firebase.db, uid, "weekly", today - timedelta(days=7))
 
         insights = {}
         # Handle categories in this week
@@ -77,7 +114,16 @@ class ReportService:
             if category not in this_week:
                 insights[category] = "No spending this week"
 
-        return jsonify({"insights": insights}), 200
+        return insights
+
+    @staticmethod
+    def _pdf_html(month, summary):
+        # Categories are free text: escape them so they can't inject markup into the renderer
+        markup = f"<h1>BudgetBuddy Monthly Report - {html.escape(month)}</h1><ul>"
+        for cat, amt in summary.items():
+            markup += f"<li>{html.escape(cat)}: ${amt:.2f}</li>"
+        markup += "</ul>"
+        return markup
 
     @classmethod
     def generate_pdf_report(cls, token, month):
@@ -86,19 +132,27 @@ class ReportService:
             return jsonify({"error": "Unauthorized"}), 401
 
         try:
-            datetime.strptime(month + "-01", "%Y-%m-%d")
-        except ValueError:
+            start_date = cls.month_start(month)
+        except (TypeError, ValueError):
             return jsonify({"error": "Invalid month format. Use YYYY-MM."}), 400
 
-        response = cls.generate_monthly_report(token, month)
-        summary = response[0].json["summary"]
+        # The same cached summary /reports/monthly serves, computed at most once
+        version = DataVersions.current(cls.firebase.db, uid)
+        summary = cls._cached_payload(
+            uid, "monthly", {"month": month}, version,
+            lambda: cls._monthly_payload(uid, month, start_date),
+        )["summary"]
 
-        html = f"<h1>BudgetBuddy Monthly Report - {month}</h1><ul>"
-        for cat, amt in summary.items():
-            html += f"<li>{cat}: ${amt:.2f}</li>"
-        html += "</ul>"
+        try:
+            pdf_bytes = cls.pdf_renderer.render(
+                PDFRenderer.key(uid, month, summary),
+                cls._pdf_html(month, summary),
+            )
+        except RendererBusy:
+            return jsonify({"error": "Too many reports are being generated. Try again shortly."}), 503
+        except RenderTimeout:
+            return jsonify({"error": "The report took too long to generate. Try again shortly."}), 504
 
-        pdf_bytes = pdfkit.from_string(html, False)
         return send_file(
             io.BytesIO(pdf_bytes),
             download_name=f"BudgetBuddy_Report_{month}.pdf",
@@ -0,0 +1,165 @@
+from collections import defaultdict
+from datetime import date, datetime
+from urllib.parse import quote
+
+from firebase_admin import firestore
+
+COLLECTION = "spend_counters"
+PERIODS = ("daily", "weekly", "monthly", "yearly")
+OVERALL = "overall"
+MAX_BATCH_WRITES = 500  # Firestore's limit on writes per batch
+MAX_IN_VALUES = 30  # Firestore's limit on values in an "in" filter
+
+
+class SpendCounters:
+    """Materialized spend totals per (user, category, period bucket).
+
+    Each expense contributes to one counter per period (day, ISO week, month, year)
+    for its own category and for ``overall``. Writers stage the counter increments
+    in the same WriteBatch as the expense itself, so counters and expenses commit
+    together, and a budget check reads a handful of counter documents instead of
+    the user's whole expense history. Totals are integer cents so increments never drift.
+    """
+
+    @staticmethod
+    def bucket(period, day):
+        if period == "daily":
+            return day.isoformat()
+        if period == "weekly":
+            year, week, _ = day.isocalendar()
+            return f"{year}-W{week:02d}"
+        if period == "monthly":
+            return f"{day.year}-{day.month:02d}"
+        if period == "yearly":
+            return str(day.year)
+        raise ValueError(f"Invalid period: {period}")
+
+    @staticmethod
+    def parse_day(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except ValueError:
+            return None
+
+    @classmethod
+    def deltas(cls, expense, sign=1):
+        """``{(category, period, bucket): cents}`` contributed by ``expense``.
+
+        Expenses without a usable amount or date don't count towards any period;
+        a missing or non-string category only counts towards ``overall``.
+        """
+        day = cls.parse_day(expense.get("date"))
+        try:
+            cents = sign * round(float(expense.get("amount")) * 100)
+        except (TypeError, ValueError, OverflowError):  # OverflowError: infinite amounts
+            return {}
+        if day is None or not cents:
+            return {}
+
+        category = expense.get("category")
+        categories = {category if isinstance(category, str) and category else OVERALL, OVERALL}
+        return {
+            (category, period, cls.bucket(period, day)): cents
+            for category in categories
+            for period in PERIODS
+        }
+
+    @staticmethod
+    def combine(*deltas):
+        """Sum several delta maps, dropping counters whose changes cancel out."""
+        totals = defaultdict(int)
+        for delta in deltas:
+            for key, cents in delta.items():
+                totals[key] += cents
+        return {key: cents for key, cents in totals.items() if cents}
+
+    @staticmethod
+    def counter_id(uid, category, period, bucket):
+        # Document ids can't contain "/", and categories are free text
+        return f"{uid}_{period}_{bucket}_{quote(category, safe='')}"
+
+    @classmethod
+    def counter_ref(cls, db, uid, category, period, bucket):
+        return db.collection(COLLECTION).document(cls.counter_id(uid, category, period, bucket))
+
+    @classmethod
+    def stage(cls, batch, db, uid, deltas):
+        """Add one ``Increment`` per changed counter to ``batch``."""
+        for (category, period, bucket), cents in deltas.items():
+            batch.set(cls.counter_ref(db, uid, category, period, bucket), {
+                "user_id": uid,
+                "category": category,
+                "period": period,
+                "bucket": bucket,
+                "total_cents": firestore.Increment(cents),
+            }, merge=True)
+
+    @classmethod
+    def read(cls, db, uid, categories, period, first, last):
+        """``{(category, bucket): cents}`` for the ``period`` buckets spanning ``first`` to ``last``.
+
+        Only counters of ``categories`` are read; missing counters mean nothing was spent.
+        """
+        categories = sorted(categories)
+        totals = {}
+        for start in range(0, len(categories), MAX_IN_VALUES):
+            counters = db.collection(COLLECTION) \
+                .where("user_id", "==", uid) \
+                .where("period", "==", period) \
+                .where("category", "in", categories[start:start + MAX_IN_VALUES]) \
+                .where("bucket", ">=", cls.bucket(period, first)) \
+                .where("bucket", "<=", cls.bucket(period, last)) \
+                .stream()
+            for doc in counters:
+                counter = doc.to_dict()
+                totals[(counter["category"], counter["bucket"])] = int(counter.get("total_cents", 0))
+        return totals
+
+    @classmethod
+    def rebuild(cls, db, uid=None):
+        """Recompute counters from raw expenses, for one user or everyone.
+
+        Counters are overwritten with the recomputed totals and stale ones are
+        deleted. Expense writes that land while this runs may be counted twice or
+        not at all, so run it while writes are paused. Returns the counter count.
+        """
+        expenses = db.collection("expenses")
+        counters = db.collection(COLLECTION)
+        if uid:
+            expenses = expenses.where("user_id", "==", uid)
+            counters = counters.where("user_id", "==", uid)
+
+        totals = defaultdict(int)
+        for doc in expenses.stream():
+            expense = doc.to_dict()
+            for (category, period, bucket), cents in cls.deltas(expense).items():
+                totals[(expense.get("user_id"), category, period, bucket)] += cents
+
+        fresh = {cls.counter_id(*key): key for key in totals}
+        stale = [doc.reference for doc in counters.stream() if doc.id not in fresh]
+
+        writes = [
+            (db.collection(COLLECTION).document(counter_id), {
+                "user_id": owner,
+                "category": category,
+                "period": period,
+                "bucket": bucket,
+                "total_cents": totals[(owner, category, period, bucket)],
+            })
+            for counter_id, (owner, category, period, bucket) in fresh.items()
+        ]
+        writes += [(reference, None) for reference in stale]
+
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            batch = db.batch()
+            for reference, data in writes[start:start + MAX_BATCH_WRITES]:
+                if data is None:
+                    batch.delete(reference)
+                else:
+                    batch.set(reference, data)
+            batch.commit()
+        return len(fresh)
@@ -0,0 +1,252 @@
+import json
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+
+from services.document_store import DocumentStoreClient, DocumentNotFound, matches, sort_rows, rows_after, apply_transforms, has_transforms, merge_fields, type_rank, DESCENDING, DOCUMENT_ID, RANGE_OPERATORS
+
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_SQL_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+_SQL_SCALARS = (str, int, float, bool)
+_JSON_TYPE_RANKS = (
+    ("null", 0), ("true", 1), ("false", 1), ("integer", 2), ("real", 2), ("text", 3), ("object", 4), ("array", 4),
+)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} values")
+
+
+def _decode(obj):
+    if len(obj) == 1:
+        if "$datetime" in obj:
+            return datetime.fromisoformat(obj["$datetime"])
+        if "$date" in obj:
+            return date.fromisoformat(obj["$date"])
+    return obj
+
+
+def _field_expr(field):
+    if field == DOCUMENT_ID:
+        return "id"
+    return f"json_extract(data, '$.{field}')"
+
+
+def _rank_expr(field):
+    """SQL for ``type_rank`` of a field's value; NULL when the document lacks the field."""
+    cases = " ".join(f"WHEN '{json_type}' THEN {rank}" for json_type, rank in _JSON_TYPE_RANKS)
+    return f"CASE json_type(data, '$.{field}') {cases} END"
+
+
+class SQLiteClient(DocumentStoreClient):
+    """Single-node document store on SQLite with the Firestore client API.
+
+    Documents are stored as JSON in one table. Equality and range filters on plain
+    top-level fields are pushed down to SQL, so the expression indexes below are
+    used for the common per-user queries; anything else is filtered in Python.
+    """
+
+    INDEXES = (
+        ("user_id", "date"),
+        ("user_id", "category"),
+        ("user_id", "method"),
+        ("user_id", "amount"),
+        ("user_id", "status"),
+    )
+
+    def __init__(self, path="budgetbuddy.db"):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " collection TEXT NOT NULL,"
+                " id TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " PRIMARY KEY (collection, id))"
+            )
+            for fields in self.INDEXES:
+                # Ordered and range-filtered fields compare by type rank first, as in _compile
+                first, *rest = fields
+                columns = ", ".join([_field_expr(first)] + [f"{_rank_expr(f)}, {_field_expr(f)}" for f in rest])
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_documents_{'_'.join(fields)} "
+                    f"ON documents (collection, {columns})"
+                )
+
+    @staticmethod
+    def _dumps(data):
+        return json.dumps(data, default=_encode)
+
+    @staticmethod
+    def _loads(text):
+        return json.loads(text, object_hook=_decode)
+
+    def _get(self, collection_path, document_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM documents WHERE collection = ? AND id = ?",
+                (collection_path, document_id),
+            ).fetchone()
+        return self._loads(row[0]) if row else None
+
+    def _write(self, collection_path, document_id, data):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+            (collection_path, document_id, self._dumps(data)),
+        )
+
+    def _set(self, collection_path, document_id, data, merge):
+        with self._lock:
+            existing = self._get(collection_path, document_id) if merge or has_transforms(data) else None
+            data = apply_transforms(existing, data)
+            if merge and existing is not None:
+                data = merge_fields(existing, data)
+            self._write(collection_path, document_id, data)
+
+    def _update(self, collection_path, document_id, fields):
+        with self._lock:
+            existing = self._get(collection_path, document_id)
+            if existing is None:
+                raise DocumentNotFound(f"{collection_path}/{document_id}")
+            self._write(collection_path, document_id, {**existing, **apply_transforms(existing, fields)})
+
+    def _delete(self, collection_path, document_id):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND id = ?",
+                (collection_path, document_id),
+            )
+
+    def _commit(self, writes):
+        # One transaction per batch: either every write lands or none does
+        with self._lock:
+            if self._conn.in_transaction:
+                super()._commit(writes)
+                return
+            self._conn.execute("BEGIN")
+            try:
+                super()._commit(writes)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def run_transaction(self, fn):
+        # BEGIN IMMEDIATE takes the write lock before the reads, so other
+        # processes sharing the database file can't interleave either
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = super().run_transaction(fn)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _compile(self, collection_path, filters, orders):
+        """Split filters into a SQL WHERE clause and a Python post-filter."""
+        clauses = ["collection = ?"]
+        params = [collection_path]
+        residual = []
+        ranked = set()  # fields a range filter already pins to one type rank
+
+        for field, op, value in filters:
+            if not _FIELD_RE.match(field):
+                residual.append((field, op, value))
+            elif op in RANGE_OPERATORS and isinstance(value, _SQL_SCALARS) and field != DOCUMENT_ID:
+                # SQLite compares across types ('abc' > 5); Firestore only within one
+                clauses.append(f"{_rank_expr(field)} = {type_rank(value)}")
+                clauses.append(f"{_field_expr(field)} {_SQL_OPERATORS[op]} ?")
+                params.append(value)
+                ranked.add(field)
+            elif op in _SQL_OPERATORS and isinstance(value, _SQL_SCALARS) and (field != DOCUMENT_ID or isinstance(value, str)):
+                clauses.append(f"{_field_expr(field)} {_SQL_OPERATORS[op]} ?")
+                params.append(value)
+            elif op in ("in", "not-in") and value and all(isinstance(v, _SQL_SCALARS) for v in value):
+                placeholders = ", ".join("?" for _ in value)
+                keyword = "IN" if op == "in" else "NOT IN"
+                clauses.append(f"{_field_expr(field)} {keyword} ({placeholders})")
+                params.extend(value)
+            else:
+                residual.append((field, op, value))
+
+        order_sql = []
+        sql_orders = all(_FIELD_RE.match(field) for field, _ in orders)
+        if sql_orders:
+            for field, direction in orders:
+                keyword = "DESC" if direction == DESCENDING else "ASC"
+                if field != DOCUMENT_ID and field not in ranked:
+                    # Drop documents missing the field; null values stay and sort first
+                    clauses.append(f"{_rank_expr(field)} IS NOT NULL")
+                    order_sql.append(f"{_rank_expr(field)} {keyword}")
+                order_sql.append(f"{_field_expr(field)} {keyword}")
+
+        sql = f"SELECT id, data FROM documents WHERE {' AND '.join(clauses)}"
+        if order_sql:
+            sql += " ORDER BY " + ", ".join(order_sql)
+        return sql, params, residual, sql_orders
+
+    @staticmethod
+    def _cursor_clause(orders, cursor):
+        """Lexicographic "row comes after cursor" condition, e.g. (a > ?) OR (a = ? AND id > ?).
+
+        Fields other than the document id compare by type rank first, then by value.
+        """
+        alternatives = []
+        params = []
+        equal_terms = []
+        for (field, direction), value in zip(orders, cursor):
+            after = "<" if direction == DESCENDING else ">"
+            expr = _field_expr(field)
+            if field == DOCUMENT_ID:
+                term, equal = f"{expr} {after} ?", f"{expr} = ?"
+            else:
+                rank, value_rank = _rank_expr(field), type_rank(value)
+                term = f"({rank} {after} {value_rank} OR ({rank} = {value_rank} AND {expr} {after} ?))"
+                equal = f"{rank} = {value_rank} AND {expr} = ?"
+            alternatives.append("(" + " AND ".join(equal_terms + [term]) + ")")
+            params.extend(cursor[:len(equal_terms)])
+            params.append(value)
+            equal_terms.append(equal)
+        return "(" + " OR ".join(alternatives) + ")", params
+
+    def _query(self, collection_path, filters, orders, limit, cursor=None):
+        sql, params, residual, sql_orders = self._compile(collection_path, filters, orders)
+        sql_cursor = cursor and sql_orders and all(isinstance(v, _SQL_SCALARS) for v in cursor)
+        if sql_cursor:
+            clause, cursor_params = self._cursor_clause(orders, cursor)
+            where, _, order = sql.partition(" ORDER BY ")
+            sql = f"{where} AND {clause} ORDER BY {order}"
+            params.extend(cursor_params)
+
+        push_limit = limit is not None and not residual and sql_orders and (sql_cursor or not cursor)
+        if push_limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        rows = [(document_id, self._loads(data)) for document_id, data in rows]
+        if residual:
+            rows = [row for row in rows if matches(row[1], residual)]
+        if orders and not sql_orders:
+            rows = sort_rows(rows, orders)
+        if cursor and not sql_cursor:
+            rows = rows_after(rows, orders, cursor)
+        if limit is not None and not push_limit:
+            rows = rows[:limit]
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
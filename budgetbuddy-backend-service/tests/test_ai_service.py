@@ -1,8 +1,12 @@
 
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from flask import Flask
 from services.ai_service import AIService
+from services.budget_evaluator import add_months
+from services.category_rollups import CategoryRollups
+from services.memory_store import MemoryClient
+from datetime import date
 
 app = Flask(__name__)
 
@@ -12,18 +16,24 @@ class TestAIService(unittest.TestCase):
         self.token = "valid_token"
         self.user_id = "user123"
 
+    def store(self, expenses=(), recurring=()):
+        db = MemoryClient()
+        for expense in expenses:
+            db.collection("expenses").add({"user_id": self.user_id, **expense})
+        for item in recurring:
+            db.collection("recurring").add({"user_id": self.user_id, **item})
+        CategoryRollups.rebuild(db)
+        return db
+
     @patch("services.ai_service.AIService.firebase")
     def test_generate_suggestions_high_spend(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_expenses = [
-            MagicMock(to_dict=lambda: {"amount": 150, "category": "Food", "date": "2025-05-15"}),
-            MagicMock(to_dict=lambda: {"amount": 50, "category": "Food", "date": "2025-04-10"}),
-            MagicMock(to_dict=lambda: {"amount": 60, "category": "Food", "date": "2025-03-12"})
-        ]
-        mock_firebase.db.collection.return_value.where.return_value.stream.side_effect = [
-            iter(mock_expenses),  # for expenses
-            iter([])              # for recurring
-        ]
+        this_month = date.today().replace(day=1)
+        mock_firebase.db = self.store(expenses=[
+            {"amount": 150, "category": "Food", "date": this_month.isoformat()},
+            {"amount": 50, "category": "Food", "date": add_months(this_month, -1).isoformat()},
+            {"amount": 60, "category": "Food", "date": add_months(this_month, -2).isoformat()},
+        ])
 
         with app.app_context():
             response, status = AIService.generate_suggestions(self.token)
@@ -33,14 +43,7 @@ class TestAIService(unittest.TestCase):
     @patch("services.ai_service.AIService.firebase")
     def test_generate_suggestions_multiple_subscriptions(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_firebase.db.collection.return_value.where.return_value.stream.side_effect = [
-            iter([]),  # no expenses
-            iter([
-                MagicMock(to_dict=lambda: {"notes": "spotify"}),
-                MagicMock(to_dict=lambda: {"notes": "netflix"}),
-                MagicMock(to_dict=lambda: {"notes": "prime"})
-            ])
-        ]
+        mock_firebase.db = self.store(recurring=[{"notes": "spotify"}, {"notes": "netflix"}, {"notes": "prime"}])
 
         with app.app_context():
             response, status = AIService.generate_suggestions(self.token)
@@ -58,10 +61,7 @@ class TestAIService(unittest.TestCase):
     @patch("services.ai_service.AIService.firebase")
     def test_generate_suggestions_no_spend_fallback(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_firebase.db.collection.return_value.where.return_value.stream.side_effect = [
-            iter([]),  # no expenses
-            iter([])   # no recurring
-        ]
+        mock_firebase.db = self.store()
 
         with app.app_context():
             response, status = AIService.generate_suggestions(self.token)
@@ -71,7 +71,7 @@ class TestAIService(unittest.TestCase):
     @patch("services.ai_service.AIService.firebase")
     def test_generate_suggestions_no_overspending(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_firebase.db.collection.return_value.where.return_value.stream.side_effect = [iter([]), iter([])]
+        mock_firebase.db = self.store()
 
         with app.app_context():
             response, status = AIService.generate_suggestions(self.token)
@@ -0,0 +1,96 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from services.alert_queue import AlertQueue, AlertWorker
+from services.memory_store import MemoryClient
+
+
+class TestAlertQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MemoryClient()
+        self.now = datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+    def outbox(self):
+        return [doc.to_dict() for doc in self.db.collection(AlertQueue.COLLECTION).stream()]
+
+    def test_enqueue_does_not_send(self):
+        with patch("services.alert_queue.EmailService.send_budget_alert") as mock_send:
+            AlertQueue.enqueue_budget_alert(self.db, "user@example.com", 160, 150)
+        mock_send.assert_not_called()
+        [alert] = self.outbox()
+        self.assertEqual(alert["status"], "pending")
+        self.assertEqual(alert["payload"], {"email": "user@example.com", "spent": 160, "limit": 150})
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            AlertQueue.enqueue(self.db, "sms", {})
+
+    @patch("services.alert_queue.EmailService.send_budget_alert", return_value=True)
+    def test_drain_sends_and_removes_delivered_alerts(self, mock_send):
+        AlertQueue.enqueue_budget_alert(self.db, "user@example.com", 160, 150)
+        stats = AlertQueue.drain(self.db)
+        self.assertEqual(stats, {"sent": 1, "retried": 0, "failed": 0})
+        mock_send.assert_called_once_with("user@example.com", 160, 150)
+        self.assertEqual(self.outbox(), [])
+
+    @patch("services.alert_queue.EmailService.send_budget_alert", return_value=False)
+    def test_failed_delivery_backs_off_then_gives_up(self, mock_send):
+        AlertQueue.enqueue(self.db, "budget_alert", {"email": "a@b.c", "spent": 2, "limit": 1}, now=self.now)
+
+        self.assertEqual(AlertQueue.drain(self.db, now=self.now)["retried"], 1)
+        [alert] = self.outbox()
+        self.assertEqual(alert["attempts"], 1)
+        self.assertEqual(alert["next_attempt_at"], "2025-05-01T12:00:30Z")
+
+        # Not due yet: nothing is attempted
+        self.assertEqual(AlertQueue.drain(self.db, now=self.now)["retried"], 0)
+        self.assertEqual(mock_send.call_count, 1)
+
+        moment = self.now
+        for attempt in range(2, AlertQueue.MAX_ATTEMPTS + 1):
+            moment += AlertQueue.backoff(attempt - 1)
+            AlertQueue.drain(self.db, now=moment)
+        [alert] = self.outbox()
+        self.assertEqual(alert["status"], "failed")
+        self.assertEqual(alert["attempts"], AlertQueue.MAX_ATTEMPTS)
+        self.assertEqual(AlertQueue.drain(self.db, now=moment + timedelta(days=1)), {"sent": 0, "retried": 0, "failed": 0})
+
+    @patch("services.alert_queue.EmailService.send_budget_alert", return_value=True)
+    def test_claimed_alert_is_skipped_until_its_lease_expires(self, mock_send):
+        AlertQueue.enqueue(self.db, "budget_alert", {"email": "user@example.com", "spent": 160, "limit": 150}, now=self.now)
+        [doc] = self.db.collection(AlertQueue.COLLECTION).stream()
+
+        # Another worker claimed it and is sending it
+        self.assertIsNotNone(AlertQueue.claim(self.db, doc.reference, self.now))
+        self.assertIsNone(AlertQueue.claim(self.db, doc.reference, self.now))
+        self.assertEqual(AlertQueue.drain(self.db, now=self.now)["sent"], 0)
+        mock_send.assert_not_called()
+
+        # That worker died: the alert is picked up once the lease runs out
+        later = self.now + timedelta(seconds=AlertQueue.LEASE_SECONDS + 1)
+        self.assertEqual(AlertQueue.drain(self.db, now=later)["sent"], 1)
+        mock_send.assert_called_once_with("user@example.com", 160, 150)
+
+    def test_backoff_is_capped(self):
+        self.assertEqual(AlertQueue.backoff(1), timedelta(seconds=30))
+        self.assertEqual(AlertQueue.backoff(3), timedelta(seconds=120))
+        self.assertEqual(AlertQueue.backoff(20), timedelta(hours=1))
+
+    @patch("services.alert_queue.EmailService.send_budget_alert", return_value=True)
+    def test_worker_drains_in_background(self, mock_send):
+        worker = AlertWorker(db=self.db, poll_interval=60).start()
+        try:
+            AlertQueue.enqueue_budget_alert(self.db, "user@example.com", 160, 150)
+            for _ in range(200):
+                if mock_send.called and not self.outbox():
+                    break
+                worker._stop.wait(0.01)
+        finally:
+            worker.stop(timeout=1)
+        mock_send.assert_called_once_with("user@example.com", 160, 150)
+        self.assertEqual(self.outbox(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
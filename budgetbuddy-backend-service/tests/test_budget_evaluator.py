@@ -0,0 +1,115 @@
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+from services.budget_evaluator import BudgetEvaluator, add_months
+from services.memory_store import MemoryClient
+from services.spend_counters import SpendCounters
+
+
+class TestBudgetEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MemoryClient()
+        self.user_id = "user123"
+
+    def add(self, amount, category, day):
+        expense = {"user_id": self.user_id, "amount": amount, "category": category, "date": day}
+        batch = self.db.batch()
+        batch.set(self.db.collection("expenses").document(), expense)
+        SpendCounters.stage(batch, self.db, self.user_id, SpendCounters.deltas(expense))
+        batch.commit()
+
+    def test_add_months_clamps_to_month_end(self):
+        self.assertEqual(add_months(date(2025, 1, 31), 1), date(2025, 2, 28))
+        self.assertEqual(add_months(date(2024, 2, 29), 12), date(2025, 2, 28))
+        self.assertEqual(add_months(date(2025, 11, 15), 3), date(2026, 2, 15))
+
+    def test_windows_follow_start_date(self):
+        window = BudgetEvaluator.window
+        today = date(2025, 5, 20)
+        self.assertEqual(window({"period": "daily", "start_date": "2025-01-01"}, today), (today, today))
+        self.assertEqual(window({"period": "weekly", "start_date": "2025-05-01"}, today),
+                         (date(2025, 5, 15), date(2025, 5, 21)))
+        self.assertEqual(window({"period": "monthly", "start_date": "2025-01-25"}, today),
+                         (date(2025, 4, 25), date(2025, 5, 24)))
+        self.assertEqual(window({"period": "monthly", "start_date": "2025-01-20"}, today),
+                         (date(2025, 5, 20), date(2025, 6, 19)))
+        self.assertEqual(window({"period": "yearly", "start_date": "2024-06-01"}, today),
+                         (date(2024, 6, 1), date(2025, 5, 31)))
+        # Not started yet: the first window; no start date: the calendar period
+        self.assertEqual(window({"period": "weekly", "start_date": "2025-06-02"}, today),
+                         (date(2025, 6, 2), date(2025, 6, 8)))
+        self.assertEqual(window({"period": "monthly", "start_date": None}, today),
+                         (date(2025, 5, 1), date(2025, 5, 31)))
+
+    def test_evaluate_uses_each_budget_window(self):
+        self.add(40, "Food", "2025-04-26")
+        self.add(30, "Food", "2025-05-10")
+        self.add(25.5, "Transport", "2025-05-19")
+        self.add(99, "Food", "2025-05-25")  # after the monthly window below
+        budgets = [
+            ("b1", {"amount": 60, "period": "monthly", "category": "Food", "start_date": "2025-01-25"}),
+            ("b2", {"amount": 50, "period": "weekly", "category": "overall", "start_date": "2025-05-01"}),
+            ("b3", {"amount": 100, "period": "yearly", "category": "overall", "start_date": "2025-01-01"}),
+        ]
+
+        statuses = {s["id"]: s for s in BudgetEvaluator.evaluate(self.db, self.user_id, budgets, date(2025, 5, 20))}
+
+        self.assertEqual(statuses["b1"]["spent"], 70)
+        self.assertTrue(statuses["b1"]["exceeded"])
+        self.assertEqual(statuses["b1"]["window_end"], "2025-05-24")
+        self.assertEqual(statuses["b2"]["spent"], 25.5)
+        self.assertEqual(statuses["b2"]["utilization"], 0.51)
+        self.assertEqual(statuses["b3"]["spent"], 194.5)
+        self.assertEqual(statuses["b3"]["remaining"], -94.5)
+
+    def test_cover_uses_whole_months_and_years(self):
+        cover = BudgetEvaluator.cover
+        self.assertEqual(cover(date(2025, 1, 1), date(2025, 12, 31)), [("yearly", date(2025, 1, 1), date(2025, 12, 31))])
+        self.assertEqual(cover(date(2025, 5, 1), date(2025, 5, 31)), [("monthly", date(2025, 5, 1), date(2025, 5, 31))])
+        # Jan 15 (Wed) to Feb 14: days up to Sunday, three ISO weeks, then days
+        self.assertEqual([period for period, _, _ in cover(date(2025, 1, 15), date(2025, 2, 14))],
+                         ["daily"] * 5 + ["weekly"] * 3 + ["daily"] * 5)
+        # A yearly window from June: whole months in between, no daily counters at all
+        periods = [period for period, _, _ in cover(date(2024, 6, 1), date(2025, 5, 31))]
+        self.assertEqual(periods, ["monthly"] * 12)
+        # The buckets tile the range exactly
+        tiles = cover(date(2024, 3, 15), date(2025, 3, 14))
+        self.assertEqual(tiles[0][1], date(2024, 3, 15))
+        self.assertEqual(tiles[-1][2], date(2025, 3, 14))
+        for (_, _, end), (_, start, _) in zip(tiles, tiles[1:]):
+            self.assertEqual((start - end).days, 1)
+
+    def test_evaluate_matches_raw_expenses(self):
+        for day in range(0, 500, 7):
+            self.add(1 + day % 13, "Food" if day % 2 else "Transport", (date(2024, 1, 3) + timedelta(days=day)).isoformat())
+        budgets = [
+            ("b1", {"amount": 10, "period": "yearly", "category": "Food", "start_date": "2024-03-15"}),
+            ("b2", {"amount": 10, "period": "monthly", "category": "overall", "start_date": "2024-01-20"}),
+            ("b3", {"amount": 10, "period": "weekly", "category": "Transport", "start_date": "2024-01-04"}),
+        ]
+        today = date(2025, 2, 10)
+        expenses = [doc.to_dict() for doc in self.db.collection("expenses").stream()]
+        for status in BudgetEvaluator.evaluate(self.db, self.user_id, budgets, today):
+            expected = sum(
+                e["amount"] for e in expenses
+                if status["window_start"] <= e["date"] <= status["window_end"]
+                and status["category"] in ("overall", e["category"])
+            )
+            self.assertEqual(status["spent"], expected, status["id"])
+
+    def test_evaluate_reads_only_budgeted_categories(self):
+        self.add(10, "Food", "2025-05-02")
+        self.add(20, "Transport", "2025-05-02")
+        budgets = [("b1", {"amount": 60, "period": "monthly", "category": "Food"})]
+        with patch.object(SpendCounters, "read", wraps=SpendCounters.read) as mock_read:
+            [status] = BudgetEvaluator.evaluate(self.db, self.user_id, budgets, date(2025, 5, 20))
+        self.assertEqual(status["spent"], 10)
+        mock_read.assert_called_once_with(self.db, self.user_id, {"Food"}, "monthly", date(2025, 5, 1), date(2025, 5, 31))
+
+    def test_evaluate_without_budgets_reads_nothing(self):
+        self.assertEqual(BudgetEvaluator.evaluate(self.db, self.user_id, []), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
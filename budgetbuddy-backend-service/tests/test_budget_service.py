@@ -2,6 +2,8 @@ import unittest
 from unittest.mock import patch, MagicMock
 from flask import Flask
 from services.budget_service import BudgetService
+from services.memory_store import MemoryClient
+from services.spend_counters import SpendCounters
 
 app = Flask(__name__)
 
@@ -105,5 +107,62 @@ class TestBudgetService(unittest.TestCase):
             self.assertEqual(status, 400)
             self.assertIn("No valid fields", response.json["error"])
 
+    @patch("services.budget_service.BudgetService.firebase")
+    def test_get_budgets_paginated_with_projection(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        for i, amount in enumerate([300, 100, 200]):
+            mock_firebase.db.collection("budgets").document(f"b{i}").set(
+                {"user_id": self.user_id, "amount": amount, "category": "Food", "period": "monthly"}
+            )
+
+        with app.app_context():
+            args = {"limit": "2", "order_by": "-amount", "fields": "category"}
+            response, status = BudgetService.get_budgets(self.token, args)
+            self.assertEqual(status, 200)
+            self.assertEqual(response.json, [
+                {"id": "b0", "category": "Food", "amount": 300},
+                {"id": "b2", "category": "Food", "amount": 200},
+            ])
+            cursor = response.headers["X-Next-Cursor"]
+
+            response, status = BudgetService.get_budgets(self.token, {**args, "cursor": cursor})
+            self.assertEqual([budget["id"] for budget in response.json], ["b1"])
+            self.assertNotIn("X-Next-Cursor", response.headers)
+
+    @patch("services.budget_service.BudgetService.firebase")
+    def test_get_budgets_invalid_list_params(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        with app.app_context():
+            for args in ({"limit": "0"}, {"order_by": "user_id"}, {"fields": "secret"}, {"cursor": "not-a-cursor"}):
+                response, status = BudgetService.get_budgets(self.token, args)
+                self.assertEqual(status, 400)
+
+    @patch("services.budget_service.BudgetService.firebase")
+    def test_budget_status_reports_each_budget(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        db = mock_firebase.db = MemoryClient()
+        db.collection("budgets").document("b1").set({"user_id": self.user_id, **self.budget_data})
+        batch = db.batch()
+        SpendCounters.stage(batch, db, self.user_id, SpendCounters.deltas({"amount": 125, "category": "Food", "date": "2025-05-03"}))
+        batch.commit()
+        with app.app_context():
+            response, status = BudgetService.budget_status(self.token, {"date": "2025-05-20"})
+        self.assertEqual(status, 200)
+        self.assertEqual(response.json["as_of"], "2025-05-20")
+        [budget] = response.json["budgets"]
+        self.assertEqual(budget["id"], "b1")
+        self.assertEqual(budget["spent"], 125)
+        self.assertEqual(budget["utilization"], 0.25)
+        self.assertFalse(budget["exceeded"])
+
+    @patch("services.budget_service.BudgetService.firebase")
+    def test_budget_status_invalid_date(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        with app.app_context():
+            response, status = BudgetService.budget_status(self.token, {"date": "20-05-2025"})
+        self.assertEqual(status, 400)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from datetime import date
+from services.category_rollups import CategoryRollups
+from services.memory_store import MemoryClient
+from services.spend_counters import SpendCounters
+from services.sqlite_store import SQLiteClient
+
+
+class TestCategoryRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MemoryClient()
+        self.user_id = "user123"
+
+    def write(self, expense_id, old=None, new=None):
+        """Apply an add (new only), edit (old and new) or delete (old only) with its rollup increments."""
+        ref = self.db.collection("expenses").document(expense_id)
+        batch = self.db.batch()
+        if new is None:
+            batch.delete(ref)
+        else:
+            batch.set(ref, {"user_id": self.user_id, **new})
+        deltas = SpendCounters.combine(
+            SpendCounters.deltas(old or {}, sign=-1),
+            SpendCounters.deltas(new or {}),
+        )
+        CategoryRollups.stage(batch, self.db, self.user_id, deltas)
+        batch.commit()
+
+    def test_writes_maintain_monthly_and_weekly_rollups(self):
+        for db in (self.db, SQLiteClient(":memory:")):
+            self.db = db
+            food = {"amount": 10.5, "category": "Food", "date": "2025-05-01"}
+            self.write("e1", new=food)
+            self.write("e2", new={"amount": 4, "category": "Food/Drinks", "date": "2025-05-09"})
+            self.write("e3", new={"amount": 7, "category": "Transport", "date": "2025-04-30"})
+            self.write("e1", old=food, new={**food, "category": "Housing"})
+            self.write("e3", old={"amount": 7, "category": "Transport", "date": "2025-04-30"})
+
+            self.assertEqual(CategoryRollups.read(db, self.user_id, "monthly", date(2025, 5, 20)), {"Housing": 10.5, "Food/Drinks": 4.0})
+            self.assertEqual(CategoryRollups.read(db, self.user_id, "weekly", date(2025, 5, 2)), {"Housing": 10.5})
+            self.assertEqual(CategoryRollups.read(db, self.user_id, "monthly", date(2025, 4, 1)), {})
+            self.assertEqual(CategoryRollups.history(db, self.user_id, "monthly"), {"2025-05": {"Housing": 10.5, "Food/Drinks": 4.0}})
+            self.assertEqual(CategoryRollups.check(db, self.user_id), [])
+
+    def test_check_finds_drift_and_rebuild_repairs_it(self):
+        self.write("e1", new={"amount": 40, "category": "Food", "date": "2025-05-01"})
+        # Drift: an expense written without its rollups, and a stale rollup
+        self.db.collection("expenses").add({"user_id": self.user_id, "amount": 2, "category": "Food", "date": "2025-05-02"})
+        self.db.collection("rollups").document(f"{self.user_id}_monthly_2024-01").set(
+            {"user_id": self.user_id, "period": "monthly", "bucket": "2024-01", "total_cents": 100, "categories": {"Food": 100}})
+        self.db.collection("rollups").document("someone_else_monthly_2025-05").set(
+            {"user_id": "someone_else", "period": "monthly", "bucket": "2025-05", "total_cents": 5})
+
+        mismatches = CategoryRollups.check(self.db, self.user_id)
+        self.assertEqual({m["id"] for m in mismatches}, {
+            f"{self.user_id}_monthly_2025-05", f"{self.user_id}_weekly_2025-W18", f"{self.user_id}_monthly_2024-01",
+        })
+
+        self.assertEqual(CategoryRollups.rebuild(self.db, self.user_id), 2)
+        self.assertEqual(CategoryRollups.check(self.db, self.user_id), [])
+        self.assertEqual(CategoryRollups.read(self.db, self.user_id, "monthly", date(2025, 5, 1)), {"Food": 42.0})
+        self.assertTrue(self.db.collection("rollups").document("someone_else_monthly_2025-05").get().exists)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from utils.classifier_service import ClassifierClient, ClassifierServer
+from utils.expense_classifier import ExpenseClassifier
+
+
+def fake_classify_many(descriptions):
+    return [f"cat:{d}" for d in descriptions]
+
+
+class TestClassifierService(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "classifier.sock")
+        patcher = patch.object(ExpenseClassifier, "classify_many", side_effect=fake_classify_many)
+        self.classify_many = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start_server(self, **kwargs):
+        server = ClassifierServer(self.path, **kwargs)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        socket_path = patch.object(ClassifierClient, "SOCKET_PATH", self.path)
+        socket_path.start()
+        self.addCleanup(socket_path.stop)
+        return server
+
+    def test_client_classifies_through_server(self):
+        self.start_server()
+        self.assertEqual(ClassifierClient.classify("uber"), "cat:uber")
+        self.assertEqual(ClassifierClient.classify_many(["rent", "netflix"]), ["cat:rent", "cat:netflix"])
+        self.assertEqual(ClassifierClient.classify_many([]), [])
+        self.assertEqual(self.classify_many.call_count, 2)
+
+    def test_concurrent_requests_are_batched(self):
+        server = self.start_server(batch_window=0.2)
+        results = {}
+
+        def classify(i):
+            results[i] = ClassifierClient.classify_many([f"d{i}", f"e{i}"])
+
+        threads = [threading.Thread(target=classify, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {i: [f"cat:d{i}", f"cat:e{i}"] for i in range(8)})
+        self.assertLess(server.batches, 8)
+
+    @patch("builtins.print")
+    def test_falls_back_in_process_when_server_is_unreachable(self, mock_print):
+        with patch.object(ClassifierClient, "SOCKET_PATH", self.path), \
+                patch.object(ExpenseClassifier, "classify", return_value="Food") as mock_classify:
+            self.assertEqual(ClassifierClient.classify("swiggy"), "Food")
+            self.assertEqual(ClassifierClient.classify_many(["uber"]), ["cat:uber"])
+        mock_classify.assert_called_once_with("swiggy")
+        self.assertIn("[Classifier Client Error]", mock_print.call_args[0][0])
+
+    @patch("builtins.print")
+    def test_falls_back_in_process_on_server_error(self, mock_print):
+        self.start_server()
+        self.classify_many.side_effect = [RuntimeError("model failed"), ["cat:uber"]]
+        self.assertEqual(ClassifierClient.classify_many(["uber"]), ["cat:uber"])
+        self.assertEqual(self.classify_many.call_count, 2)
+
+    def test_without_socket_classifies_in_process(self):
+        with patch.object(ClassifierClient, "SOCKET_PATH", None):
+            self.assertEqual(ClassifierClient.classify_many(["uber"]), ["cat:uber"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,29 @@
+import gzip
+import io
+import json
 import unittest
 from unittest.mock import patch, MagicMock
 from flask import Flask
+from werkzeug.datastructures import FileStorage
 from services.data_service import DataService
+from services.memory_store import MemoryClient
+from utils.columnar_export import MISSING_AMOUNT
+from services.spend_counters import SpendCounters
+from datetime import date
 
 app = Flask(__name__)
 
+
+def upload(filename, content):
+    return FileStorage(stream=io.BytesIO(content), filename=filename)
+
+
+def spent(db, uid, category, period, day):
+    """Amount in the ``category`` counter for the ``period`` bucket containing ``day``."""
+    totals = SpendCounters.read(db, uid, [category], period, day, day)
+    return totals.get((category, SpendCounters.bucket(period, day)), 0) / 100
+
+
 class TestDataService(unittest.TestCase):
 
     def setUp(self):
@@ -31,9 +50,7 @@ class TestDataService(unittest.TestCase):
     @patch("services.data_service.DataService.firebase")
     def test_import_expenses_unsupported_file(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        file = MagicMock()
-        file.filename = "expenses.txt"
-        file.read.return_value = b"irrelevant"
+        file = upload("expenses.txt", b"irrelevant")
         with app.app_context():
             response, status = DataService.import_expenses(self.token, file)
             self.assertEqual(status, 400)
@@ -42,9 +59,7 @@ class TestDataService(unittest.TestCase):
     @patch("services.data_service.DataService.firebase")
     def test_import_expenses_invalid_json(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        file = MagicMock()
-        file.filename = "expenses.json"
-        file.read.return_value = b'{"invalid": [}'  # malformed JSON
+        file = upload("expenses.json", b'{"invalid": [}')  # malformed JSON
         with app.app_context():
             response, status = DataService.import_expenses(self.token, file)
             self.assertEqual(status, 400)
@@ -53,9 +68,7 @@ class TestDataService(unittest.TestCase):
     @patch("services.data_service.DataService.firebase")
     def test_import_expenses_csv_missing_column(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        file = MagicMock()
-        file.filename = "expenses.csv"
-        file.read.return_value = b"amount,date,method\n100,2025-05-01,Cash"
+        file = upload("expenses.csv", b"amount,date,method\n100,2025-05-01,Cash")
         with app.app_context():
             response, status = DataService.import_expenses(self.token, file)
             self.assertEqual(status, 400)
@@ -64,25 +77,22 @@ class TestDataService(unittest.TestCase):
     @patch("services.data_service.DataService.firebase")
     def test_import_expenses_csv_invalid_amount(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        file = MagicMock()
-        file.filename = "expenses.csv"
-        file.read.return_value = b"amount,category,date,method,notes\nabc,Food,2025-05-01,Cash,Lunch"
-        with app.app_context():
-            response, status = DataService.import_expenses(self.token, file)
-            self.assertEqual(status, 400)
-            self.assertIn("invalid amount field", response.json["error"])
+        for amount in (b"abc", b"inf", b"NaN"):
+            file = upload("expenses.csv", b"amount,category,date,method,notes\n" + amount + b",Food,2025-05-01,Cash,Lunch")
+            with app.app_context():
+                response, status = DataService.import_expenses(self.token, file)
+                self.assertEqual(status, 400)
+                self.assertIn("invalid amount field", response.json["error"])
 
     @patch("services.data_service.DataService.firebase")
     def test_import_expenses_valid_json(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
         mock_firebase.db.collection.return_value.document.return_value.set.return_value = None
-        file = MagicMock()
-        file.filename = "expenses.json"
-        file.read.return_value = b'''
+        file = upload("expenses.json", b'''
         [
             {"amount": 100, "category": "Food", "date": "2025-05-01", "method": "Cash"}
         ]
-        '''
+        ''')
         with app.app_context():
             response, status = DataService.import_expenses(self.token, file)
             self.assertEqual(status, 201)
@@ -92,9 +102,8 @@ class TestDataService(unittest.TestCase):
     def test_import_expenses_valid_csv(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
         mock_firebase.db.collection.return_value.document.return_value.set.return_value = None
-        file = MagicMock()
-        file.filename = "expenses.csv"
-        file.read.return_value = (
+        file = upload(
+            "expenses.csv",
             b"amount,category,date,method,notes\n"
             b"100,Food,2025-05-01,Cash,Lunch\n"
         )
@@ -103,6 +112,111 @@ class TestDataService(unittest.TestCase):
             self.assertEqual(status, 201)
             self.assertIn("message", response.json)
 
+    @patch("services.data_service.DataService.firebase")
+    def test_import_expenses_csv_writes_each_row_once_in_batches(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        rows = "".join(f"{i},Food,2025-05-01,Cash,Row {i}\n" for i in range(1201))
+        file = upload("expenses.csv", ("amount,category,date,method,notes\n" + rows).encode())
+        with app.app_context():
+            response, status = DataService.import_expenses(self.token, file)
+            self.assertEqual(status, 201)
+            self.assertEqual(response.json["message"], "1201 expenses imported")
+            # Each 500-write batch holds 489 expenses, their 8 spend counters and 2 rollups, and the data version
+            self.assertEqual([c["written"] for c in response.json["chunks"]], [489, 489, 223])
+        rollup = mock_firebase.db.collection("rollups").document(f"{self.user_id}_monthly_2025-05").get().to_dict()
+        self.assertEqual(rollup["categories"], {"Food": sum(range(1201)) * 100})
+        stored = list(mock_firebase.db.collection("expenses").where("user_id", "==", self.user_id).stream())
+        self.assertEqual(len(stored), 1201)
+        self.assertEqual(spent(mock_firebase.db, self.user_id, "Food", "monthly", date(2025, 5, 1)), 720600)
+
+    @patch("services.data_service.ClassifierClient.classify_many", side_effect=lambda notes: ["Transport"] * len(notes))
+    @patch("services.data_service.DataService.firebase")
+    def test_import_classifies_rows_without_category(self, mock_firebase, mock_classify_many):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        file = upload("expenses.ndjson", b"\n".join([
+            b'{"amount": 10, "date": "2025-05-01", "method": "Cash", "notes": "Uber home"}',
+            b'{"amount": 20, "category": "Food", "date": "2025-05-01", "method": "Cash"}',
+            b'{"amount": 30, "category": "", "date": "2025-05-02", "method": "Card", "notes": "Bus pass"}',
+        ]))
+        with app.app_context():
+            response, status = DataService.import_expenses(self.token, file)
+        self.assertEqual(status, 201)
+        mock_classify_many.assert_called_once_with(["Uber home", "Bus pass"])
+        categories = sorted(doc.to_dict()["category"] for doc in mock_firebase.db.collection("expenses").stream())
+        self.assertEqual(categories, ["Food", "Transport", "Transport"])
+
+    @patch("services.data_service.DataService.firebase")
+    def test_import_expenses_reports_failed_chunks(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db.batch.return_value.commit.side_effect = Exception("deadline exceeded")
+        file = upload("expenses.json", b'[{"amount": 100, "category": "Food", "date": "2025-05-01", "method": "Cash"}]')
+        with app.app_context():
+            response, status = DataService.import_expenses(self.token, file)
+            self.assertEqual(status, 500)
+            self.assertEqual(response.json["chunks"][0]["status"], "failed")
+
+    @patch("utils.expense_import.ExpenseImportParser.READ_SIZE", 7)
+    @patch("services.data_service.DataService.firebase")
+    def test_import_expenses_streams_json_and_ndjson(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        records = [{"amount": i, "category": "Food", "notes": "caf\u00e9 , ] {"} for i in range(5)]
+        uploads = [
+            upload("expenses.json", json.dumps(records, ensure_ascii=False).encode()),
+            upload("expenses.ndjson", "\n".join(json.dumps(r) for r in records).encode()),
+        ]
+        with app.app_context():
+            for file in uploads:
+                response, status = DataService.import_expenses(self.token, file)
+                self.assertEqual(status, 201)
+                self.assertEqual(response.json["message"], "5 expenses imported")
+        stored = [doc.to_dict() for doc in mock_firebase.db.collection("expenses").stream()]
+        self.assertEqual(len(stored), 10)
+        self.assertTrue(all(doc["notes"] == "caf\u00e9 , ] {" for doc in stored))
+
+    @patch("utils.expense_import.ExpenseImportParser.MAX_LINE_LENGTH", 64)
+    @patch("utils.expense_import.ExpenseImportParser.READ_SIZE", 7)
+    @patch("services.data_service.DataService.firebase")
+    def test_import_expenses_rejects_overlong_lines(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        header = b"amount,category,date,method\n"
+        uploads = [upload("expenses.csv", header + b"1," + b"x" * 1000), upload("expenses.ndjson", b" " * 1000)]
+        with app.app_context():
+            for file in uploads:
+                response, status = DataService.import_expenses(self.token, file)
+                self.assertEqual(status, 400)
+                self.assertIn("at most 64 characters", response.json["error"])
+
+    @patch("services.data_service.DataService.IMPORT_BATCH_SIZE", 2)
+    @patch("services.data_service.DataService.firebase")
+    def test_import_expenses_stops_at_first_invalid_row(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        file = upload("expenses.csv", b"amount,category,date,method\n1,Food,2025-05-01,Cash\n2,Food,2025-05-01,Cash\nx,Food,2025-05-01,Cash\n")
+        with app.app_context():
+            response, status = DataService.import_expenses(self.token, file)
+            self.assertEqual(status, 400)
+            self.assertIn("invalid amount field", response.json["error"])
+            self.assertEqual(response.json["message"], "2 expenses imported")
+
+    @patch("services.data_service.DataService.IMPORT_BATCH_SIZE", 20)
+    @patch("services.data_service.DataService.firebase")
+    def test_import_expenses_rejects_non_string_json_fields(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        good = [json.dumps({"amount": 1, "category": "Food", "date": "2025-05-01"})] * 2
+        for bad in ({"category": 5}, {"category": ["x"]}, {"method": {}}, {"date": 20250501}):
+            row = json.dumps({"amount": 1, "category": "Food", **bad})
+            file = upload("expenses.ndjson", "\n".join(good + [row]).encode())
+            with app.app_context():
+                response, status = DataService.import_expenses(self.token, file)
+            self.assertEqual(status, 400, bad)
+            self.assertIn("must be a string", response.json["error"])
+            self.assertEqual(response.json["message"], "2 expenses imported")
+
     @patch("services.data_service.DataService.firebase")
     def test_export_expenses_csv(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
@@ -124,5 +238,102 @@ class TestDataService(unittest.TestCase):
             self.assertEqual(status, 200)
             self.assertEqual(response.json, [])
 
+    @patch("services.data_service.DataService.firebase")
+    def test_export_expenses_streams_ndjson_gzip(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        consumed = []
+
+        def stream():
+            for i in range(3):
+                consumed.append(i)
+                yield MagicMock(to_dict=lambda i=i: {"user_id": self.user_id, "amount": i, "category": "Food"})
+
+        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = stream()
+        with app.test_request_context():
+            response = DataService.export_expenses(self.token, "ndjson", gzip_output=True)
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+            self.assertEqual(consumed, [])  # nothing is read until the body is iterated
+            body = gzip.decompress(response.get_data())
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row["amount"] for row in rows], [0, 1, 2])
+
+    @patch("services.data_service.DataService.firebase")
+    def test_export_expenses_csv_ignores_extra_fields(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = [MagicMock(to_dict=lambda: {
+            "user_id": self.user_id, "amount": 100, "category": "Food", "date": "2025-05-01", "method": "Cash", "notes": "Lunch"
+        })]
+        with app.test_request_context():
+            response = DataService.export_expenses(self.token, "csv")
+            self.assertEqual(
+                response.get_data(as_text=True).splitlines(),
+                ["amount,category,date,method,notes", "100,Food,2025-05-01,Cash,Lunch"]
+            )
+
+    def _columnar_expenses(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = [
+            MagicMock(to_dict=lambda: {"amount": 12.34, "category": "Food", "date": "1970-01-11", "method": "Cash", "notes": "Lunch"}),
+            MagicMock(to_dict=lambda: {"amount": 5, "category": "Transport", "date": "1970-01-02", "method": "Card"}),
+            MagicMock(to_dict=lambda: {"amount": 1, "category": "Food", "date": "1970-01-01", "method": "Cash"}),
+        ]
+
+    @patch("services.data_service.ColumnarExpenseWriter.ARROW_AVAILABLE", False)
+    @patch("services.data_service.DataService.firebase")
+    def test_export_expenses_columnar_npz_fallback(self, mock_firebase):
+        import numpy as np
+        self._columnar_expenses(mock_firebase)
+        with app.test_request_context():
+            response = DataService.export_expenses(self.token, "columnar")
+            response.direct_passthrough = False
+            columns = np.load(io.BytesIO(response.get_data()))
+        self.assertEqual(columns["date"].dtype, np.int32)
+        self.assertEqual(columns["date"].tolist(), [10, 1, 0])
+        self.assertEqual(columns["amount_cents"].tolist(), [1234, 500, 100])
+        self.assertEqual(columns["category_codes"].tolist(), [0, 1, 0])
+        self.assertEqual(columns["category_values"].tolist(), ["Food", "Transport"])
+        data, offsets = columns["notes_data"].tobytes(), columns["notes_offsets"].tolist()
+        self.assertEqual([data[a:b].decode() for a, b in zip(offsets, offsets[1:])], ["Lunch", "", ""])
+
+    @patch("services.data_service.ColumnarExpenseWriter.ARROW_AVAILABLE", False)
+    @patch("services.data_service.DataService.firebase")
+    def test_export_expenses_columnar_tolerates_bad_amounts_and_long_notes(self, mock_firebase):
+        import numpy as np
+        mock_firebase.verify_user_token.return_value = self.user_id
+        long_note = "é" * 1_000_000
+        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = [
+            MagicMock(to_dict=lambda: {"amount": "n/a", "date": "2025-05-01", "notes": long_note}),
+            MagicMock(to_dict=lambda: {"amount": float("inf"), "date": "2025-05-01", "notes": "x"}),
+        ] + [MagicMock(to_dict=lambda: {"amount": 1, "date": "2025-05-01", "notes": "short"})] * 1000 + [
+            MagicMock(to_dict=lambda: {"amount": None, "date": "2025-05-01"}),
+            MagicMock(to_dict=lambda: {"amount": "", "date": "2025-05-01"}),
+            MagicMock(to_dict=lambda: {"amount": 1e20, "date": "2025-05-01"}),
+            MagicMock(to_dict=lambda: {"amount": -1e20, "date": "2025-05-01"}),
+            MagicMock(to_dict=lambda: {"amount": 0, "date": "2025-05-01"}),
+        ]
+        with app.test_request_context():
+            response = DataService.export_expenses(self.token, "columnar")
+            response.direct_passthrough = False
+            columns = np.load(io.BytesIO(response.get_data()))
+        self.assertEqual(columns["amount_cents"].tolist()[:3], [MISSING_AMOUNT, MISSING_AMOUNT, 100])
+        self.assertEqual(columns["amount_cents"].tolist()[-5:], [MISSING_AMOUNT] * 4 + [0])
+        # Notes cost their own bytes, not rows x the longest note
+        self.assertEqual(columns["notes_data"].nbytes, len(long_note.encode()) + 1 + 5 * 1000)
+
+    @patch("services.data_service.DataService.firebase")
+    def test_export_expenses_columnar_arrow(self, mock_firebase):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        self._columnar_expenses(mock_firebase)
+        with app.test_request_context():
+            response = DataService.export_expenses(self.token, "columnar")
+            response.direct_passthrough = False
+            table = pa.ipc.open_file(pa.BufferReader(response.get_data())).read_all()
+        self.assertEqual(table.column("amount_cents").to_pylist(), [1234, 500, 100])
+        self.assertEqual(str(table.schema.field("date").type), "date32[day]")
+        self.assertEqual(table.column("category").combine_chunks().dictionary.to_pylist(), ["Food", "Transport"])
+
 if __name__ == "__main__":
     unittest.main()
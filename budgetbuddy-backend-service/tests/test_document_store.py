@@ -0,0 +1,182 @@
+import threading
+import unittest
+from datetime import datetime
+from firebase_admin import firestore
+from services.document_store import DESCENDING, DocumentNotFound, run_transaction
+from services.memory_store import MemoryClient
+from services.sqlite_store import SQLiteClient
+
+
+class DocumentStoreCases:
+    """Behaviour every local backend must share with Firestore."""
+
+    def make_client(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.db = self.make_client()
+        expenses = self.db.collection("expenses")
+        expenses.document("e1").set({"user_id": "u1", "amount": 10.0, "category": "Food", "date": "2025-05-01"})
+        expenses.document("e2").set({"user_id": "u1", "amount": 25.0, "category": "Transport", "date": "2025-05-03"})
+        expenses.document("e3").set({"user_id": "u1", "amount": 5.0, "category": "Food", "date": "2025-04-20"})
+        expenses.document("e4").set({"user_id": "u2", "amount": 99.0, "category": "Food", "date": "2025-05-02"})
+
+    def test_document_roundtrip(self):
+        doc = self.db.collection("expenses").document("e1").get()
+        self.assertTrue(doc.exists)
+        self.assertEqual(doc.id, "e1")
+        self.assertEqual(doc.to_dict()["amount"], 10.0)
+        self.assertFalse(self.db.collection("expenses").document("missing").get().exists)
+
+    def test_add_update_delete(self):
+        _, ref = self.db.collection("budgets").add({"user_id": "u1", "amount": 100})
+        ref.update({"amount": 150})
+        self.assertEqual(ref.get().to_dict(), {"user_id": "u1", "amount": 150})
+        ref.delete()
+        self.assertFalse(ref.get().exists)
+        with self.assertRaises(DocumentNotFound):
+            ref.update({"amount": 1})
+
+    def test_set_merge(self):
+        ref = self.db.collection("notification_preferences").document("u1")
+        ref.set({"email_enabled": True})
+        ref.set({"sms_enabled": True}, merge=True)
+        self.assertEqual(ref.get().to_dict(), {"email_enabled": True, "sms_enabled": True})
+
+    def test_set_merge_nested_maps_and_increments(self):
+        ref = self.db.collection("rollups").document("u1_monthly_2025-05")
+        ref.set({"total_cents": firestore.Increment(500), "categories": {"Food": firestore.Increment(500)}}, merge=True)
+        ref.set({"total_cents": firestore.Increment(250), "categories": {"Transport": firestore.Increment(300), "Food": firestore.Increment(-50)}}, merge=True)
+        self.assertEqual(ref.get().to_dict(), {"total_cents": 750, "categories": {"Food": 450, "Transport": 300}})
+
+    def test_equality_filters(self):
+        docs = self.db.collection("expenses").where("user_id", "==", "u1").where("category", "==", "Food").stream()
+        self.assertEqual(sorted(doc.id for doc in docs), ["e1", "e3"])
+
+    def test_range_filter_order_and_limit(self):
+        query = self.db.collection("expenses") \
+            .where("user_id", "==", "u1") \
+            .where("date", ">=", "2025-05-01") \
+            .order_by("date", direction=DESCENDING)
+        self.assertEqual([doc.id for doc in query.stream()], ["e2", "e1"])
+        self.assertEqual([doc.id for doc in query.limit(1).stream()], ["e2"])
+
+    def test_cursor_pagination_and_projection(self):
+        query = self.db.collection("expenses") \
+            .where("user_id", "==", "u1") \
+            .order_by("category") \
+            .order_by("__name__") \
+            .select(["amount"]) \
+            .limit(2)
+        first = list(query.stream())
+        self.assertEqual([doc.id for doc in first], ["e1", "e3"])
+        self.assertEqual(first[0].to_dict(), {"amount": 10.0})
+        second = list(query.start_after(["Food", "e3"]).stream())
+        self.assertEqual([doc.id for doc in second], ["e2"])
+        self.assertEqual(list(query.start_after(["Transport", "e2"]).stream()), [])
+
+    def test_order_keeps_nulls_first_and_drops_missing_fields(self):
+        expenses = self.db.collection("expenses")
+        expenses.document("e5").set({"user_id": "u1", "amount": None, "category": "Food", "date": "2025-05-04"})
+        expenses.document("e6").set({"user_id": "u1", "category": "Food", "date": "2025-05-05"})
+        expenses.document("e7").set({"user_id": "u1", "amount": "n/a", "category": "Food", "date": "2025-05-06"})
+        query = self.db.collection("expenses").where("user_id", "==", "u1").order_by("amount")
+        self.assertEqual([doc.id for doc in query.stream()], ["e5", "e3", "e1", "e2", "e7"])
+        self.assertEqual([doc.id for doc in query.limit(2).stream()], ["e5", "e3"])
+        self.assertEqual([doc.id for doc in query.start_after([None]).limit(2).stream()], ["e3", "e1"])
+        self.assertEqual([doc.id for doc in query.start_after([25.0]).stream()], ["e7"])
+        descending = self.db.collection("expenses").where("user_id", "==", "u1").order_by("amount", direction=DESCENDING)
+        self.assertEqual([doc.id for doc in descending.stream()], ["e7", "e2", "e1", "e3", "e5"])
+
+    def test_range_filters_only_match_the_same_type(self):
+        self.db.collection("expenses").document("e5").set({"user_id": "u1", "amount": "abc", "date": 20250501})
+        query = self.db.collection("expenses").where("user_id", "==", "u1")
+        self.assertEqual(sorted(doc.id for doc in query.where("amount", ">", 5).stream()), ["e1", "e2"])
+        self.assertEqual([doc.id for doc in query.where("amount", ">=", "a").stream()], ["e5"])
+        self.assertEqual([doc.id for doc in query.where("date", "<", "2025-05-02").order_by("date").stream()], ["e3", "e1"])
+
+    def test_index_is_maintained_on_update(self):
+        self.db.collection("expenses").document("e1").update({"category": "Housing"})
+        docs = self.db.collection("expenses").where("category", "==", "Food").where("user_id", "==", "u1").stream()
+        self.assertEqual([doc.id for doc in docs], ["e3"])
+
+    def test_write_batch_is_all_or_nothing(self):
+        expenses = self.db.collection("expenses")
+        batch = self.db.batch()
+        batch.set(expenses.document("e5"), {"user_id": "u3", "amount": 1.0})
+        batch.update(expenses.document("missing"), {"amount": 2.0})
+        with self.assertRaises(DocumentNotFound):
+            batch.commit()
+        self.assertFalse(expenses.document("e5").get().exists)
+
+        batch = self.db.batch()
+        batch.set(expenses.document("e5"), {"user_id": "u3", "amount": 1.0})
+        batch.delete(expenses.document("e4"))
+        batch.commit()
+        self.assertTrue(expenses.document("e5").get().exists)
+        self.assertFalse(expenses.document("e4").get().exists)
+
+    def test_transactions_serialize_read_modify_write(self):
+        counter = self.db.collection("counters").document("c1")
+        counter.set({"value": 0})
+
+        def bump(transaction):
+            value = counter.get(transaction=transaction).to_dict()["value"]
+            transaction.update(counter, {"value": value + 1})
+
+        threads = [threading.Thread(target=lambda: [run_transaction(self.db, bump) for _ in range(25)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.get().to_dict()["value"], 200)
+
+    def test_failed_transaction_writes_nothing(self):
+        expenses = self.db.collection("expenses")
+
+        def fail(transaction):
+            transaction.delete(expenses.document("e1"))
+            raise RuntimeError("abort")
+
+        with self.assertRaises(RuntimeError):
+            run_transaction(self.db, fail)
+        self.assertTrue(expenses.document("e1").get().exists)
+
+    def test_subcollections_and_datetimes(self):
+        transactions = self.db.collection("users").document("u1").collection("transactions")
+        transactions.document("t1").set({"isRecurring": True, "nextPaymentDate": datetime(2025, 5, 1)})
+        docs = list(transactions.where("isRecurring", "==", True).stream())
+        self.assertEqual(len(docs), 1)
+        self.assertEqual(docs[0].to_dict()["nextPaymentDate"], datetime(2025, 5, 1))
+        self.assertEqual(list(self.db.collection("transactions").stream()), [])
+
+
+class TestMemoryClient(DocumentStoreCases, unittest.TestCase):
+
+    def make_client(self):
+        return MemoryClient()
+
+
+class TestSQLiteClient(DocumentStoreCases, unittest.TestCase):
+
+    def make_client(self):
+        return SQLiteClient(":memory:")
+
+    def test_user_queries_use_index(self):
+        sql, params, residual, _ = self.db._compile(
+            "expenses", (("user_id", "==", "u1"), ("date", ">=", "2025-05-01")), ()
+        )
+        plan = " ".join(row[-1] for row in self.db._conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        self.assertIn("idx_documents_user_id_date", plan)
+        self.assertEqual(residual, [])
+
+    def test_ordered_user_queries_read_in_index_order(self):
+        for filters in ((("user_id", "==", "u1"),), (("user_id", "==", "u1"), ("date", ">=", "2025-05-01"))):
+            sql, params, _, _ = self.db._compile("expenses", filters, (("date", DESCENDING),))
+            plan = " ".join(row[-1] for row in self.db._conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+            self.assertIn("idx_documents_user_id_date", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
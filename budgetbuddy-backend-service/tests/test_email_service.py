@@ -1,24 +1,35 @@
+import smtplib
+import socket
 import unittest
 from unittest.mock import patch, MagicMock
-from services.email_service import EmailService
+from services.email_service import EmailService, SMTPConnectionPool
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # optional: only needed for the local-server test
+    Controller = None
+
 
 class TestEmailService(unittest.TestCase):
 
+    def setUp(self):
+        EmailService.close_pool()
+
+    def tearDown(self):
+        EmailService.close_pool()
+
     @patch("services.email_service.smtplib.SMTP")
     def test_send_budget_alert_success(self, mock_smtp):
-        mock_server = MagicMock()
-        mock_smtp.return_value.__enter__.return_value = mock_server
-        EmailService.send_budget_alert("user@example.com", 1200, 1000)
+        mock_server = mock_smtp.return_value
+        self.assertTrue(EmailService.send_budget_alert("user@example.com", 1200, 1000))
         mock_server.send_message.assert_called_once()
 
     @patch("services.email_service.smtplib.SMTP")
     def test_send_custom_notification_success(self, mock_smtp):
-        mock_server = MagicMock()
-        mock_smtp.return_value.__enter__.return_value = mock_server
+        mock_server = mock_smtp.return_value
         EmailService.send_custom_notification("user@example.com", "Reminder", "This is a reminder.")
         mock_server.send_message.assert_called_once()
 
@@ -26,7 +37,7 @@ class TestEmailService(unittest.TestCase):
     @patch("services.email_service.smtplib.SMTP", side_effect=Exception("SMTP error"))
     def test_send_budget_alert_failure(self, mock_smtp, mock_print):
         try:
-            EmailService.send_budget_alert("user@example.com", 1200, 1000)
+            self.assertFalse(EmailService.send_budget_alert("user@example.com", 1200, 1000))
         except Exception:
             self.fail("send_budget_alert() raised an exception unexpectedly!")
 
@@ -38,5 +49,78 @@ class TestEmailService(unittest.TestCase):
         except Exception:
             self.fail("send_custom_notification() raised an exception unexpectedly!")
 
+    @patch("services.email_service.smtplib.SMTP")
+    def test_session_is_reused_across_messages(self, mock_smtp):
+        EmailService.send_budget_alert("a@example.com", 1200, 1000)
+        EmailService.send_custom_notification("b@example.com", "Reminder", "Body")
+        mock_smtp.assert_called_once()
+        mock_smtp.return_value.login.assert_called_once()
+        self.assertEqual(mock_smtp.return_value.send_message.call_count, 2)
+
+    @patch("services.email_service.smtplib.SMTP")
+    def test_connection_is_replaced_after_message_cap(self, mock_smtp):
+        mock_smtp.side_effect = lambda *args, **kwargs: MagicMock()
+        pool = SMTPConnectionPool("localhost", 25, max_messages=2)
+        for _ in range(5):
+            pool.send(EmailService._message("a@example.com", "Subject", "Body"))
+        self.assertEqual(pool.connections_opened, 3)
+
+    @patch("services.email_service.smtplib.SMTP")
+    def test_dropped_session_is_reconnected(self, mock_smtp):
+        dead, fresh = MagicMock(), MagicMock()
+        dead.send_message.side_effect = smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        mock_smtp.side_effect = [dead, fresh]
+        pool = SMTPConnectionPool("localhost", 25)
+        pool.send(EmailService._message("a@example.com", "Subject", "Body"))
+        fresh.send_message.assert_called_once()
+        self.assertEqual(pool.connections_opened, 2)
+
+    @patch("services.email_service.smtplib.SMTP")
+    def test_send_many_reports_per_message_results(self, mock_smtp):
+        mock_smtp.return_value.send_message.side_effect = [
+            None, smtplib.SMTPRecipientsRefused({"bad@example.com": (550, b"No such user")}), None,
+        ]
+        results = EmailService.send_many([
+            ("a@example.com", "Reminder", "Pay rent"),
+            ("bad@example.com", "Reminder", "Pay rent"),
+            ("c@example.com", "Reminder", "Pay rent"),
+        ])
+        self.assertEqual([r["status"] for r in results], ["sent", "failed", "sent"])
+        self.assertIn("bad@example.com", results[1]["error"])
+        mock_smtp.assert_called_once()
+
+    @unittest.skipIf(Controller is None, "aiosmtpd is not installed")
+    def test_send_many_against_local_server(self):
+        handler = _Inbox()
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        pool = SMTPConnectionPool("127.0.0.1", port, starttls=False, max_messages=10)
+        try:
+            with patch.object(EmailService, "_pool", pool):
+                results = EmailService.send_many(
+                    [(f"user{i}@example.com", "Reminder", f"Message {i}") for i in range(25)]
+                )
+            pool.close()
+        finally:
+            controller.stop()
+        self.assertEqual([r["status"] for r in results], ["sent"] * 25)
+        self.assertEqual(len(handler.envelopes), 25)
+        self.assertEqual(handler.envelopes[-1].rcpt_tos, ["user24@example.com"])
+        self.assertEqual(pool.connections_opened, 3)
+
+
+class _Inbox:
+
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 Message accepted for delivery"
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,308 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+from unittest.mock import patch, MagicMock
+from utils.classification_cache import ClassificationCache
+from utils.expense_classifier import ExpenseClassifier
+from utils.keyword_matcher import KeywordMatcher
+from utils.vector_table import VectorTable
+
+
+class FakeDoc:
+    """Bag-of-words stand-in for a spaCy doc: one vector dimension per known word."""
+    created = 0
+    VOCAB = sorted(set(" ".join([
+        "taxi uber bus fuel cab commute restaurant groceries snacks food delivery",
+        "netflix movies music games shows rent loan emi mortgage utilities gym doctor pharmacy office",
+    ]).split()))
+
+    def __init__(self, text):
+        FakeDoc.created += 1
+        words = text.lower().split()
+        self.vector = np.array([words.count(word) for word in self.VOCAB], dtype=np.float32)
+
+    def similarity(self, other):
+        norms = np.linalg.norm(self.vector) * np.linalg.norm(other.vector)
+        return float(self.vector @ other.vector / norms) if norms else 0.0
+
+
+class FakeVocab:
+    vectors_length = len(FakeDoc.VOCAB)
+
+    def has_vector(self, word):
+        return word in FakeDoc.VOCAB
+
+    def get_vector(self, word):
+        return FakeDoc(word).vector
+
+
+class FakeNLP:
+    pipe_names = ["tok2vec", "tagger", "parser", "ner"]
+    meta = {"lang": "en", "name": "core_web_md"}
+    vocab = FakeVocab()
+
+    def __init__(self):
+        self.pipe_calls = []
+
+    def __call__(self, text):
+        return FakeDoc(text)
+
+    def pipe(self, texts, batch_size, n_process, disable):
+        texts = list(texts)
+        self.pipe_calls.append({"texts": texts, "batch_size": batch_size, "n_process": n_process, "disable": disable})
+        return (FakeDoc(text) for text in texts)
+
+
+class TestExpenseClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.spacy = MagicMock()
+        self.nlp = self.spacy.load.return_value = FakeNLP()
+        patcher = patch.dict(sys.modules, {"spacy": self.spacy})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Exercise the model path; the keyword fast path has its own tests
+        self.keyword_table = ExpenseClassifier.keyword_table
+        keywords = patch.object(ExpenseClassifier, "keyword_table", classmethod(lambda cls: {}))
+        keywords.start()
+        self.addCleanup(keywords.stop)
+        self.addCleanup(self.reset)
+        self.reset()
+
+    @staticmethod
+    def reset():
+        ExpenseClassifier._nlp = None
+        ExpenseClassifier._reference_source = None
+        ExpenseClassifier._cache = None
+        ExpenseClassifier._cache_source = None
+        ExpenseClassifier._matcher = None
+        ExpenseClassifier.reset_path_stats()
+        ExpenseClassifier.load_stats = None
+        ExpenseClassifier._centroid_matrix = None
+
+    def test_import_does_not_load_model(self):
+        self.assertFalse(ExpenseClassifier.loaded())
+        self.spacy.load.assert_not_called()
+
+    def test_model_loads_once_on_first_classify(self):
+        self.assertEqual(ExpenseClassifier.classify("uber to office"), "Transport")
+        self.assertEqual(ExpenseClassifier.classify("netflix subscription"), "Entertainment")
+        self.spacy.load.assert_called_once_with(ExpenseClassifier.MODEL_NAME)
+        self.assertTrue(ExpenseClassifier.loaded())
+
+    @patch("builtins.print")
+    def test_preload_reports_load_time_and_memory(self, mock_print):
+        stats = ExpenseClassifier.preload()
+        self.assertEqual(stats["model"], ExpenseClassifier.MODEL_NAME)
+        self.assertGreaterEqual(stats["load_seconds"], 0)
+        self.assertGreater(stats["rss_mb"], 0)
+        mock_print.assert_called_once()
+        ExpenseClassifier.classify("rent")
+        self.spacy.load.assert_called_once()
+
+
+    def test_repeated_descriptions_are_served_from_cache(self):
+        self.assertEqual(ExpenseClassifier.classify("Uber  to office"), "Transport")
+        parsed = FakeDoc.created
+        self.assertEqual(ExpenseClassifier.classify("uber to office "), "Transport")
+        self.assertEqual(FakeDoc.created, parsed)
+        stats = ExpenseClassifier.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_changing_category_docs_invalidates_cache(self):
+        before = ExpenseClassifier.classify("gym membership")
+        self.assertNotEqual(before, "Health")
+        with patch.dict(ExpenseClassifier.CATEGORY_DOCS, {"Health": "gym doctor pharmacy"}):
+            self.assertEqual(ExpenseClassifier.classify("gym membership"), "Health")
+        self.assertEqual(ExpenseClassifier.classify("gym membership"), before)
+
+    def test_persistent_tier_survives_restart_without_loading_model(self):
+        path = os.path.join(tempfile.mkdtemp(), "classifications.db")
+        with patch.object(ExpenseClassifier, "CACHE_PATH", path):
+            self.assertEqual(ExpenseClassifier.classify("netflix"), "Entertainment")
+            self.reset()  # a new process: empty LRU, no model
+            self.assertEqual(ExpenseClassifier.classify("Netflix"), "Entertainment")
+        self.assertFalse(ExpenseClassifier.loaded())
+        self.assertEqual(ExpenseClassifier.cache_stats()["persistent_hits"], 1)
+
+
+    def test_vectorised_scores_match_pairwise_similarity(self):
+        descriptions = ["uber to office", "rent and utilities", "netflix movies", "snacks", "nothing known", "bus fuel"]
+        categories, confidences = ExpenseClassifier.score_vectors([FakeDoc(d).vector for d in descriptions])
+        for description, category, confidence in zip(descriptions, categories, confidences):
+            doc = FakeDoc(description)
+            pairwise = {cat: doc.similarity(FakeDoc(text)) for cat, text in ExpenseClassifier.CATEGORY_DOCS.items()}
+            expected = max(pairwise, key=pairwise.get)  # first maximum, like the old loop
+            self.assertEqual(category, expected)
+            self.assertAlmostEqual(float(confidence), pairwise[expected], places=5)
+
+    def test_classify_with_confidence(self):
+        category, confidence = ExpenseClassifier.classify_with_confidence("uber cab")
+        self.assertEqual(category, "Transport")
+        self.assertGreater(confidence, 0.5)
+        self.assertEqual(ExpenseClassifier.classify_with_confidence("nothing known"), ("Transport", 0.0))
+
+
+    def test_keywords_are_matched_without_loading_model(self):
+        with patch.object(ExpenseClassifier, "keyword_table", self.keyword_table), \
+                patch.dict(ExpenseClassifier.KEYWORDS, {"food delivery": "Food", "swiggy": "Food"}):
+            self.assertEqual(ExpenseClassifier.classify("Uber to office"), "Transport")
+            self.assertEqual(ExpenseClassifier.classify("Swiggy order"), "Food")
+            self.assertEqual(ExpenseClassifier.classify("office snacks"), "Food")
+            self.assertFalse(ExpenseClassifier.loaded())
+            self.assertEqual(ExpenseClassifier.classify("dentist"), "Transport")  # falls through to vectors
+            self.assertEqual(ExpenseClassifier.classify("dentist"), "Transport")
+
+        stats = ExpenseClassifier.path_stats()
+        self.assertEqual(stats["counts"], {"keyword": 3, "cache": 1, "model": 1})
+        self.assertEqual(stats["shares"]["keyword"], 0.6)
+
+    def test_keyword_table_file_overrides_seed_words(self):
+        path = os.path.join(tempfile.mkdtemp(), "keywords.json")
+        with open(path, "w") as f:
+            f.write('{"uber eats": "Food", "rent": "Housing"}')
+        with patch.object(ExpenseClassifier, "keyword_table", self.keyword_table), \
+                patch.object(ExpenseClassifier, "KEYWORDS_PATH", path):
+            table = ExpenseClassifier.keyword_table()
+            self.assertEqual(table["uber"], "Transport")
+            self.assertEqual(ExpenseClassifier.classify("Uber Eats dinner"), "Food")
+            self.assertEqual(ExpenseClassifier.classify("uber home"), "Transport")
+
+
+    def test_classify_many_runs_one_pipe_over_distinct_misses(self):
+        descriptions = ["Uber home", "rent", "Bus fuel", "bus  fuel", "netflix movies", "unknown"]
+        ExpenseClassifier.cache().put("netflix movies", "Entertainment")
+
+        categories = ExpenseClassifier.classify_many(descriptions, batch_size=64)
+
+        self.assertEqual(categories, [ExpenseClassifier.classify(d) for d in descriptions])
+        [call] = self.nlp.pipe_calls
+        self.assertEqual(sorted(call["texts"]), ["bus fuel", "rent", "uber home", "unknown"])
+        self.assertEqual(call["batch_size"], 64)
+        self.assertEqual(call["n_process"], ExpenseClassifier.N_PROCESS)
+        self.assertEqual(call["disable"], FakeNLP.pipe_names)
+        self.assertEqual(ExpenseClassifier.path_stats()["counts"]["model"], 5)
+
+    def test_single_classify_never_starts_worker_processes(self):
+        with patch.object(ExpenseClassifier, "N_PROCESS", 4):
+            ExpenseClassifier.classify("unknown")
+            ExpenseClassifier.classify_many(["something else"])
+        single, batch = self.nlp.pipe_calls
+        self.assertEqual(single["n_process"], 1)
+        self.assertEqual(batch["n_process"], 4)
+
+    def test_classify_many_uses_keywords_first(self):
+        with patch.object(ExpenseClassifier, "keyword_table", self.keyword_table):
+            self.assertEqual(ExpenseClassifier.classify_many(["Uber", "rent"]), ["Transport", "Housing"])
+        self.assertFalse(ExpenseClassifier.loaded())
+        self.assertEqual(ExpenseClassifier.classify_many([]), [])
+
+
+class TestVectorTable(unittest.TestCase):
+
+    TRAINING = ["uber to the office", "monthly rent", "netflix and movies", "groceries, snacks", "bus fuel"]
+    HELD_OUT = ["office uber", "rent + utilities", "movies night", "snacks", "fuel for the bus", "nothing known"]
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "vectors")
+        self.nlp = FakeNLP()
+        self.built = VectorTable.build(self.nlp, self.TRAINING + list(ExpenseClassifier.CATEGORY_DOCS.values()), self.path)
+        self.addCleanup(TestExpenseClassifier.reset)
+        TestExpenseClassifier.reset()
+
+    def test_build_keeps_seen_tokens_with_vectors_as_float16(self):
+        table = VectorTable.load(self.path)
+        self.assertIsInstance(table.matrix, np.memmap)
+        self.assertEqual(table.matrix.dtype, np.float16)
+        self.assertIn("uber", table.index)
+        self.assertNotIn("monthly", table.index)  # the model has no vector for it
+        self.assertNotIn("gym", table.index)  # never seen
+        self.assertEqual(table.meta, {"model": "en_core_web_md", "dim": len(FakeDoc.VOCAB)})
+        np.testing.assert_array_equal(table.vector("Uber uber"), FakeDoc("uber").vector)
+
+    def test_held_out_categories_match_the_model(self):
+        table = VectorTable.load(self.path)
+        self.assertEqual(
+            ExpenseClassifier.classify_with_model(table, self.HELD_OUT),
+            ExpenseClassifier.classify_with_model(self.nlp, self.HELD_OUT),
+        )
+
+    @patch.dict(sys.modules, {"spacy": None})
+    def test_classifier_uses_table_without_spacy(self):
+        with patch.object(ExpenseClassifier, "keyword_table", classmethod(lambda cls: {})), \
+                patch.object(ExpenseClassifier, "VECTORS_PATH", self.path):
+            self.assertEqual(ExpenseClassifier.classify("uber to office"), "Transport")
+            self.assertEqual(ExpenseClassifier.classify_many(["netflix movies", "rent"]), ["Entertainment", "Housing"])
+            self.assertEqual(ExpenseClassifier.load_stats["backend"], "vectors")
+
+    @patch("builtins.print")
+    def test_missing_table_falls_back_to_spacy(self, mock_print):
+        spacy = MagicMock()
+        spacy.load.return_value = self.nlp
+        with patch.dict(sys.modules, {"spacy": spacy}), \
+                patch.object(ExpenseClassifier, "VECTORS_PATH", self.path + "-missing"):
+            ExpenseClassifier.load()
+        self.assertEqual(ExpenseClassifier.load_stats["backend"], "spacy")
+        self.assertIn("[Classifier Error]", mock_print.call_args[0][0])
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_leftmost_longest_match(self):
+        matcher = KeywordMatcher({"uber": "Transport", "uber eats": "Food", "movie": "Entertainment"})
+        self.assertEqual(matcher.match("uber eats at the movie"), "Food")
+        self.assertEqual(matcher.match("movie then uber eats"), "Entertainment")
+        self.assertEqual(matcher.match("uber, then eats"), "Transport")
+        self.assertIsNone(matcher.match("ubereats"))
+        self.assertIsNone(matcher.match(""))
+
+
+class TestClassificationCache(unittest.TestCase):
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = ClassificationCache(max_size=2)
+        cache.set_version("v1")
+        cache.put("uber", "Transport")
+        cache.put("rent", "Housing")
+        cache.get("uber")
+        cache.put("netflix", "Entertainment")
+        self.assertIsNone(cache.get("rent"))
+        self.assertEqual(cache.get("uber"), "Transport")
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_version_change_drops_persistent_entries(self):
+        path = os.path.join(tempfile.mkdtemp(), "classifications.db")
+        cache = ClassificationCache(path=path)
+        cache.set_version("v1")
+        cache.put("uber", "Transport")
+        cache = ClassificationCache(path=path)
+        cache.set_version("v2")
+        self.assertIsNone(cache.get("uber"))
+        cache.set_version("v1")
+        self.assertIsNone(cache.get("uber"))
+
+    def test_put_many_persists_in_one_transaction(self):
+        path = os.path.join(tempfile.mkdtemp(), "classifications.db")
+        cache = ClassificationCache(max_size=1, path=path)
+        cache.set_version("v1")
+        self.assertEqual(cache._conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        cache.put_many([("uber", "Transport"), ("rent", "Housing"), ("netflix", "Entertainment")])
+        self.assertEqual([sql for sql in statements if sql in ("BEGIN", "COMMIT")], ["BEGIN", "COMMIT"])
+
+        cache = ClassificationCache(path=path)
+        cache.set_version("v1")
+        self.assertEqual([cache.get(d) for d in ("uber", "rent", "netflix")], ["Transport", "Housing", "Entertainment"])
+        self.assertEqual(cache.stats()["persistent_hits"], 3)
+
+    def test_normalize(self):
+        self.assertEqual(ClassificationCache.normalize("  Uber\tRide  HOME "), "uber ride home")
+        self.assertEqual(ClassificationCache.normalize(None), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,12 @@
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 from flask import Flask
 from services.expense_service import ExpenseService
+from services.memory_store import MemoryClient
+from services.spend_counters import SpendCounters
+from services.category_rollups import CategoryRollups
+from datetime import date
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -9,6 +14,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 app = Flask(__name__)
 
+
+def spent(db, uid, category, period, day):
+    """Amount in the ``category`` counter for the ``period`` bucket containing ``day``."""
+    totals = SpendCounters.read(db, uid, [category], period, day, day)
+    return totals.get((category, SpendCounters.bucket(period, day)), 0) / 100
+
+
 class TestExpenseService(unittest.TestCase):
 
     def setUp(self):
@@ -26,7 +38,7 @@ class TestExpenseService(unittest.TestCase):
     @patch("services.email_service.smtplib.SMTP")
     @patch("services.expense_service.ExpenseService.firebase")
     @patch("services.expense_service.ExpenseValidator.validate_expense_input", return_value=(True, "Valid"))
-    @patch("services.expense_service.ExpenseClassifier.classify", return_value="Food")
+    @patch("services.expense_service.ClassifierClient.classify", return_value="Food")
     def test_add_expense_success(self, mock_classifier, mock_validator, mock_firebase, mock_smtp):
         mock_firebase.verify_user_token.return_value = self.user_id
         mock_firebase.db.collection.return_value.add.return_value = None
@@ -187,6 +199,53 @@ class TestExpenseService(unittest.TestCase):
             response, status = ExpenseService.delete_expense(self.expense_id, self.token)
             self.assertEqual(status, 200)
 
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_concurrent_deletes_decrement_counters_once(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        db = mock_firebase.db = MemoryClient()
+        _, doc_ref = db.collection("expenses").add({**self.valid_expense, "user_id": self.user_id})
+        batch = db.batch()
+        SpendCounters.stage(batch, db, self.user_id, SpendCounters.deltas(self.valid_expense))
+        batch.commit()
+
+        statuses = []
+
+        def delete():
+            with app.app_context():
+                statuses.append(ExpenseService.delete_expense(doc_ref.id, self.token)[1])
+
+        threads = [threading.Thread(target=delete) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(statuses), [200, 404, 404, 404])
+        self.assertEqual(spent(db, self.user_id, "Food", "monthly", date(2025, 5, 1)), 0)
+
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_non_finite_amounts_are_rejected(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        _, doc_ref = mock_firebase.db.collection("expenses").add({**self.valid_expense, "user_id": self.user_id})
+        with app.app_context():
+            for amount in (float("inf"), float("nan")):
+                response, status = ExpenseService.add_expense({**self.valid_expense, "amount": amount}, self.token)
+                self.assertEqual(status, 400)
+                response, status = ExpenseService.edit_expense(doc_ref.id, {"amount": amount}, self.token)
+                self.assertEqual(status, 400)
+        self.assertEqual(SpendCounters.deltas({**self.valid_expense, "amount": float("inf")}), {})
+
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_edit_rejects_non_string_category_and_method(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        _, doc_ref = mock_firebase.db.collection("expenses").add({**self.valid_expense, "user_id": self.user_id})
+        with app.app_context():
+            for fields in ({"category": 5}, {"category": ["x"]}, {"category": " "}, {"method": 5}):
+                response, status = ExpenseService.edit_expense(doc_ref.id, fields, self.token)
+                self.assertEqual(status, 400, fields)
+        self.assertEqual(doc_ref.get().to_dict()["category"], "Food")
+
     @patch("services.expense_service.ExpenseService.firebase")
     def test_list_expenses_unauthorized(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = None
@@ -215,6 +274,145 @@ class TestExpenseService(unittest.TestCase):
             response, status = ExpenseService.filter_by_method("bad_token", "Card")
             self.assertEqual(status, 401)
 
+    def _seed(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        rows = [
+            ("e1", 120, "Food", "Card", "2025-05-03"),
+            ("e2", 15, "Food", "Cash", "2025-05-01"),
+            ("e3", 60, "Transport", "Card", "2025-05-02"),
+            ("e4", 80, "Food", "Card", "2025-04-28"),
+        ]
+        for expense_id, amount, category, method, date in rows:
+            mock_firebase.db.collection("expenses").document(expense_id).set({
+                "user_id": self.user_id, "amount": amount, "category": category, "method": method, "date": date
+            })
+
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_filter_expenses_date_and_amount_ranges(self, mock_firebase):
+        self._seed(mock_firebase)
+        with app.app_context():
+            response, status = ExpenseService.filter_expenses(
+                self.token, {"from": "2025-05-01", "to": "2025-05-31", "min_amount": "50"}
+            )
+            self.assertEqual(status, 200)
+            self.assertEqual([e["id"] for e in response.json], ["e3", "e1"])
+
+            response, status = ExpenseService.filter_expenses(
+                self.token, {"category": "Food", "method": "Card", "max_amount": "100"}
+            )
+            self.assertEqual([e["id"] for e in response.json], ["e4"])
+
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_filter_expenses_results_are_in_date_order_for_every_plan(self, mock_firebase):
+        self._seed(mock_firebase)
+        with app.app_context():
+            for args in ({"min_amount": "50"}, {"min_amount": "10", "max_amount": "100"}, {"notes": "", "method": "Card"},
+                         {"category": "Food,Transport", "method": "Card,Cash", "min_amount": "1"}):
+                response, status = ExpenseService.filter_expenses(self.token, {**args, "explain": "1"})
+                self.assertEqual(status, 200)
+                dates = [e["date"] for e in response.json["results"]]
+                self.assertEqual(dates, sorted(dates), (args, response.json["explain"]))
+            response, _ = ExpenseService.filter_expenses(self.token, {"min_amount": "50"})
+            self.assertEqual([e["id"] for e in response.json], ["e4", "e3", "e1"])
+
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_filter_expenses_invalid_args(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        with app.app_context():
+            for args in ({"from": "05/01/2025"}, {"min_amount": "lots"}, {"from": "2025-06-01", "to": "2025-05-01"}):
+                response, status = ExpenseService.filter_expenses(self.token, args)
+                self.assertEqual(status, 400)
+
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_filter_expenses_combined_spec_with_explain(self, mock_firebase):
+        self._seed(mock_firebase)
+        mock_firebase.db.collection("expenses").document("e2").update({"notes": "Swiggy dinner"})
+        with app.app_context():
+            response, status = ExpenseService.filter_expenses(
+                self.token, {"category": "Food,Transport", "method": "Cash", "notes": "swiggy", "explain": "1"}
+            )
+            self.assertEqual(status, 200)
+            self.assertEqual([e["id"] for e in response.json["results"]], ["e2"])
+            explain = response.json["explain"]
+            self.assertIn("category in ['Food', 'Transport']", explain["pushed"])
+            self.assertIn("notes contains 'swiggy'", explain["post_filter"])
+            self.assertEqual(explain["returned"], 1)
+            self.assertGreaterEqual(explain["scanned"], explain["returned"])
+            self.assertNotIn("missing_index", explain)
+
+    @patch("services.expense_query_planner.ExpenseQueryPlanner._indexes", {(frozenset(), ("date",))})
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_filter_expenses_reports_missing_index(self, mock_firebase):
+        self._seed(mock_firebase)
+        with app.app_context():
+            response, status = ExpenseService.filter_expenses(self.token, {"category": "Food", "explain": "1"})
+            explain = response.json["explain"]
+            self.assertEqual(explain["pushed"], [])
+            self.assertEqual(explain["post_filter"], ["category == 'Food'"])
+            self.assertEqual((explain["scanned"], explain["returned"]), (4, 3))
+            self.assertEqual(explain["missing_index"], ["user_id", "category", "date"])
+
+
+    @patch("services.expense_service.AlertQueue.enqueue_budget_alert")
+    @patch("services.expense_service.ClassifierClient.classify", return_value="Food")
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_expense_writes_maintain_spend_counters(self, mock_firebase, mock_classify, mock_alert):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        db = mock_firebase.db = MemoryClient()
+        db.collection("budgets").add({"user_id": self.user_id, "amount": 150, "period": "monthly", "category": "Food"})
+        db.collection("users").document(self.user_id).set({"email": "user@example.com"})
+
+        with app.app_context():
+            ExpenseService.add_expense(self.valid_expense, self.token)
+            self.assertEqual(spent(db, self.user_id, "Food", "monthly", date(2025, 5, 1)), 100)
+            mock_alert.assert_not_called()
+
+            ExpenseService.add_expense({**self.valid_expense, "date": "2025-05-20", "amount": 60}, self.token)
+            mock_alert.assert_called_once_with(db, "user@example.com", 160, 150)
+            self.assertEqual(spent(db, self.user_id, "overall", "weekly", date(2025, 5, 20)), 60)
+
+            expense_id = next(doc.id for doc in db.collection("expenses").where("date", "==", "2025-05-20").stream())
+            ExpenseService.edit_expense(expense_id, {"amount": 20.5, "date": "2025-06-02"}, self.token)
+            self.assertEqual(spent(db, self.user_id, "Food", "monthly", date(2025, 5, 1)), 100)
+            self.assertEqual(spent(db, self.user_id, "Food", "monthly", date(2025, 6, 1)), 20.5)
+
+            ExpenseService.delete_expense(expense_id, self.token)
+            self.assertEqual(spent(db, self.user_id, "Food", "yearly", date(2025, 1, 1)), 100)
+            self.assertEqual(CategoryRollups.read(db, self.user_id, "monthly", date(2025, 6, 1)), {})
+            self.assertEqual(CategoryRollups.check(db, self.user_id), [])
+
+
+    @patch("services.alert_queue.EmailService.send_budget_alert")
+    @patch("services.expense_service.ClassifierClient.classify", return_value="Food")
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_budget_alert_is_queued_not_sent(self, mock_firebase, mock_classify, mock_send):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        db = mock_firebase.db = MemoryClient()
+        db.collection("budgets").add({"user_id": self.user_id, "amount": 50, "period": "daily", "category": "overall"})
+        db.collection("users").document(self.user_id).set({"email": "user@example.com"})
+
+        with app.app_context():
+            response, status = ExpenseService.add_expense(self.valid_expense, self.token)
+        self.assertEqual(status, 201)
+        mock_send.assert_not_called()
+        [alert] = [doc.to_dict() for doc in db.collection("alert_outbox").stream()]
+        self.assertEqual(alert["payload"], {"email": "user@example.com", "spent": 100, "limit": 50})
+
+
+    @patch("services.expense_service.ClassifierClient.classify_many", return_value=["Transport", "Food"])
+    @patch("services.expense_service.ExpenseService.firebase")
+    def test_classify_descriptions(self, mock_firebase, mock_classify_many):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        with app.app_context():
+            response, status = ExpenseService.classify_descriptions({"descriptions": ["uber", "swiggy"]}, self.token)
+            self.assertEqual(status, 200)
+            self.assertEqual(response.json, {"categories": ["Transport", "Food"]})
+
+            response, status = ExpenseService.classify_descriptions({"descriptions": "uber"}, self.token)
+            self.assertEqual(status, 400)
+        mock_classify_many.assert_called_once_with(["uber", "swiggy"])
+
 
 if __name__ == "__main__":
     unittest.main()
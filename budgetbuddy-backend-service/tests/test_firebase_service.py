@@ -1,22 +1,34 @@
+import time
 import unittest
 from unittest.mock import patch, MagicMock
-from services.firebase_service import FirebaseService
+from services.firebase_service import FirebaseService, TokenCache
+from services.memory_store import MemoryClient
 
 class TestFirebaseService(unittest.TestCase):
 
+    @patch("services.firebase_service.FirebaseService._ensure_app")
     @patch("services.firebase_service.auth.verify_id_token")
-    def test_verify_user_token_valid(self, mock_verify):
+    def test_verify_user_token_valid(self, mock_verify, mock_ensure_app):
         mock_verify.return_value = {"uid": "user123"}
         service = FirebaseService()
         uid = service.verify_user_token("valid_token")
         self.assertEqual(uid, "user123")
 
+    @patch("services.firebase_service.FirebaseService._ensure_app")
     @patch("services.firebase_service.auth.verify_id_token", side_effect=Exception("Invalid token"))
-    def test_verify_user_token_invalid(self, mock_verify):
+    def test_verify_user_token_invalid(self, mock_verify, mock_ensure_app):
         service = FirebaseService()
         uid = service.verify_user_token("invalid_token")
         self.assertIsNone(uid)
 
+    @patch("services.firebase_service.FirebaseService._ensure_app", side_effect=FileNotFoundError("firebase_key.json"))
+    @patch("services.firebase_service.auth.verify_id_token")
+    def test_verify_user_token_configuration_error_is_raised(self, mock_verify, mock_ensure_app):
+        service = FirebaseService()
+        with self.assertRaises(FileNotFoundError):
+            service.verify_user_token("valid_token")
+        mock_verify.assert_not_called()
+
     @patch("services.firebase_service.firebase_admin._apps", new=[])
     @patch("services.firebase_service.firebase_admin.initialize_app")
     @patch("services.firebase_service.credentials.Certificate")
@@ -24,9 +36,79 @@ class TestFirebaseService(unittest.TestCase):
     def test_firebase_initialization(self, mock_client, mock_cert, mock_init):
         mock_client.return_value.collection.return_value.document.return_value.set.return_value = None
         service = FirebaseService()
+        # Construction is side-effect free; the client is created on first use
+        mock_init.assert_not_called()
+        mock_client.assert_not_called()
+        service.db
+        service.db
         mock_cert.assert_called_once_with("firebase_key.json")
         mock_init.assert_called_once()
         mock_client.assert_called_once()
 
+    def test_instance_is_shared(self):
+        self.assertIs(FirebaseService.instance(), FirebaseService.instance())
+
+    @patch.object(FirebaseService, "STORAGE_BACKEND", "memory")
+    @patch("services.firebase_service.firestore.client")
+    def test_memory_storage_backend(self, mock_client):
+        service = FirebaseService()
+        self.assertIsInstance(service.db, MemoryClient)
+        mock_client.assert_not_called()
+
+    def test_ping(self):
+        service = FirebaseService()
+        service._db = MagicMock()
+        self.assertEqual(service.ping(), (True, None))
+        service._db.collection.return_value.document.return_value.set.assert_not_called()
+        service._db.collection.return_value.document.return_value.get.side_effect = Exception("down")
+        self.assertEqual(service.ping(), (False, "down"))
+
+
+class TestTokenCache(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        cache = TokenCache(max_size=2)
+        self.assertIsNone(cache.get("tok"))
+        cache.put("tok", {"uid": "user123", "exp": time.time() + 60})
+        self.assertEqual(cache.get("tok")["uid"], "user123")
+        self.assertEqual(cache.stats(), {"size": 1, "hits": 1, "misses": 1})
+
+    def test_expired_and_exp_less_tokens_are_not_served(self):
+        cache = TokenCache(max_size=2)
+        cache.put("no_exp", {"uid": "user123"})
+        cache.put("expired", {"uid": "user123", "exp": time.time() - 1})
+        self.assertIsNone(cache.get("no_exp"))
+        self.assertIsNone(cache.get("expired"))
+
+    def test_evicts_least_recently_used(self):
+        cache = TokenCache(max_size=2)
+        exp = time.time() + 60
+        cache.put("a", {"uid": "a", "exp": exp})
+        cache.put("b", {"uid": "b", "exp": exp})
+        cache.get("a")
+        cache.put("c", {"uid": "c", "exp": exp})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    @patch("services.firebase_service.FirebaseService._ensure_app")
+    @patch("services.firebase_service.auth.verify_id_token")
+    def test_verify_user_token_uses_cache(self, mock_verify, mock_ensure_app):
+        mock_verify.return_value = {"uid": "user123", "exp": time.time() + 60}
+        service = FirebaseService()
+        self.assertEqual(service.verify_user_token("cached_token"), "user123")
+        self.assertEqual(service.verify_user_token("cached_token"), "user123")
+        mock_verify.assert_called_once()
+
+    @patch("services.firebase_service.FirebaseService._ensure_app")
+    @patch("services.firebase_service.auth.verify_id_token")
+    def test_verify_user_token_check_revoked_skips_cache(self, mock_verify, mock_ensure_app):
+        mock_verify.return_value = {"uid": "user123", "exp": time.time() + 60}
+        service = FirebaseService()
+        service.verify_user_token("revocable_token")
+        service.verify_user_token("revocable_token", check_revoked=True)
+        self.assertEqual(mock_verify.call_count, 2)
+        mock_verify.assert_called_with("revocable_token", check_revoked=True)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import json
+import unittest
+from flask import Flask
+from services.budget_service import BudgetService
+from services.expense_service import ExpenseService
+from services.expense_query_planner import INDEX_FILE
+from services.memory_store import MemoryClient
+from services.recurring_service import RecurringService
+from services.reminder_service import ReminderService
+from utils.pagination import ListQuery
+
+app = Flask(__name__)
+
+
+class TestListQuery(unittest.TestCase):
+
+    def test_every_order_field_has_composite_indexes(self):
+        with open(INDEX_FILE) as f:
+            indexes = {
+                (index["collectionGroup"], tuple((field["fieldPath"], field["order"]) for field in index["fields"]))
+                for index in json.load(f)["indexes"]
+            }
+        services = {
+            "expenses": ExpenseService,
+            "budgets": BudgetService,
+            "recurring": RecurringService,
+            "reminders": ReminderService,
+        }
+        for collection, service in services.items():
+            for field in service.ORDER_FIELDS:
+                for direction in ("ASCENDING", "DESCENDING"):
+                    self.assertIn((collection, (("user_id", "ASCENDING"), (field, direction))), indexes)
+
+    def test_order_by_is_limited_to_order_fields(self):
+        list_query, error = ListQuery.from_args({"order_by": "-amount", "fields": "notes"}, ["amount", "notes"], ["amount"])
+        self.assertIsNone(error)
+        self.assertEqual(list_query.fields, ["notes"])
+        _, error = ListQuery.from_args({"order_by": "notes"}, ["amount", "notes"], ["amount"])
+        self.assertEqual(error, "Cannot order by: notes")
+
+    def test_response_sets_next_cursor_until_the_last_page(self):
+        db = MemoryClient()
+        for i in range(3):
+            db.collection("reminders").document(f"r{i}").set({"user_id": "u1", "day": i})
+        query = db.collection("reminders").where("user_id", "==", "u1")
+
+        with app.app_context():
+            list_query, _ = ListQuery.from_args({"limit": "2", "order_by": "day"}, ["day"], ["day"])
+            response, status = list_query.response(query)
+            self.assertEqual(status, 200)
+            self.assertEqual([item["id"] for item in response.json], ["r0", "r1"])
+
+            args = {"limit": "2", "order_by": "day", "cursor": response.headers["X-Next-Cursor"]}
+            list_query, _ = ListQuery.from_args(args, ["day"], ["day"])
+            response, _ = list_query.response(query)
+            self.assertEqual(response.json, [{"id": "r2", "user_id": "u1", "day": 2}])
+            self.assertNotIn("X-Next-Cursor", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+from utils.pdf_renderer import PDFRenderer, RenderTimeout, RendererBusy
+
+
+class TestPDFRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.running = 0
+        self.peak = 0
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def render(self, html):
+        with self.lock:
+            self.calls.append(html)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+        return f"PDF:{html}".encode()
+
+    def burst(self, renderer, keys):
+        results, errors = {}, []
+
+        def request(key):
+            try:
+                results[key] = renderer.render(key, key)
+            except RendererBusy as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=request, args=(key,)) for key in keys]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_burst_is_bounded(self):
+        renderer = PDFRenderer(self.render, workers=2, max_pending=3)
+        results, errors = self.burst(renderer, [f"month-{i}" for i in range(12)])
+        self.assertEqual(self.peak, 2)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(errors), 7)
+        self.assertEqual(renderer.stats()["rejected"], 7)
+
+    def test_same_key_is_rendered_once_and_cached(self):
+        renderer = PDFRenderer(self.render, workers=2)
+        results, errors = self.burst(renderer, ["same"] * 5)
+        self.assertEqual((self.calls, errors), (["same"], []))
+        self.assertEqual(renderer.render("same", "same"), b"PDF:same")
+        self.assertEqual(renderer.stats()["hits"], 1)
+        self.assertEqual(renderer.stats()["in_flight"], 0)
+
+    def test_slow_render_times_out_and_is_cached_when_done(self):
+        renderer = PDFRenderer(self.render, workers=1, timeout=0.05)
+        with self.assertRaises(RenderTimeout):
+            renderer.render("slow", "slow")
+        self.assertEqual(renderer.stats()["timed_out"], 1)
+        self.release.set()
+        renderer._pool.submit(lambda: None).result()  # the one worker has finished the render
+        self.assertEqual(renderer.render("slow", "slow"), b"PDF:slow")
+        self.assertEqual(self.calls, ["slow"])
+
+    def test_cache_evicts_least_recently_used(self):
+        self.release.set()
+        renderer = PDFRenderer(self.render, cache_size=1)
+        renderer.render("a", "a")
+        renderer.render("b", "b")
+        renderer.render("a", "a")
+        self.assertEqual(self.calls, ["a", "b", "a"])
+
+    def test_key_depends_on_summary(self):
+        self.assertEqual(PDFRenderer.key("u1", "2025-05", {"Food": 1, "Rent": 2}), PDFRenderer.key("u1", "2025-05", {"Rent": 2, "Food": 1}))
+        self.assertNotEqual(PDFRenderer.key("u1", "2025-05", {"Food": 1}), PDFRenderer.key("u1", "2025-05", {"Food": 2}))
+
+
+if __name__ == "__main__":
+    unittest.main()
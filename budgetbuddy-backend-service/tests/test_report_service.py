@@ -2,6 +2,11 @@ import unittest
 from unittest.mock import patch, MagicMock
 from flask import Flask
 from services.report_service import ReportService
+from services.expense_service import ExpenseService
+from services.memory_store import MemoryClient
+from services.category_rollups import CategoryRollups
+from services.data_versions import DataVersions
+from utils.pdf_renderer import RenderTimeout, RendererBusy
 import sys
 import os
 from datetime import datetime, timedelta
@@ -20,6 +25,16 @@ class TestReportService(unittest.TestCase):
         self.test_date = datetime(2025, 5, 10)  # A Saturday
         self.this_week_start = datetime(2025, 5, 5)  # Monday
         self.last_week_start = datetime(2025, 4, 28)  # Previous Monday
+        ReportService.report_cache.clear()
+        ReportService.pdf_renderer.clear()
+        DataVersions.clear()
+
+    def store(self, expenses):
+        db = MemoryClient()
+        for expense in expenses:
+            db.collection("expenses").add({"user_id": self.user_id, **expense})
+        CategoryRollups.rebuild(db)
+        return db
 
     @patch("services.report_service.ReportService.firebase")
     def test_generate_monthly_report_success(self, mock_firebase):
@@ -43,14 +58,37 @@ class TestReportService(unittest.TestCase):
     @patch("services.report_service.ReportService.firebase")
     def test_generate_monthly_report_invalid_date(self, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = [
-            MagicMock(to_dict=lambda: {"date": "bad-date", "amount": 100, "category": "Food"})
-        ]
+        mock_firebase.db = MemoryClient()
+        mock_firebase.db.collection("expenses").add({"user_id": self.user_id, "date": "bad-date", "amount": 100, "category": "Food"})
         with app.app_context():
             response, status = ReportService.generate_monthly_report(self.token, self.month)
             self.assertEqual(status, 200)
             self.assertEqual(response.json["summary"], {})
 
+            response, status = ReportService.generate_monthly_report(self.token, "May 2025")
+            self.assertEqual(status, 400)
+
+    @patch("services.report_service.ReportService.firebase")
+    def test_monthly_report_reads_the_month_rollup(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = MemoryClient()
+        expenses = mock_firebase.db.collection("expenses")
+        for date, amount, category, user in [
+            ("2025-04-30", 50, "Food", self.user_id),
+            ("2025-05-01", 10, "Food", self.user_id),
+            ("2025-05-31", 20.5, "Food", self.user_id),
+            ("2025-05-15", 30, "Transport", self.user_id),
+            ("2025-06-01", 70, "Food", self.user_id),
+            ("2025-05-15", 99, "Food", "someone_else"),
+        ]:
+            expenses.add({"user_id": user, "date": date, "amount": amount, "category": category, "notes": "x"})
+        CategoryRollups.rebuild(mock_firebase.db)
+
+        with app.app_context():
+            response, status = ReportService.generate_monthly_report(self.token, self.month)
+        self.assertEqual(status, 200)
+        self.assertEqual(response.json["summary"], {"Food": 30.5, "Transport": 30.0})
+
     @patch("services.report_service.ReportService.firebase")
     @patch("services.report_service.datetime")
     def test_generate_weekly_insights_success(self, mock_datetime, mock_firebase):
@@ -61,10 +99,10 @@ class TestReportService(unittest.TestCase):
         mock_datetime.datetime = datetime
 
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = [
-            MagicMock(to_dict=lambda: {"category": "Food", "date": "2025-05-03", "amount": 100.0}),
-            MagicMock(to_dict=lambda: {"category": "Food", "date": "2025-05-09", "amount": 200.0})
-        ]
+        mock_firebase.db = self.store([
+            {"category": "Food", "date": "2025-05-03", "amount": 100.0},
+            {"category": "Food", "date": "2025-05-09", "amount": 200.0},
+        ])
 
         with app.app_context():
             response, status = ReportService.generate_weekly_insights(self.token)
@@ -91,9 +129,7 @@ class TestReportService(unittest.TestCase):
         mock_datetime.datetime = datetime
 
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = [
-            MagicMock(to_dict=lambda: {"category": "NewCat", "date": "2025-05-09", "amount": 200.0})
-        ]
+        mock_firebase.db = self.store([{"category": "NewCat", "date": "2025-05-09", "amount": 200.0}])
 
         with app.app_context():
             response, status = ReportService.generate_weekly_insights(self.token)
@@ -111,9 +147,7 @@ class TestReportService(unittest.TestCase):
         mock_datetime.datetime = datetime
 
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = [
-            MagicMock(to_dict=lambda: {"category": "OldCat", "date": "2025-05-02", "amount": 100.0})
-        ]
+        mock_firebase.db = self.store([{"category": "OldCat", "date": "2025-05-02", "amount": 100.0}])
 
         with app.app_context():
             response, status = ReportService.generate_weekly_insights(self.token)
@@ -125,9 +159,8 @@ class TestReportService(unittest.TestCase):
     @patch("services.report_service.pdfkit.from_string", return_value=b"PDF")
     def test_generate_pdf_report_success(self, mock_pdfkit, mock_firebase):
         mock_firebase.verify_user_token.return_value = self.user_id
-        mock_firebase.db.collection.return_value.where.return_value.stream.return_value = [
-            MagicMock(to_dict=lambda: {"amount": 100, "category": "Food", "date": "2025-05-05"})
-        ]
+        mock_firebase.db = MemoryClient()
+        mock_firebase.db.collection("expenses").add({"user_id": self.user_id, "amount": 100, "category": "Food", "date": "2025-05-05"})
         with app.test_request_context():
             response = ReportService.generate_pdf_report(self.token, self.month)
             self.assertEqual(response.status_code, 200)
@@ -149,5 +182,94 @@ class TestReportService(unittest.TestCase):
             self.assertEqual(status, 401)
             self.assertIn("error", response.json)
 
+    @patch("services.expense_service.AlertQueue.enqueue_budget_alert")
+    @patch("services.expense_service.ClassifierClient.classify", return_value="Food")
+    @patch("services.expense_service.ExpenseService.firebase")
+    @patch("services.report_service.ReportService.firebase")
+    def test_reports_are_cached_until_expenses_change(self, mock_firebase, mock_expense_firebase, mock_classify, mock_alert):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_expense_firebase.verify_user_token.return_value = self.user_id
+        db = mock_firebase.db = mock_expense_firebase.db = self.store([{"category": "Food", "date": "2025-05-03", "amount": 10}])
+
+        with app.test_request_context():
+            response, status = ReportService.generate_monthly_report(self.token, self.month)
+            self.assertEqual(status, 200)
+            etag = response.headers["ETag"]
+
+            # Unchanged: served from the cache, or as an empty 304, without touching storage
+            mock_firebase.db = MagicMock()
+            mock_firebase.db.collection.side_effect = AssertionError("storage was read")
+            response, status = ReportService.generate_monthly_report(self.token, self.month)
+            self.assertEqual((status, response.headers["ETag"], response.json["summary"]), (200, etag, {"Food": 10.0}))
+            response, status = ReportService.generate_monthly_report(self.token, self.month, if_none_match=etag)
+            self.assertEqual(status, 304)
+            self.assertEqual(response.get_data(), b"")
+
+            mock_firebase.db = db
+            response, status = ReportService.generate_monthly_report(self.token, "2025-04", if_none_match=etag)
+            self.assertEqual(status, 200)  # another report has another ETag
+
+            # An expense write bumps the user's data version
+            response, status = ExpenseService.add_expense({"amount": 5, "category": "Food", "date": "2025-05-04", "method": "Card", "notes": "snack"}, self.token)
+            self.assertEqual(status, 201, response.json)
+            response, status = ReportService.generate_monthly_report(self.token, self.month, if_none_match=etag)
+            self.assertEqual(status, 200)
+            self.assertNotEqual(response.headers["ETag"], etag)
+            self.assertEqual(response.json["summary"], {"Food": 15.0})
+
+        self.assertEqual(ReportService.report_cache.stats()["not_modified"], 1)
+
+
+    @patch("services.report_service.ReportService.firebase")
+    @patch("services.report_service.pdfkit.from_string", return_value=b"PDF")
+    def test_pdf_is_rendered_once_per_summary(self, mock_pdfkit, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = self.store([
+            {"category": "Food", "date": "2025-05-03", "amount": 10},
+            {"category": "<img src='file:///etc/passwd'>", "date": "2025-05-04", "amount": 1},
+        ])
+        with app.test_request_context():
+            for _ in range(2):
+                response = ReportService.generate_pdf_report(self.token, self.month)
+                self.assertEqual(response.status_code, 200)
+
+            mock_pdfkit.assert_called_once()
+            markup = mock_pdfkit.call_args[0][0]
+            self.assertIn("<li>Food: $10.00</li>", markup)
+            self.assertIn("&lt;img src=&#x27;file:///etc/passwd&#x27;&gt;", markup)
+            self.assertEqual(mock_firebase.verify_user_token.call_count, 2)  # once per request
+
+            # The JSON report reuses the summary the PDF computed
+            with patch("services.report_service.CategoryRollups.read") as mock_read:
+                response, status = ReportService.generate_monthly_report(self.token, self.month)
+            mock_read.assert_not_called()
+            self.assertEqual(response.json["summary"]["Food"], 10.0)
+
+            # A different summary renders a new PDF
+            mock_firebase.db.collection("expenses").add({"user_id": self.user_id, "category": "Food", "date": "2025-05-05", "amount": 5})
+            CategoryRollups.rebuild(mock_firebase.db)
+            ReportService.report_cache.clear()
+            ReportService.generate_pdf_report(self.token, self.month)
+            self.assertEqual(mock_pdfkit.call_count, 2)
+
+    @patch("services.report_service.ReportService.firebase")
+    def test_pdf_report_busy(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = self.store([])
+        with app.test_request_context(), \
+                patch.object(ReportService.pdf_renderer, "render", side_effect=RendererBusy("full")):
+            response, status = ReportService.generate_pdf_report(self.token, self.month)
+        self.assertEqual(status, 503)
+
+    @patch("services.report_service.ReportService.firebase")
+    def test_pdf_report_timeout(self, mock_firebase):
+        mock_firebase.verify_user_token.return_value = self.user_id
+        mock_firebase.db = self.store([])
+        with app.test_request_context(), \
+                patch.object(ReportService.pdf_renderer, "render", side_effect=RenderTimeout("slow")):
+            response, status = ReportService.generate_pdf_report(self.token, self.month)
+        self.assertEqual(status, 504)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from datetime import date
+from services.memory_store import MemoryClient
+from services.sqlite_store import SQLiteClient
+from services.spend_counters import SpendCounters
+
+
+def spent(db, uid, category, period, day):
+    """Amount in the ``category`` counter for the ``period`` bucket containing ``day``."""
+    totals = SpendCounters.read(db, uid, [category], period, day, day)
+    return totals.get((category, SpendCounters.bucket(period, day)), 0) / 100
+
+
+class TestSpendCounters(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MemoryClient()
+        self.user_id = "user123"
+
+    def add(self, expense):
+        batch = self.db.batch()
+        batch.set(self.db.collection("expenses").document(), expense)
+        SpendCounters.stage(batch, self.db, self.user_id, SpendCounters.deltas(expense))
+        batch.commit()
+
+    def test_buckets(self):
+        day = date(2025, 12, 29)
+        self.assertEqual(SpendCounters.bucket("daily", day), "2025-12-29")
+        self.assertEqual(SpendCounters.bucket("weekly", day), "2026-W01")
+        self.assertEqual(SpendCounters.bucket("monthly", day), "2025-12")
+        self.assertEqual(SpendCounters.bucket("yearly", day), "2025")
+
+    def test_deltas_cover_category_and_overall(self):
+        deltas = SpendCounters.deltas({"amount": 12.34, "category": "Food", "date": "2025-05-01"})
+        self.assertEqual(len(deltas), 8)
+        self.assertEqual(deltas[("Food", "monthly", "2025-05")], 1234)
+        self.assertEqual(deltas[("overall", "daily", "2025-05-01")], 1234)
+        self.assertEqual(SpendCounters.deltas({"amount": "abc", "date": "2025-05-01"}), {})
+        self.assertEqual(SpendCounters.deltas({"amount": 5, "date": "not a date"}), {})
+        # Categories that aren't strings only count towards overall
+        deltas = SpendCounters.deltas({"amount": 5, "category": ["x"], "date": "2025-05-01"})
+        self.assertEqual({category for category, _, _ in deltas}, {"overall"})
+
+    def test_combine_drops_cancelled_counters(self):
+        old = SpendCounters.deltas({"amount": 10, "category": "Food", "date": "2025-05-01"}, sign=-1)
+        new = SpendCounters.deltas({"amount": 10, "category": "Food", "date": "2025-05-02"})
+        combined = SpendCounters.combine(old, new)
+        self.assertEqual(set(combined), {
+            ("Food", "daily", "2025-05-01"), ("Food", "daily", "2025-05-02"),
+            ("overall", "daily", "2025-05-01"), ("overall", "daily", "2025-05-02"),
+        })
+
+    def test_increments_accumulate(self):
+        for db in (self.db, SQLiteClient(":memory:")):
+            self.db = db
+            self.add({"user_id": self.user_id, "amount": 0.1, "category": "Food", "date": "2025-05-01"})
+            self.add({"user_id": self.user_id, "amount": 0.2, "category": "Food/Drinks", "date": "2025-05-03"})
+            self.assertEqual(spent(db, self.user_id, "overall", "monthly", date(2025, 5, 9)), 0.3)
+            self.assertEqual(spent(db, self.user_id, "Food/Drinks", "weekly", date(2025, 5, 1)), 0.2)
+            self.assertEqual(spent(db, self.user_id, "Food", "daily", date(2025, 5, 3)), 0)
+
+    def test_rebuild_recomputes_and_drops_stale_counters(self):
+        self.add({"user_id": self.user_id, "amount": 40, "category": "Food", "date": "2025-05-01"})
+        # Drift the counters: an expense written without them, and a stale counter
+        self.db.collection("expenses").add({"user_id": self.user_id, "amount": 2, "category": "Food", "date": "2025-05-02"})
+        self.db.collection("spend_counters").document("stale").set({"user_id": self.user_id, "total_cents": 5})
+        self.db.collection("spend_counters").document("other").set({"user_id": "someone_else", "total_cents": 5})
+
+        self.assertEqual(SpendCounters.rebuild(self.db, self.user_id), 10)
+        self.assertEqual(spent(self.db, self.user_id, "Food", "monthly", date(2025, 5, 1)), 42)
+        self.assertFalse(self.db.collection("spend_counters").document("stale").get().exists)
+        self.assertTrue(self.db.collection("spend_counters").document("other").get().exists)
+
+
+if __name__ == "__main__":
+    unittest.main()
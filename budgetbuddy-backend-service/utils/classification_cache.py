@@ -0,0 +1,131 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ClassificationCache:
+    """Normalised description -> category memo for the expense classifier.
+
+    An in-process LRU of ``max_size`` entries, optionally backed by a SQLite
+    table at ``path`` so results survive restarts. Entries belong to a
+    ``version`` (a fingerprint of the classifier's categories and model); when
+    the version changes, entries from other versions are discarded. The table
+    is in WAL mode, and batch writers use ``put_many`` so a whole batch costs
+    one transaction (and one fsync) rather than one per entry.
+    """
+
+    def __init__(self, max_size=10000, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.version = None
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS classifications ("
+                " version TEXT NOT NULL,"
+                " description TEXT NOT NULL,"
+                " category TEXT NOT NULL,"
+                " PRIMARY KEY (version, description))"
+            )
+
+    @staticmethod
+    def normalize(description):
+        return _WHITESPACE.sub(" ", str(description or "")).strip().lower()
+
+    def set_version(self, version):
+        """Switch to ``version``, dropping entries cached under any other one."""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM classifications WHERE version != ?", (version,))
+
+    def get(self, description):
+        with self._lock:
+            category = self._entries.get(description)
+            if category is not None:
+                self._entries.move_to_end(description)
+                self.hits += 1
+                return category
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT category FROM classifications WHERE version = ? AND description = ?",
+                    (self.version, description),
+                ).fetchone()
+                if row:
+                    self._remember(description, row[0])
+                    self.persistent_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, description, category):
+        with self._lock:
+            self._remember(description, category)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO classifications (version, description, category) VALUES (?, ?, ?)",
+                    (self.version, description, category),
+                )
+
+    def put_many(self, entries):
+        """Store ``(description, category)`` pairs, persisting them in one transaction."""
+        entries = list(entries)
+        with self._lock:
+            for description, category in entries:
+                self._remember(description, category)
+            if self._conn is not None and entries:
+                # The connection autocommits, so group the inserts explicitly
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO classifications (version, description, category) VALUES (?, ?, ?)",
+                        [(self.version, description, category) for description, category in entries],
+                    )
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+
+    def _remember(self, description, category):
+        if self.max_size <= 0:
+            return
+        self._entries[description] = category
+        self._entries.move_to_end(description)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.persistent_hits = 0
+            self.misses = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM classifications")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.persistent_hits) / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,147 @@
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.expense_classifier import ExpenseClassifier
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One JSON request per line: ``{"descriptions": [...]}`` -> ``{"categories": [...]}``."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                descriptions = json.loads(line)["descriptions"]
+                if not isinstance(descriptions, list):
+                    raise ValueError("descriptions must be a list")
+                response = {"categories": self.server.submit(descriptions)}
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class ClassifierServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves ExpenseClassifier over a Unix socket, so one process owns the model.
+
+    Each connection gets a thread. Their requests are put on one queue, and a
+    batching thread gathers whatever arrives within ``batch_window`` seconds (up
+    to ``max_batch`` descriptions) into a single ``classify_many`` call. Requests
+    from many web workers then share one ``nlp.pipe`` pass.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, batch_window=0.005, max_batch=1024):
+        if os.path.exists(path):
+            os.unlink(path)  # left behind by a previous run
+        super().__init__(path, _Handler)
+        self.path = path
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.batches = 0
+        self._pending = queue.Queue()
+        self._batcher = threading.Thread(target=self._run_batches, name="classifier-batcher", daemon=True)
+        self._batcher.start()
+
+    def submit(self, descriptions):
+        future = Future()
+        self._pending.put((descriptions, future))
+        return future.result()
+
+    def _next_batch(self):
+        first = self._pending.get()
+        if first is None:
+            return None
+        batch, size = [first], len(first[0])
+        deadline = time.monotonic() + self.batch_window
+        while size < self.max_batch:
+            try:
+                item = self._pending.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is None:
+                self._pending.put(None)  # finish this batch, then stop
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run_batches(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                categories = ExpenseClassifier.classify_many([d for descriptions, _ in batch for d in descriptions])
+            except Exception as e:
+                print(f"[Classifier Server Error] {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            offset = 0
+            for descriptions, future in batch:
+                future.set_result(categories[offset:offset + len(descriptions)])
+                offset += len(descriptions)
+
+    def server_close(self):
+        self._pending.put(None)
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class ClassifierClient:
+    """Classifies through the ClassifierServer at ``CLASSIFIER_SOCKET`` if one is configured.
+
+    Without a socket, or when the server can't be reached or answers with an
+    error, it classifies in-process, loading the model in this process as before.
+    """
+
+    SOCKET_PATH = os.getenv("CLASSIFIER_SOCKET")
+    TIMEOUT = float(os.getenv("CLASSIFIER_SOCKET_TIMEOUT", 5))
+
+    @classmethod
+    def _request(cls, descriptions):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(cls.TIMEOUT)
+            sock.connect(cls.SOCKET_PATH)
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps({"descriptions": descriptions}).encode() + b"\n")
+                stream.flush()
+                response = json.loads(stream.readline())
+        if "error" in response:
+            raise ValueError(response["error"])
+        categories = response["categories"]
+        if len(categories) != len(descriptions):
+            raise ValueError("classifier server returned the wrong number of categories")
+        return categories
+
+    @classmethod
+    def _remote(cls, descriptions):
+        """Categories from the server, or None to classify in-process."""
+        if not cls.SOCKET_PATH:
+            return None
+        try:
+            return cls._request(descriptions)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Classifier Client Error] {e}; classifying in-process")
+            return None
+
+    @classmethod
+    def classify(cls, description):
+        categories = cls._remote([description])
+        return categories[0] if categories else ExpenseClassifier.classify(description)
+
+    @classmethod
+    def classify_many(cls, descriptions):
+        descriptions = list(descriptions)
+        if not descriptions:
+            return []
+        categories = cls._remote(descriptions)
+        return categories if categories is not None else ExpenseClassifier.classify_many(descriptions)
@@ -0,0 +1,110 @@
+from array import array
+from datetime import date
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: fall back to NumPy .npz output
+    pa = None
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MISSING_DATE = -2 ** 31
+MISSING_AMOUNT = -2 ** 63
+
+
+class ColumnarExpenseWriter:
+    """Accumulates expenses into typed columns for bulk analytics exports.
+
+    ``date`` is an int32 count of days since 1970-01-01 (Arrow's date32), ``amount``
+    is int64 cents, ``category`` and ``method`` are dictionary-encoded and ``notes``
+    is a string column stored as UTF-8 bytes plus int64 offsets (Arrow's
+    large_string layout), so one long note costs its own length and nothing more.
+    Missing or unparseable dates and amounts, and amounts whose cents don't fit
+    in int64, are exported as nulls (the MISSING_* sentinels in .npz output). Columns are kept in compact ``array`` buffers rather
+    than lists of Python objects while rows are added.
+    """
+
+    ARROW_AVAILABLE = pa is not None
+
+    def __init__(self):
+        self.dates = array("i")
+        self.amounts = array("q")
+        self.note_data = bytearray()
+        self.note_offsets = array("q", [0])
+        self._dictionaries = {"category": {}, "method": {}}
+        self._codes = {"category": array("i"), "method": array("i")}
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @staticmethod
+    def _day(value):
+        try:
+            return date.fromisoformat(str(value)[:10]).toordinal() - EPOCH_ORDINAL
+        except ValueError:
+            return MISSING_DATE
+
+    @staticmethod
+    def _cents(value):
+        if value is None or value == "":
+            return MISSING_AMOUNT
+        try:
+            cents = round(float(value) * 100)
+        except (TypeError, ValueError, OverflowError):  # OverflowError: infinite amounts
+            return MISSING_AMOUNT
+        # The sentinel itself is int64's minimum, so valid cents lie strictly above it
+        return cents if MISSING_AMOUNT < cents < 2 ** 63 else MISSING_AMOUNT
+
+    def add(self, expense):
+        self.dates.append(self._day(expense.get("date")))
+        self.amounts.append(self._cents(expense.get("amount")))
+        for column, codes in self._codes.items():
+            dictionary = self._dictionaries[column]
+            value = str(expense.get(column) or "")
+            codes.append(dictionary.setdefault(value, len(dictionary)))
+        self.note_data += str(expense.get("notes") or "").encode("utf-8", "replace")
+        self.note_offsets.append(len(self.note_data))
+
+    def dictionary(self, column):
+        return list(self._dictionaries[column])
+
+    def to_arrow(self):
+        dates = pa.array(self.dates, type=pa.int32())
+        dates = pa.compute.if_else(pa.compute.equal(dates, MISSING_DATE), None, dates).cast(pa.date32())
+        amounts = pa.array(self.amounts, type=pa.int64())
+        columns = {
+            "date": dates,
+            "amount_cents": pa.compute.if_else(pa.compute.equal(amounts, MISSING_AMOUNT), None, amounts),
+        }
+        for column, codes in self._codes.items():
+            columns[column] = pa.DictionaryArray.from_arrays(
+                pa.array(codes, type=pa.int32()), pa.array(self.dictionary(column), type=pa.string())
+            )
+        columns["notes"] = pa.LargeStringArray.from_buffers(
+            len(self), pa.py_buffer(self.note_offsets), pa.py_buffer(self.note_data)
+        )
+        return pa.table(columns)
+
+    def write_arrow(self, sink):
+        table = self.to_arrow()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    def write_parquet(self, sink):
+        pa.parquet.write_table(self.to_arrow(), sink, compression="zstd")
+
+    def write_npz(self, sink):
+        import numpy as np
+
+        arrays = {
+            "date": np.frombuffer(self.dates, dtype=np.int32),
+            "amount_cents": np.frombuffer(self.amounts, dtype=np.int64),
+            "notes_data": np.frombuffer(self.note_data, dtype=np.uint8),
+            "notes_offsets": np.frombuffer(self.note_offsets, dtype=np.int64),
+        }
+        for column, codes in self._codes.items():
+            arrays[f"{column}_codes"] = np.frombuffer(codes, dtype=np.int32)
+            arrays[f"{column}_values"] = np.array(self.dictionary(column), dtype=str)
+        np.savez_compressed(sink, **arrays)
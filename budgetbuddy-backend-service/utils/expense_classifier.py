@@ -1,25 +1,341 @@
-import spacy
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils.classification_cache import ClassificationCache
+from utils.keyword_matcher import KeywordMatcher
+from utils.vector_table import VectorTable
+
+
+def _rss_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource  # no /proc (macOS): fall back to the peak RSS
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20  # bytes on macOS
+
 
 class ExpenseClassifier:
-    nlp = spacy.load("en_core_web_md")  # or _sm for lighter
+    """Assigns a category to an expense description by spaCy vector similarity.
+
+    Each category's seed words are averaged into a centroid vector; all centroids
+    are kept L2-normalised in one matrix, so scoring a description against every
+    category is a single matrix-vector product.
+
+    The model is loaded on the first ``classify()`` call rather than at import,
+    so importing the services stays cheap. Web servers should call ``preload()``
+    before forking workers so they all share the loaded model's memory.
+
+    With ``CLASSIFIER_VECTORS_PATH`` set, the model is a memory-mapped VectorTable
+    holding just the vectors of the vocabulary seen in expenses, so loading it
+    takes milliseconds and spaCy is never imported.
+
+    Descriptions containing a known keyword (every CATEGORY_DOCS seed word, plus
+    KEYWORDS and the JSON table at ``CLASSIFIER_KEYWORDS_PATH``) are classified by
+    a token trie without touching the model. The rest are memoized per normalised
+    description in a ClassificationCache (``CLASSIFIER_CACHE_SIZE`` entries,
+    persisted to ``CLASSIFIER_CACHE_PATH`` if set); cached results are dropped when
+    CATEGORY_DOCS or the model change. ``path_stats()`` reports the traffic share
+    of each path.
+    """
+
+    MODEL_NAME = os.getenv("SPACY_MODEL", "en_core_web_md")  # or _sm for lighter
+
+    # Directory of a VectorTable built by scripts/build_vector_table.py; when set,
+    # classification reads static vectors from it and never imports spaCy
+    VECTORS_PATH = os.getenv("CLASSIFIER_VECTORS_PATH")
 
     CATEGORY_DOCS = {
-        "Transport": nlp("taxi uber bus fuel cab commute"),
-        "Food": nlp("restaurant groceries snacks food delivery"),
-        "Entertainment": nlp("netflix movies music games shows"),
-        "Housing": nlp("rent loan emi mortgage utilities"),
+        "Transport": "taxi uber bus fuel cab commute",
+        "Food": "restaurant groceries snacks food delivery",
+        "Entertainment": "netflix movies music games shows",
+        "Housing": "rent loan emi mortgage utilities",
     }
 
+    # Extra keyword -> category entries; they override CATEGORY_DOCS seed words
+    KEYWORDS = {}
+    KEYWORDS_PATH = os.getenv("CLASSIFIER_KEYWORDS_PATH")
+
+    # nlp.pipe settings for classify_many; single classifications always run in-process
+    BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", 256))
+    N_PROCESS = int(os.getenv("CLASSIFIER_N_PROCESS", 1))
+
+    CACHE_SIZE = int(os.getenv("CLASSIFIER_CACHE_SIZE", 10000))
+    CACHE_PATH = os.getenv("CLASSIFIER_CACHE_PATH")
+
+    _nlp = None
+    _categories = ()
+    _centroid_matrix = None  # one L2-normalised row per category
+    _reference_source = None  # the CATEGORY_DOCS the centroids were built from
+    _cache = None
+    _cache_source = None  # the CATEGORY_DOCS that the cache version was computed from
+    _matcher = None
+    _matcher_source = None  # the (CATEGORY_DOCS, KEYWORDS) the matcher was built from
+    _load_lock = threading.RLock()
+    _path_counts = {"keyword": 0, "cache": 0, "model": 0}
+    _path_lock = threading.Lock()
+    load_stats = None
+
+    @classmethod
+    def load(cls):
+        """Load the model and category centroids once per process; returns the pipeline."""
+        if cls._nlp is None:
+            with cls._load_lock:
+                if cls._nlp is None:
+                    started, rss_before = time.perf_counter(), _rss_mb()
+                    model, backend = cls._open_model()
+                    cls._build_centroids(model)
+                    cls._nlp = model
+                    cls.load_stats = {
+                        "model": cls.MODEL_NAME,
+                        "backend": backend,
+                        "load_seconds": round(time.perf_counter() - started, 3),
+                        "rss_mb": round(_rss_mb(), 1),
+                        "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+                    }
+        return cls._nlp
+
+    @classmethod
+    def _open_model(cls):
+        """``(model, backend)``: the vector table if one is configured, else the spaCy pipeline."""
+        if cls.VECTORS_PATH:
+            try:
+                return VectorTable.load(cls.VECTORS_PATH), "vectors"
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[Classifier Error] Could not load vector table {cls.VECTORS_PATH}, using spaCy: {e}")
+        import spacy
+
+        return spacy.load(cls.MODEL_NAME), "spacy"
+
+    @classmethod
+    def preload(cls):
+        """Eagerly load the model (e.g. in the web server master before fork) and report its cost."""
+        cls.load()
+        print(
+            f"[Classifier] Loaded {cls.load_stats['model']} ({cls.load_stats['backend']}) in {cls.load_stats['load_seconds']}s, "
+            f"RSS {cls.load_stats['rss_mb']} MB (+{cls.load_stats['rss_delta_mb']} MB)"
+        )
+        return cls.load_stats
+
+    @classmethod
+    def loaded(cls):
+        return cls._nlp is not None
+
+    @classmethod
+    def cache(cls):
+        if cls._cache is None:
+            with cls._load_lock:
+                if cls._cache is None:
+                    cls._cache = ClassificationCache(cls.CACHE_SIZE, cls.CACHE_PATH)
+        if cls._cache_source != cls.CATEGORY_DOCS:
+            with cls._load_lock:
+                fingerprint = json.dumps([cls.MODEL_NAME, cls.VECTORS_PATH, cls.CATEGORY_DOCS], sort_keys=True)
+                cls._cache.set_version(hashlib.sha256(fingerprint.encode()).hexdigest()[:16])
+                cls._cache_source = dict(cls.CATEGORY_DOCS)
+        return cls._cache
+
+    @classmethod
+    def cache_stats(cls):
+        return cls.cache().stats()
+
+    @staticmethod
+    def _normalize_rows(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+    @classmethod
+    def _reference_matrix(cls, model):
+        categories = tuple(cls.CATEGORY_DOCS)
+        if isinstance(model, VectorTable):
+            vectors = [model.vector(cls.CATEGORY_DOCS[category]) for category in categories]
+        else:
+            vectors = [model(cls.CATEGORY_DOCS[category]).vector for category in categories]
+        matrix = np.array(vectors, dtype=np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return categories, cls._normalize_rows(matrix)
+
+    @classmethod
+    def _build_centroids(cls, model):
+        cls._categories, cls._centroid_matrix = cls._reference_matrix(model)
+        cls._reference_source = dict(cls.CATEGORY_DOCS)
+
+    @classmethod
+    def centroids(cls):
+        """``(categories, matrix)``: the category names and their normalised reference vectors."""
+        nlp = cls.load()
+        if cls._reference_source != cls.CATEGORY_DOCS:
+            with cls._load_lock:
+                cls._build_centroids(nlp)
+        return cls._categories, cls._centroid_matrix
+
+    @classmethod
+    def score_vectors(cls, vectors):
+        """Classify an (N x dim) matrix of description vectors in one matrix product.
+
+        Returns ``(categories, confidences)``, where a confidence is the cosine
+        similarity to the chosen category's centroid. Zero vectors (no known
+        words) get the first category with confidence 0, as before.
+        """
+        return cls._score(vectors, *cls.centroids())
+
+    @classmethod
+    def _score(cls, vectors, categories, matrix):
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if not categories:
+            return ["Others"] * len(vectors), np.zeros(len(vectors), dtype=np.float32)
+        scores = cls._normalize_rows(vectors) @ matrix.T
+        best = scores.argmax(axis=1)
+        return [categories[i] for i in best], scores[np.arange(len(best)), best]
+
+    @classmethod
+    def vectors(cls, texts, batch_size=None, n_process=None):
+        """Averaged word vectors of ``texts`` as an (N x dim) matrix.
+
+        ``n_process`` defaults to 1; only batch callers should ask for worker processes.
+        """
+        return cls._embed(cls.load(), texts, batch_size, n_process)
+
+    @classmethod
+    def _embed(cls, nlp, texts, batch_size=None, n_process=None):
+        # With spaCy, run nlp.pipe with every pipeline component disabled: the
+        # static word vectors only need the tokenizer, not the tagger, parser or NER
+        if isinstance(nlp, VectorTable):
+            return nlp.vectors(texts)
+        docs = nlp.pipe(
+            texts,
+            batch_size=batch_size or cls.BATCH_SIZE,
+            n_process=n_process or 1,
+            disable=nlp.pipe_names,
+        )
+        return np.array([doc.vector for doc in docs], dtype=np.float32)
+
+    @classmethod
+    def classify_with_model(cls, model, descriptions):
+        """Model-only categories of ``descriptions`` under ``model`` (a spaCy pipeline
+        or a VectorTable), bypassing keywords, the cache and the loaded model.
+        Used to check a vector table against the pipeline it was built from."""
+        texts = [ClassificationCache.normalize(description) for description in descriptions]
+        if not texts:
+            return []
+        return cls._score(cls._embed(model, texts), *cls._reference_matrix(model))[0]
+
+    @classmethod
+    def classify_with_confidence(cls, description):
+        [category], [confidence] = cls.score_vectors(cls.vectors([description]))
+        return category, float(confidence)
+
+    @classmethod
+    def keyword_table(cls):
+        table = {
+            word: category
+            for category, text in cls.CATEGORY_DOCS.items()
+            for word in KeywordMatcher.tokenize(text)
+        }
+        table.update(cls.KEYWORDS)
+        if cls.KEYWORDS_PATH:
+            with open(cls.KEYWORDS_PATH) as f:
+                table.update(json.load(f))
+        return table
+
+    @classmethod
+    def keyword_matcher(cls):
+        source = (cls.CATEGORY_DOCS, cls.KEYWORDS)
+        if cls._matcher is None or cls._matcher_source != source:
+            with cls._load_lock:
+                cls._matcher = KeywordMatcher(cls.keyword_table())
+                cls._matcher_source = (dict(cls.CATEGORY_DOCS), dict(cls.KEYWORDS))
+        return cls._matcher
+
+    @classmethod
+    def _count(cls, path, count=1):
+        with cls._path_lock:
+            cls._path_counts[path] += count
+
+    @classmethod
+    def path_stats(cls):
+        """How many classifications each path served, and their share of the total."""
+        with cls._path_lock:
+            counts = dict(cls._path_counts)
+        total = sum(counts.values())
+        return {
+            "counts": counts,
+            "total": total,
+            "shares": {path: round(count / total, 4) if total else None for path, count in counts.items()},
+        }
+
+    @classmethod
+    def reset_path_stats(cls):
+        with cls._path_lock:
+            cls._path_counts = dict.fromkeys(cls._path_counts, 0)
+
     @classmethod
     def classify(cls, description):
-        doc = cls.nlp(description)
-        best_score = -1
-        best_cat = "Others"
+        key = ClassificationCache.normalize(description)
+        category = cls.keyword_matcher().match(key)
+        if category is not None:
+            cls._count("keyword")
+            return category
+
+        cache = cls.cache()
+        category = cache.get(key)
+        if category is not None:
+            cls._count("cache")
+            return category
+
+        category = cls._classify_uncached(key)
+        cache.put(key, category)
+        cls._count("model")
+        return category
+
+    @classmethod
+    def _classify_uncached(cls, description):
+        return cls.classify_with_confidence(description)[0]
+
+    @classmethod
+    def classify_many(cls, descriptions, batch_size=None, n_process=None):
+        """Classify a list of descriptions; returns their categories in order.
+
+        Keyword matches and cached results are resolved first; the remaining
+        distinct descriptions go through the model in one ``nlp.pipe`` pass and
+        one matrix product.
+        """
+        matcher = cls.keyword_matcher()
+        cache = cls.cache()
+        results = [None] * len(descriptions)
+        pending = {}  # normalised description -> indexes awaiting the model
+        keyword_hits = cache_hits = 0
+
+        for index, description in enumerate(descriptions):
+            key = ClassificationCache.normalize(description)
+            if key in pending:
+                pending[key].append(index)
+                continue
+            category = matcher.match(key)
+            if category is not None:
+                keyword_hits += 1
+            else:
+                category = cache.get(key)
+                if category is None:
+                    pending[key] = [index]
+                    continue
+                cache_hits += 1
+            results[index] = category
 
-        for cat, ref_doc in cls.CATEGORY_DOCS.items():
-            score = doc.similarity(ref_doc)
-            if score > best_score:
-                best_score = score
-                best_cat = cat
+        if pending:
+            texts = list(pending)
+            categories, _ = cls.score_vectors(cls.vectors(texts, batch_size, n_process or cls.N_PROCESS))
+            cache.put_many(zip(texts, categories))
+            for text, category in zip(texts, categories):
+                for index in pending[text]:
+                    results[index] = category
 
-        return best_cat
+        cls._count("keyword", keyword_hits)
+        cls._count("cache", cache_hits)
+        cls._count("model", sum(len(indexes) for indexes in pending.values()))
+        return results
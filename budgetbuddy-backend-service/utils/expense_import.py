@@ -0,0 +1,177 @@
+import codecs
+import csv
+import json
+import math
+
+
+class ExpenseImportParser:
+    """Incrementally parses an uploaded expense file into records.
+
+    The upload is read ``READ_SIZE`` bytes at a time and records are yielded one by
+    one, so memory stays flat regardless of file size. Parsing stops at the first
+    invalid record and the reason is left in ``error``; records yielded before it
+    are still valid.
+    """
+
+    READ_SIZE = 64 * 1024
+    MAX_LINE_LENGTH = 1024 * 1024
+    REQUIRED_CSV_FIELDS = ("amount", "category", "date", "method")
+    FORMATS = {
+        ".csv": "_csv_records",
+        ".json": "_json_array_records",
+        ".ndjson": "_ndjson_records",
+        ".jsonl": "_ndjson_records",
+    }
+
+    def __init__(self, stream, filename):
+        self.stream = stream
+        self.filename = filename
+        self.error = None
+
+    @classmethod
+    def supports(cls, filename):
+        return any(filename.endswith(suffix) for suffix in cls.FORMATS)
+
+    def records(self):
+        suffix = next(s for s in self.FORMATS if self.filename.endswith(s))
+        try:
+            yield from getattr(self, self.FORMATS[suffix])()
+        except _ParseError as e:
+            self.error = str(e)
+        except UnicodeDecodeError:
+            self.error = "File must be UTF-8 encoded"
+
+    def _text_chunks(self):
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        while True:
+            data = self.stream.read(self.READ_SIZE)
+            if not data:
+                tail = decoder.decode(b"", final=True)
+                if tail:
+                    yield tail
+                return
+            text = decoder.decode(data)
+            if text:
+                yield text
+
+    def _lines(self):
+        # Keep the unfinished line as a list of pieces so each chunk is split
+        # once, and cap its length so a file without newlines can't grow it forever
+        pending, pending_length = [], 0
+        for text in self._text_chunks():
+            lines = text.split("\n")
+            if len(lines) > 1:
+                yield "".join(pending) + lines[0] + "\n"
+                for line in lines[1:-1]:
+                    yield line + "\n"
+                pending, pending_length = [], 0
+            if lines[-1]:
+                pending.append(lines[-1])
+                pending_length += len(lines[-1])
+                if pending_length > self.MAX_LINE_LENGTH:
+                    raise _ParseError(f"Lines may be at most {self.MAX_LINE_LENGTH} characters long")
+        if pending:
+            yield "".join(pending)
+
+    def _csv_records(self):
+        try:
+            for record in csv.DictReader(self._lines()):
+                # Basic validation
+                if any(field not in record for field in self.REQUIRED_CSV_FIELDS):
+                    raise _ParseError("CSV format error: missing required fields")
+                try:
+                    record["amount"] = _finite(record["amount"])
+                except (TypeError, ValueError):
+                    raise _ParseError("CSV format error: invalid amount field")
+                record["notes"] = record.get("notes") or ""
+                record.pop(None, None)  # overflow cells of over-long rows
+                yield record
+        except csv.Error:
+            raise _ParseError("CSV format error")
+
+    @staticmethod
+    def _json_record(record):
+        if not isinstance(record, dict):
+            raise _ParseError("JSON format error: expected an object per expense")
+        if "amount" not in record:
+            raise _ParseError("JSON format error: missing amount field")
+        try:
+            record["amount"] = _finite(record["amount"])
+        except (TypeError, ValueError):
+            raise _ParseError("JSON format error: invalid amount field")
+        # CSV cells are always strings; JSON values could be anything
+        for field in ("category", "method", "date"):
+            if record.get(field) is not None and not isinstance(record[field], str):
+                raise _ParseError(f"JSON format error: {field} must be a string")
+        return record
+
+    def _ndjson_records(self):
+        for line in self._lines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                raise _ParseError("Invalid JSON format")
+            yield self._json_record(record)
+
+    def _json_array_records(self):
+        """Yield the elements of a top-level JSON array without loading it whole."""
+        decoder = json.JSONDecoder()
+        chunks = self._text_chunks()
+        buffer = ""
+        pos = 0
+        eof = False
+        expecting = "["
+
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    raise _ParseError("Invalid JSON format")
+                text = next(chunks, "")
+                eof = not text
+                buffer, pos = text, 0
+                continue
+
+            char = buffer[pos]
+            if expecting == "[":
+                if char != "[":
+                    raise _ParseError("Invalid JSON format")
+                pos += 1
+                expecting = "first"
+            elif expecting in ("first", "value"):
+                if expecting == "first" and char == "]":
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Either invalid, or the element continues in the next chunk
+                    if eof:
+                        raise _ParseError("Invalid JSON format")
+                    text = next(chunks, "")
+                    eof = not text
+                    buffer, pos = buffer[pos:] + text, 0
+                    continue
+                yield self._json_record(record)
+                pos = end
+                expecting = ","
+            elif char == ",":
+                pos += 1
+                expecting = "value"
+            elif char == "]":
+                return
+            else:
+                raise _ParseError("Invalid JSON format")
+
+
+class _ParseError(Exception):
+    pass
+
+
+def _finite(value):
+    amount = float(value)
+    if not math.isfinite(amount):  # "inf" and "nan" parse as floats
+        raise ValueError(f"Non-finite amount: {value}")
+    return amount
@@ -1,3 +1,7 @@
+import math
+from datetime import datetime
+
+
 class ExpenseValidator:
 
     @staticmethod
@@ -7,16 +11,54 @@ class ExpenseValidator:
             if field not in data:
                 return False, f"Missing required field: {field}"
 
-        if not isinstance(data["amount"], (int, float)) or data["amount"] < 0:
-            return False, "Amount must be a positive number"
+        valid, msg = ExpenseValidator.validate_amount(data["amount"])
+        if not valid:
+            return False, msg
 
-        if not isinstance(data["category"], str) or not data["category"].strip():
-            return False, "Category must be a non-empty string"
+        valid, msg = ExpenseValidator.validate_labels(data)
+        if not valid:
+            return False, msg
 
         if not isinstance(data["date"], str):
             return False, "Date must be a valid string format (e.g., YYYY-MM-DD)"
 
-        if not isinstance(data["method"], str) or not data["method"].strip():
+        return True, "Valid"
+
+    @staticmethod
+    def validate_labels(data):
+        """Check ``category`` and ``method``, where present, are non-empty strings."""
+        if "category" in data and (not isinstance(data["category"], str) or not data["category"].strip()):
+            return False, "Category must be a non-empty string"
+
+        if "method" in data and (not isinstance(data["method"], str) or not data["method"].strip()):
             return False, "Payment method must be a non-empty string"
 
         return True, "Valid"
+
+    @staticmethod
+    def validate_amount(amount):
+        # JSON bodies may carry Infinity and NaN, which no counter can hold
+        if not isinstance(amount, (int, float)) or not math.isfinite(amount) or amount < 0:
+            return False, "Amount must be a positive number"
+        return True, "Valid"
+
+    @staticmethod
+    def validate_filter_args(args):
+        for field in ("from", "to", "date"):
+            if args.get(field):
+                try:
+                    datetime.strptime(args[field], "%Y-%m-%d")
+                except (TypeError, ValueError):
+                    return False, f"{field} must be a date in YYYY-MM-DD format"
+
+        for field in ("min_amount", "max_amount"):
+            if args.get(field) not in (None, ""):
+                try:
+                    float(args[field])
+                except (TypeError, ValueError):
+                    return False, f"{field} must be a number"
+
+        if args.get("from") and args.get("to") and args["from"] > args["to"]:
+            return False, "from must not be after to"
+
+        return True, "Valid"
@@ -0,0 +1,45 @@
+import re
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_END = None  # trie key marking the end of a keyword; never a token
+
+
+class KeywordMatcher:
+    """Token trie over a ``keyword -> category`` table.
+
+    Keywords may span several words ("food delivery"). ``match`` scans the
+    description once from left to right and returns the category of the first
+    keyword found, preferring the longest keyword starting at that position.
+    """
+
+    def __init__(self, table):
+        self.table = dict(table)
+        self._root = {}
+        for keyword, category in self.table.items():
+            tokens = self.tokenize(keyword)
+            if not tokens:
+                continue
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_END] = category
+
+    @staticmethod
+    def tokenize(text):
+        return _TOKEN.findall(str(text or "").lower())
+
+    def match(self, description):
+        tokens = self.tokenize(description)
+        for start in range(len(tokens)):
+            node, found = self._root, None
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                found = node.get(_END, found)
+            if found is not None:
+                return found
+        return None
+
+    def __len__(self):
+        return len(self.table)
@@ -0,0 +1,125 @@
+import base64
+import binascii
+import json
+
+from flask import jsonify
+
+# Same values as firestore.Query.ASCENDING / DESCENDING
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+DOCUMENT_ID = "__name__"
+
+
+class ListQuery:
+    """``limit``/``order_by``/``cursor``/``fields`` options for list endpoints.
+
+    ``order_by`` takes a field name, prefixed with ``-`` for descending order.
+    Results are always tie-broken on document id so the opaque cursor returned by
+    ``next_cursor`` identifies a unique position to resume from. On Firestore each
+    orderable field needs a ``(user_id, field)`` composite index in both
+    directions, so services only allow ordering by the fields indexed in
+    firestore.indexes.json.
+    """
+
+    MAX_LIMIT = 500
+
+    def __init__(self, limit=None, order_by=None, direction=ASCENDING, cursor=None, fields=None):
+        self.limit = limit
+        self.order_by = order_by
+        self.direction = direction
+        self.cursor = cursor
+        self.fields = fields
+
+    @classmethod
+    def from_args(cls, args, allowed_fields, order_fields):
+        """Return ``(ListQuery, None)`` or ``(None, error message)``.
+
+        ``fields`` may name any of ``allowed_fields``; ``order_by`` only ``order_fields``.
+        """
+        args = args or {}
+        list_query = cls()
+
+        limit = args.get("limit")
+        if limit is not None:
+            try:
+                list_query.limit = int(limit)
+            except ValueError:
+                return None, "limit must be an integer"
+            if not 1 <= list_query.limit <= cls.MAX_LIMIT:
+                return None, f"limit must be between 1 and {cls.MAX_LIMIT}"
+
+        order_by = args.get("order_by")
+        if order_by:
+            if order_by.startswith("-"):
+                order_by, list_query.direction = order_by[1:], DESCENDING
+            if order_by not in order_fields:
+                return None, f"Cannot order by: {order_by}"
+            list_query.order_by = order_by
+
+        fields = args.get("fields")
+        if fields:
+            list_query.fields = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = [field for field in list_query.fields if field not in allowed_fields]
+            if unknown:
+                return None, f"Unknown fields: {', '.join(unknown)}"
+
+        cursor = args.get("cursor")
+        if cursor:
+            list_query.cursor = cls._decode_cursor(cursor, list_query.order_by)
+            if list_query.cursor is None:
+                return None, "Invalid cursor"
+
+        return list_query, None
+
+    @staticmethod
+    def _decode_cursor(cursor, order_by):
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            return None
+        # A cursor only makes sense for the ordering it was issued under
+        if not isinstance(decoded, dict) or decoded.get("o") != order_by or not isinstance(decoded.get("v"), list):
+            return None
+        return decoded["v"]
+
+    @property
+    def paginated(self):
+        return self.limit is not None or self.cursor is not None
+
+    def apply(self, query):
+        if self.order_by:
+            query = query.order_by(self.order_by, direction=self.direction)
+        if self.paginated:
+            query = query.order_by(DOCUMENT_ID, direction=self.direction)
+        if self.cursor:
+            query = query.start_after(self.cursor)
+        if self.limit is not None:
+            query = query.limit(self.limit)
+        if self.fields:
+            projection = list(self.fields)
+            if self.order_by and self.order_by not in projection:
+                projection.append(self.order_by)  # needed to build the next cursor
+            query = query.select(projection)
+        return query
+
+    def next_cursor(self, docs):
+        """Opaque cursor for the page after ``docs``, or None on the last page."""
+        if self.limit is None or len(docs) < self.limit:
+            return None
+        last = docs[-1]
+        values = [last.to_dict().get(self.order_by)] if self.order_by else []
+        values.append(last.id)
+        payload = json.dumps({"o": self.order_by, "v": values}, default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def response(self, query):
+        """``(response, 200)`` listing ``query``'s documents with these options applied.
+
+        The ``X-Next-Cursor`` header carries the next page's cursor when there may be one.
+        """
+        docs = list(self.apply(query).stream())
+        response = jsonify([{"id": doc.id, **doc.to_dict()} for doc in docs])
+        next_cursor = self.next_cursor(docs)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class RendererBusy(Exception):
+    """Raised when ``max_pending`` renders are already queued or running."""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render doesn't finish within ``timeout`` seconds.
+
+    The render keeps its worker until it completes and is cached, so a retry
+    for the same key may be served from the cache.
+    """
+
+
+class PDFRenderer:
+    """Bounded, cached PDF rendering.
+
+    ``render`` turns HTML into PDF bytes (wkhtmltopdf through pdfkit, one
+    subprocess per call). At most ``workers`` renders run at once; up to
+    ``max_pending`` more may wait for a worker, and beyond that callers get
+    RendererBusy instead of piling up subprocesses. Results are cached by key
+    in an LRU of ``cache_size`` documents, and concurrent requests for the same
+    key share one render.
+    """
+
+    def __init__(self, render, workers=2, max_pending=32, cache_size=256, timeout=60):
+        self._render = render
+        self.workers = workers
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.rendered = 0
+        self.hits = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-render")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def render(self, key, html):
+        with self._lock:
+            pdf = self._cache.get(key)
+            if pdf is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return pdf
+            future = self._inflight.get(key)
+            if future is None:
+                if not self._slots.acquire(blocking=False):
+                    self.rejected += 1
+                    raise RendererBusy("PDF renderer queue is full")
+                future = self._inflight[key] = self._pool.submit(self._run, key, html)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timed_out += 1
+            raise RenderTimeout(f"PDF render took longer than {self.timeout}s")
+
+    def _run(self, key, html):
+        try:
+            pdf = self._render(html)
+            with self._lock:
+                self.rendered += 1
+                if self.cache_size > 0:
+                    self._cache[key] = pdf
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            return pdf
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            self._slots.release()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.rendered = 0
+            self.hits = 0
+            self.rejected = 0
+            self.timed_out = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "cached": len(self._cache),
+                "in_flight": len(self._inflight),
+                "rendered": self.rendered,
+                "hits": self.hits,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+class ReportCache:
+    """LRU of computed report payloads keyed by (user, endpoint, params).
+
+    Each entry remembers the user data version it was computed at and is only
+    served while that version is current. The ETag is derived from the same
+    key and version, so a client's ``If-None-Match`` can be answered without
+    the payload at all.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(uid, endpoint, params, version):
+        key = json.dumps([uid, endpoint, params, version], sort_keys=True)
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _key(uid, endpoint, params):
+        return uid, endpoint, json.dumps(params, sort_keys=True)
+
+    def get(self, uid, endpoint, params, version):
+        key = self._key(uid, endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, uid, endpoint, params, version, payload):
+        if self.max_size <= 0:
+            return
+        key = self._key(uid, endpoint, params)
+        with self._lock:
+            self._entries[key] = (version, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.not_modified = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
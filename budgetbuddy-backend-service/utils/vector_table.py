@@ -0,0 +1,77 @@
+import json
+import os
+import re
+
+import numpy as np
+
+# Close to spaCy's English tokenizer for short descriptions: numbers, words,
+# clitics ("'s") and single punctuation marks
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|\w+|'\w+|[^\w\s]")
+
+
+class VectorTable:
+    """Static word vectors for a fixed vocabulary, memory-mapped from disk.
+
+    ``build`` copies the spaCy vectors of every token seen in a corpus into a
+    float16 matrix (``vectors.npy``) plus a token -> row index (``tokens.json``).
+    ``load`` maps the matrix read-only, so opening it is cheap and its pages are
+    shared through the OS page cache by every process that loads it. Neither
+    needs spaCy at runtime.
+
+    A description's vector is the sum of its tokens' vectors divided by its
+    token count, as in ``Doc.vector``; tokens outside the table count as zeros.
+    """
+
+    MATRIX_FILE = "vectors.npy"
+    INDEX_FILE = "tokens.json"
+
+    def __init__(self, matrix, tokens, meta=None):
+        self.matrix = matrix
+        self.index = {token: row for row, token in enumerate(tokens)}
+        self.meta = meta or {}
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1]
+
+    @staticmethod
+    def tokenize(text):
+        return _TOKEN.findall(str(text or "").lower())
+
+    @classmethod
+    def build(cls, nlp, texts, path):
+        """Write the vectors ``nlp`` has for the tokens of ``texts`` to the directory ``path``."""
+        tokens = sorted({
+            token for text in texts for token in cls.tokenize(text) if nlp.vocab.has_vector(token)
+        })
+        dim = nlp.vocab.vectors_length
+        matrix = np.zeros((len(tokens), dim), dtype=np.float16)
+        for row, token in enumerate(tokens):
+            matrix[row] = nlp.vocab.get_vector(token)
+
+        meta = {"model": f"{nlp.meta.get('lang', '')}_{nlp.meta.get('name', '')}", "dim": dim}
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, cls.MATRIX_FILE), matrix)
+        with open(os.path.join(path, cls.INDEX_FILE), "w") as f:
+            json.dump({**meta, "tokens": tokens}, f)
+        return cls(matrix, tokens, meta)
+
+    @classmethod
+    def load(cls, path):
+        matrix = np.load(os.path.join(path, cls.MATRIX_FILE), mmap_mode="r")
+        with open(os.path.join(path, cls.INDEX_FILE)) as f:
+            meta = json.load(f)
+        return cls(matrix, meta.pop("tokens"), meta)
+
+    def vector(self, text):
+        tokens = self.tokenize(text)
+        rows = [self.index[token] for token in tokens if token in self.index]
+        if not rows:
+            return np.zeros(self.dim, dtype=np.float32)
+        return self.matrix[rows].astype(np.float32).sum(axis=0) / len(tokens)
+
+    def vectors(self, texts):
+        return np.array([self.vector(text) for text in texts], dtype=np.float32).reshape(-1, self.dim)
+
+    def __len__(self):
+        return len(self.index)